@@ -22,9 +22,15 @@ from typing import Dict, List, Any, Optional
 import warnings
 import threading
 import time
+import os
+import sys
 from pathlib import Path
 warnings.filterwarnings('ignore')
 
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
+
 class AdvancedAnalytics:
     """
     The main class for handling advanced analytics.
@@ -102,13 +108,18 @@ class AdvancedAnalytics:
     
     def setup_database(self):
         """
-        Sets up an in-memory SQLite database and populates it with the car parts data.
+        Sets up a SQLite database and populates it with the car parts data.
 
         This method creates a 'parts' table, inserts all the data, and creates
-        indexes on key columns to ensure fast query performance.
+        indexes on key columns to ensure fast query performance. The load runs
+        on the database's writer thread; analytics queries then use one read
+        connection per thread, so concurrent requests do not share a handle.
         """
-        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
-        cursor = self.conn.cursor()
+        self.db = SQLiteDatabase(name='advanced_analytics')
+        self.db.transaction(self._load_parts_table)
+    
+    def _load_parts_table(self, conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
         
         # Create parts table
         cursor.execute('''
@@ -150,8 +161,6 @@ class AdvancedAnalytics:
                 json.dumps(part)
             ))
         
-        self.conn.commit()
-        
         # Create indexes for performance
         cursor.execute('CREATE INDEX idx_system ON parts(system)')
         cursor.execute('CREATE INDEX idx_manufacturer ON parts(manufacturer)')
@@ -232,7 +241,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Single optimized query with all calculations
         cursor.execute('''
@@ -319,7 +328,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Optimized manufacturer analysis with limits
         cursor.execute('''
@@ -430,7 +439,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Simplified warranty analysis with limits
         cursor.execute('''
@@ -565,7 +574,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Optimized price variance analysis with limits
         cursor.execute('''
@@ -778,7 +787,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Get basic counts in one query
         cursor.execute('''
@@ -821,7 +830,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         cursor.execute('''
             SELECT system, COUNT(*) as part_count, AVG(cost) as avg_cost
             FROM parts 
@@ -856,7 +865,7 @@ class AdvancedAnalytics:
         if cached_result:
             return cached_result
             
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         cursor.execute('''
             SELECT 
                 MIN(cost) as min_cost,
@@ -899,7 +908,7 @@ class AdvancedAnalytics:
         cost_summary = self.get_cost_summary()
         
         # Get high-level insights quickly
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Quick risk assessment
         cursor.execute('''
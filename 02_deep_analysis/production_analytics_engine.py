@@ -6,6 +6,7 @@ Real-time insights, predictive analytics, and business intelligence
 """
 
 import json
+import re
 import pandas as pd
 import numpy as np
 import sqlite3
@@ -15,10 +16,17 @@ from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import threading
 import time
+import os
+import sys
 from dataclasses import dataclass
 import statistics
 from collections import defaultdict, Counter
 
+# Shared modules (sqlite_access, hierarchy_index) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
+from hierarchy_index import HierarchyIndex
+
 # Production logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +38,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def extract_cost(cost_data) -> float:
+    """Cost as a float; strings keep their first number ("₹2500" -> 2500.0)."""
+    if isinstance(cost_data, (int, float)):
+        return float(cost_data)
+    if isinstance(cost_data, str):
+        numbers = re.findall(r'[\d.]+', cost_data)
+        return float(numbers[0]) if numbers else 0.0
+    return 0.0
+
+def part_cost(part: Dict) -> float:
+    return extract_cost(part.get('cost', part.get('cost_price', 0)))
+
+def part_stock(part: Dict) -> int:
+    try:
+        return int(part.get('stock', part.get('current_stock', 0)))
+    except (TypeError, ValueError):
+        return 0
+
+def part_quality_score(part: Dict) -> float:
+    # Try multiple sources for quality score
+    if 'quality_score' in part:
+        return float(part['quality_score'])
+    if 'quality' in part and isinstance(part['quality'], dict):
+        return float(part['quality'].get('overall_rating', 4.0))
+    return 4.0  # Default quality score
+
+def part_inventory_value(part: Dict) -> Optional[float]:
+    cost, stock = part_cost(part), part_stock(part)
+    return cost * stock if cost > 0 and stock > 0 else None
+
+def part_category_path(part: Dict) -> List[str]:
+    """Category and subcategory as the analytics_parts columns store them (the tree's two levels)."""
+    return [str(part.get('category') or part.get('system') or 'General'),
+            str(part.get('subcategory') or part.get('sub_system') or 'General')]
+
+# Hierarchy rollups, read the same way as the analytics_parts columns they replace GROUP BYs over
+HIERARCHY_METRICS = {
+    'cost': part_cost,
+    'stock': part_stock,
+    'inventory_value': part_inventory_value,
+    'quality_score': part_quality_score,
+}
+
 @dataclass
 class AnalyticsMetrics:
     """Production analytics metrics structure"""
@@ -62,7 +113,8 @@ class ProductionAnalyticsEngine:
         """Initialize the production analytics engine"""
         self.dataset_path = dataset_path or self._find_dataset_path()
         self.parts_data = []
-        self.db_connection = None
+        self.db: Optional[SQLiteDatabase] = None
+        self.hierarchy: Optional[HierarchyIndex] = None
         
         # Performance optimization
         self._cache = {}
@@ -73,6 +125,9 @@ class ProductionAnalyticsEngine:
         # Load and initialize data
         self._load_production_dataset()
         self._setup_analytics_database()
+        # Per-category counts and rollups, kept instead of re-aggregating the table on every report;
+        # filed by the category column, not the System Name taxonomy of the hierarchy CSV
+        self.hierarchy = HierarchyIndex(self.parts_data, metrics=HIERARCHY_METRICS, path=part_category_path)
         
         logger.info(f"Production Analytics Engine initialized with {len(self.parts_data):,} parts")
     
@@ -164,68 +219,68 @@ class ProductionAnalyticsEngine:
         return sample_data
     
     def _setup_analytics_database(self) -> None:
-        """Setup in-memory SQLite database for analytics"""
+        """Setup the SQLite analytics database (loaded by its writer thread, read per thread)"""
         try:
-            self.db_connection = sqlite3.connect(':memory:', check_same_thread=False)
-            cursor = self.db_connection.cursor()
-            
-            # Create optimized table for analytics
-            cursor.execute('''
-                CREATE TABLE analytics_parts (
-                    id INTEGER PRIMARY KEY,
-                    part_id TEXT,
-                    part_name TEXT,
-                    category TEXT,
-                    subcategory TEXT,
-                    manufacturer TEXT,
-                    cost REAL,
-                    retail_price REAL,
-                    stock INTEGER,
-                    quality_score REAL,
-                    warranty_period TEXT,
-                    production_year INTEGER,
-                    country_of_origin TEXT,
-                    lead_time_days INTEGER,
-                    reorder_point INTEGER,
-                    supplier_rating REAL,
-                    installation_time INTEGER,
-                    criticality_level TEXT,
-                    market_availability TEXT,
-                    innovation_score INTEGER,
-                    data_json TEXT
-                )
-            ''')
-            
-            # Insert data with enhanced parsing
-            for i, part in enumerate(self.parts_data):
-                try:
-                    values = self._extract_analytics_values(part)
-                    cursor.execute('''
-                        INSERT INTO analytics_parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', values)
-                except Exception as e:
-                    logger.warning(f"Skipping part {i}: {e}")
-            
-            self.db_connection.commit()
-            
-            # Create performance indexes
-            indexes = [
-                'CREATE INDEX idx_category ON analytics_parts(category)',
-                'CREATE INDEX idx_manufacturer ON analytics_parts(manufacturer)',
-                'CREATE INDEX idx_cost ON analytics_parts(cost)',
-                'CREATE INDEX idx_stock ON analytics_parts(stock)',
-                'CREATE INDEX idx_quality ON analytics_parts(quality_score)',
-                'CREATE INDEX idx_year ON analytics_parts(production_year)'
-            ]
-            
-            for index_sql in indexes:
-                cursor.execute(index_sql)
-            
+            self.db = SQLiteDatabase(name='production_analytics')
+            self.db.transaction(self._load_analytics_table)
             logger.info("Analytics database setup completed")
             
         except Exception as e:
             logger.error(f"Database setup failed: {e}")
-            self.db_connection = None
+            self.db = None
+    
+    def _load_analytics_table(self, conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
+        
+        # Create optimized table for analytics
+        cursor.execute('''
+            CREATE TABLE analytics_parts (
+                id INTEGER PRIMARY KEY,
+                part_id TEXT,
+                part_name TEXT,
+                category TEXT,
+                subcategory TEXT,
+                manufacturer TEXT,
+                cost REAL,
+                retail_price REAL,
+                stock INTEGER,
+                quality_score REAL,
+                warranty_period TEXT,
+                production_year INTEGER,
+                country_of_origin TEXT,
+                lead_time_days INTEGER,
+                reorder_point INTEGER,
+                supplier_rating REAL,
+                installation_time INTEGER,
+                criticality_level TEXT,
+                market_availability TEXT,
+                innovation_score INTEGER,
+                data_json TEXT
+            )
+        ''')
+        
+        # Insert data with enhanced parsing
+        for i, part in enumerate(self.parts_data):
+            try:
+                values = self._extract_analytics_values(part)
+                cursor.execute('''
+                    INSERT INTO analytics_parts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', values)
+            except Exception as e:
+                logger.warning(f"Skipping part {i}: {e}")
+        
+        # Create performance indexes
+        indexes = [
+            'CREATE INDEX idx_category ON analytics_parts(category)',
+            'CREATE INDEX idx_manufacturer ON analytics_parts(manufacturer)',
+            'CREATE INDEX idx_cost ON analytics_parts(cost)',
+            'CREATE INDEX idx_stock ON analytics_parts(stock)',
+            'CREATE INDEX idx_quality ON analytics_parts(quality_score)',
+            'CREATE INDEX idx_year ON analytics_parts(production_year)'
+        ]
+        
+        for index_sql in indexes:
+            cursor.execute(index_sql)
     
     def _extract_analytics_values(self, part: Dict) -> Tuple:
         """Extract and normalize values for analytics database"""
@@ -238,23 +293,6 @@ class ProductionAnalyticsEngine:
                     return default
             return value
         
-        def extract_cost(cost_data):
-            if isinstance(cost_data, (int, float)):
-                return float(cost_data)
-            if isinstance(cost_data, str):
-                import re
-                numbers = re.findall(r'[\d.]+', cost_data)
-                return float(numbers[0]) if numbers else 0.0
-            return 0.0
-        
-        def extract_quality_score(part_data):
-            # Try multiple sources for quality score
-            if 'quality_score' in part_data:
-                return float(part_data['quality_score'])
-            if 'quality' in part_data and isinstance(part_data['quality'], dict):
-                return float(part_data['quality'].get('overall_rating', 4.0))
-            return 4.0  # Default quality score
-        
         # Extract basic information
         part_id = safe_extract('part_id', f"PART-{hash(str(part)) % 100000:06d}")
         part_name = safe_extract('part_name', safe_extract('name', 'Unknown Part'))
@@ -268,7 +306,7 @@ class ProductionAnalyticsEngine:
         
         # Extract operational data
         stock = safe_extract('stock', safe_extract('current_stock', 0), int)
-        quality_score = extract_quality_score(part)
+        quality_score = part_quality_score(part)
         warranty_period = safe_extract('warranty_period', '12 months')
         production_year = safe_extract('production_year', 2023, int)
         country_of_origin = safe_extract('country_of_origin', 'Unknown')
@@ -329,10 +367,10 @@ class ProductionAnalyticsEngine:
     def _generate_executive_summary(self) -> Dict[str, Any]:
         """Generate executive summary"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return {"error": "Database not available"}
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Key metrics
             cursor.execute("SELECT COUNT(*) FROM analytics_parts")
@@ -371,10 +409,10 @@ class ProductionAnalyticsEngine:
     def _analyze_inventory(self) -> Dict[str, Any]:
         """Analyze inventory metrics"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return {"error": "Database not available"}
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Stock analysis
             cursor.execute("""
@@ -388,14 +426,7 @@ class ProductionAnalyticsEngine:
             stock_data = cursor.fetchone()
             
             # Category stock distribution
-            cursor.execute("""
-                SELECT category, SUM(stock) as total_stock
-                FROM analytics_parts
-                GROUP BY category
-                ORDER BY total_stock DESC
-                LIMIT 10
-            """)
-            category_stock = dict(cursor.fetchall())
+            category_stock = self._top_categories('stock', 10)
             
             return {
                 "total_stock_units": stock_data[0] or 0,
@@ -413,10 +444,10 @@ class ProductionAnalyticsEngine:
     def _analyze_financial_metrics(self) -> Dict[str, Any]:
         """Analyze financial performance"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return {"error": "Database not available"}
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Cost analysis
             cursor.execute("""
@@ -432,15 +463,7 @@ class ProductionAnalyticsEngine:
             financial_data = cursor.fetchone()
             
             # Top value categories
-            cursor.execute("""
-                SELECT category, SUM(cost * stock) as category_value
-                FROM analytics_parts
-                WHERE cost > 0 AND stock > 0
-                GROUP BY category
-                ORDER BY category_value DESC
-                LIMIT 5
-            """)
-            top_value_categories = dict(cursor.fetchall())
+            top_value_categories = self._top_categories('inventory_value', 5)
             
             return {
                 "average_part_cost": round(financial_data[0] or 0, 2),
@@ -460,10 +483,10 @@ class ProductionAnalyticsEngine:
     def _analyze_quality_metrics(self) -> Dict[str, Any]:
         """Analyze quality performance"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return {"error": "Database not available"}
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Quality distribution
             cursor.execute("""
@@ -478,21 +501,14 @@ class ProductionAnalyticsEngine:
             quality_data = cursor.fetchone()
             
             # Quality by category
-            cursor.execute("""
-                SELECT category, AVG(quality_score) as avg_quality
-                FROM analytics_parts
-                WHERE quality_score > 0
-                GROUP BY category
-                ORDER BY avg_quality DESC
-            """)
-            quality_by_category = dict(cursor.fetchall())
+            quality_by_category = self._top_categories('quality_score', None, average=True)
             
             return {
                 "overall_quality_score": round(quality_data[0] or 4.0, 2),
                 "high_quality_parts": quality_data[1] or 0,
                 "low_quality_parts": quality_data[2] or 0,
                 "supplier_rating": round(quality_data[3] or 4.0, 2),
-                "quality_by_category": {k: round(v, 2) for k, v in quality_by_category}
+                "quality_by_category": quality_by_category
             }
             
         except Exception as e:
@@ -502,10 +518,10 @@ class ProductionAnalyticsEngine:
     def _analyze_supply_chain(self) -> Dict[str, Any]:
         """Analyze supply chain performance"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return {"error": "Database not available"}
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Lead time analysis
             cursor.execute("""
@@ -544,10 +560,10 @@ class ProductionAnalyticsEngine:
         insights = []
         
         try:
-            if not self.db_connection:
+            if not self.db:
                 return []
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Predict demand based on stock levels
             cursor.execute("""
@@ -595,33 +611,36 @@ class ProductionAnalyticsEngine:
         
         return insights[:10]  # Return top 10 insights
     
+    def _top_categories(self, metric: str, limit: Optional[int], average: bool = False) -> Dict[str, float]:
+        """Categories ranked by a hierarchy rollup total (or average), highest first"""
+        ranked = []
+        for node in self.hierarchy.children():
+            if not node.part_count:
+                continue
+            rollup = node.rollup(metric)
+            value = rollup['average'] if average else rollup['total']
+            if value:
+                ranked.append((node.name, value))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return dict(ranked[:limit])
+    
     def _analyze_categories(self) -> Dict[str, Any]:
         """Analyze part categories"""
         try:
-            if not self.db_connection:
-                return {"error": "Database not available"}
-            
-            cursor = self.db_connection.cursor()
-            
-            cursor.execute("""
-                SELECT 
-                    category,
-                    COUNT(*) as part_count,
-                    AVG(cost) as avg_cost,
-                    SUM(stock) as total_stock,
-                    AVG(quality_score) as avg_quality
-                FROM analytics_parts
-                GROUP BY category
-                ORDER BY part_count DESC
-            """)
+            if not self.hierarchy:
+                return {"error": "Hierarchy index not available"}
             
+            # Children come most parts first, with their rollups already totalled
             categories = {}
-            for row in cursor.fetchall():
-                categories[row[0]] = {
-                    "part_count": row[1],
-                    "average_cost": round(row[2] or 0, 2),
-                    "total_stock": row[3] or 0,
-                    "average_quality": round(row[4] or 4.0, 2)
+            for node in self.hierarchy.children():
+                if not node.part_count:
+                    continue
+                categories[node.name] = {
+                    "part_count": node.part_count,
+                    "average_cost": node.rollup('cost')['average'] or 0,
+                    "total_stock": int(node.rollup('stock')['total']),
+                    "average_quality": node.rollup('quality_score')['average'] or 4.0,
+                    "subcategories": len(node.children)
                 }
             
             return categories
@@ -657,10 +676,10 @@ class ProductionAnalyticsEngine:
     def _calculate_inventory_health(self) -> float:
         """Calculate overall inventory health score"""
         try:
-            if not self.db_connection:
+            if not self.db:
                 return 7.5
             
-            cursor = self.db_connection.cursor()
+            cursor = self.db.reader.cursor()
             
             # Calculate health factors
             cursor.execute("SELECT COUNT(*) FROM analytics_parts")
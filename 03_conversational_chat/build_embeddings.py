@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+IntelliPart Bulk Embedding Builder
+Shards the catalog across a process pool, writes vectors into a memory-mapped
+matrix and checkpoints finished shards so an interrupted run can resume.
+
+Usage:
+    python build_embeddings.py --output .search_cache/embeddings --backend sentence-transformers --workers 4
+
+The web app picks the result up via INTELLIPART_EMBEDDINGS_DIR. ``--dataset``
+defaults to the file the app itself loads; an artifact built from any other
+data never matches the app's catalog fingerprint and is ignored.
+"""
+
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from catalog_artifacts import (
+    EMBEDDINGS_FILE, MANIFEST_FILE, app_dataset_file, catalog_fingerprint, read_manifest, write_json_atomic
+)
+from text_encoders import create_encoder, part_to_embedding_text, resolve_encoder
+
+DEFAULT_DATASET = app_dataset_file()
+DEFAULT_OUTPUT = Path(__file__).parent / ".search_cache" / "embeddings"
+
+# Per-process encoder, created once by the pool initializer
+_worker_encoder = None
+
+
+def load_parts(paths: List[str]) -> List[Dict[str, Any]]:
+    """Load parts from JSONL files or directories of JSONL files, in sorted order."""
+    files = []
+    for path in paths:
+        path = Path(path)
+        files.extend(sorted(path.glob('*.jsonl')) if path.is_dir() else [path])
+    parts = []
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    parts.append(json.loads(line))
+    return parts
+
+
+def _init_worker(backend: str, model: Optional[str]) -> None:
+    global _worker_encoder
+    _worker_encoder = create_encoder(backend, model)
+
+
+def _encode_shard(task) -> Dict[str, Any]:
+    shard_id, start, texts, output_path, batch_size = task
+    started = time.time()
+    vectors = _worker_encoder.encode(texts, batch_size=batch_size)
+    out = np.load(output_path, mmap_mode='r+')
+    out[start:start + len(texts)] = vectors
+    out.flush()
+    del out
+    return {'shard_id': shard_id, 'count': len(texts), 'seconds': time.time() - started}
+
+
+def build_embeddings(parts: List[Dict[str, Any]], output_dir: str, backend: str, model: Optional[str] = None,
+                     workers: int = 0, shard_size: int = 5000, batch_size: int = 64) -> Dict[str, Any]:
+    """Encode ``parts`` into ``output_dir``, resuming from any completed shards."""
+    # Record the model actually used (defaults applied), so loaders can reject builds of another model
+    backend, model = resolve_encoder(backend, model)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, EMBEDDINGS_FILE)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    workers = workers or os.cpu_count() or 1
+    fingerprint = catalog_fingerprint(parts)
+    num_shards = (len(parts) + shard_size - 1) // shard_size
+
+    manifest = read_manifest(output_dir)
+    resumable = (
+        manifest is not None
+        and manifest.get('fingerprint') == fingerprint
+        and manifest.get('backend') == backend
+        and manifest.get('model') == model
+        and manifest.get('shard_size') == shard_size
+        and os.path.exists(output_path)
+    )
+    if not resumable:
+        dimension = create_encoder(backend, model).dimension
+        # Create the .npy file at full size; shard workers map and fill it
+        np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=(len(parts), dimension))
+        manifest = {
+            'fingerprint': fingerprint, 'backend': backend, 'model': model,
+            'count': len(parts), 'dimension': dimension, 'shard_size': shard_size,
+            'completed_shards': [], 'complete': False,
+        }
+        write_json_atomic(manifest_path, manifest)
+    completed = set(manifest['completed_shards'])
+    print(f"📦 {len(parts)} parts in {num_shards} shards; {len(completed)} already done")
+
+    tasks = []
+    for shard_id in range(num_shards):
+        if shard_id in completed:
+            continue
+        start = shard_id * shard_size
+        texts = [part_to_embedding_text(p) for p in parts[start:start + shard_size]]
+        tasks.append((shard_id, start, texts, output_path, batch_size))
+
+    started = time.time()
+    encoded = 0
+    if tasks:
+        with Pool(processes=min(workers, len(tasks)), initializer=_init_worker, initargs=(backend, model)) as pool:
+            for result in pool.imap_unordered(_encode_shard, tasks):
+                encoded += result['count']
+                completed.add(result['shard_id'])
+                # Checkpoint after every shard so a crash loses at most in-flight work
+                manifest['completed_shards'] = sorted(completed)
+                write_json_atomic(manifest_path, manifest)
+                elapsed = time.time() - started
+                print(f"✅ Shard {result['shard_id'] + 1}/{num_shards}: "
+                      f"{result['count'] / max(result['seconds'], 1e-9):.0f} parts/sec "
+                      f"(overall {encoded / max(elapsed, 1e-9):.0f} parts/sec)")
+
+    elapsed = time.time() - started
+    manifest['complete'] = len(completed) == num_shards
+    manifest['parts_per_second'] = round(encoded / elapsed, 1) if encoded and elapsed else None
+    write_json_atomic(manifest_path, manifest)
+    print(f"🏁 Encoded {encoded} parts in {elapsed:.1f}s -> {output_path}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build catalog embeddings with a process pool")
+    parser.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)],
+                        help="JSONL files or directories of JSONL files")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help="Artifact directory")
+    parser.add_argument('--backend', default=os.environ.get('INTELLIPART_ENCODER', 'sentence-transformers'))
+    parser.add_argument('--model', default=os.environ.get('INTELLIPART_ENCODER_MODEL'))
+    parser.add_argument('--workers', type=int, default=0, help="Processes (default: all cores)")
+    parser.add_argument('--shard-size', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    parts = load_parts(args.dataset)
+    build_embeddings(parts, args.output, args.backend, args.model,
+                     workers=args.workers, shard_size=args.shard_size, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
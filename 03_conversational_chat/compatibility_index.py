@@ -0,0 +1,147 @@
+"""
+IntelliPart Vehicle Compatibility Index
+Inverted indexes over vehicle model, engine and trim plus a year-range interval index
+"""
+
+import re
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+_YEAR_RANGE = re.compile(r'(\d{4})\s*(?:-|–|to)\s*(\d{4}|present|current)', re.IGNORECASE)
+_SINGLE_YEAR = re.compile(r'\b(19\d{2}|20\d{2})\b')
+# Years in free text, but not the '2025' inside an id such as 'MP-2025-A442'
+_QUERY_YEAR = re.compile(r'(?<![\w-])(19\d{2}|20\d{2})(?![\w-])')
+
+
+def parse_year_range(value: Any, current_year: int = 2025) -> Optional[Tuple[int, int]]:
+    """Parse '2012-2014', '2018-Present' or '2017' into an inclusive (start, end) tuple."""
+    if not value:
+        return None
+    text = str(value)
+    match = _YEAR_RANGE.search(text)
+    if match:
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2).isdigit() else current_year
+        return (min(start, end), max(start, end))
+    match = _SINGLE_YEAR.search(text)
+    if match:
+        year = int(match.group(1))
+        return (year, year)
+    return None
+
+
+class VehicleCompatibilityIndex:
+    """Fitment lookups over the ``compatibility`` block of each part.
+
+    Models, engines and trims are inverted indexes (lowercased value -> part
+    positions). Year ranges are expanded into per-year buckets, which is cheap
+    because ranges span a handful of model years, and turns a point-in-interval
+    query into a single dict lookup.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]]):
+        self.models: Dict[str, Set[int]] = defaultdict(set)
+        self.engines: Dict[str, Set[int]] = defaultdict(set)
+        self.trims: Dict[str, Set[int]] = defaultdict(set)
+        self.years: Dict[int, Set[int]] = defaultdict(set)
+        self.intervals: Dict[int, Tuple[int, int]] = {}
+        self._display_names: Dict[str, str] = {}
+        for idx, part in enumerate(parts):
+            self.add_part(idx, part)
+        self._build_vocabulary()
+
+    def add_part(self, idx: int, part: Dict[str, Any]) -> None:
+        """Index the compatibility block of a single part."""
+        compat = part.get('compatibility')
+        if not isinstance(compat, dict):
+            # Flat legacy records carry a single vehicle_model field
+            if part.get('vehicle_model'):
+                self._add_values(self.models, [part['vehicle_model']], idx)
+            return
+        self._add_values(self.models, compat.get('vehicle_models') or [], idx)
+        self._add_values(self.engines, compat.get('engine_types') or [], idx)
+        self._add_values(self.trims, compat.get('trim_levels') or [], idx)
+        interval = parse_year_range(compat.get('year_range'))
+        if interval:
+            self.intervals[idx] = interval
+            for year in range(interval[0], interval[1] + 1):
+                self.years[year].add(idx)
+
+    def _add_values(self, index: Dict[str, Set[int]], values: List[str], idx: int) -> None:
+        for value in values:
+            key = str(value).strip().lower()
+            if key:
+                index[key].add(idx)
+                self._display_names.setdefault(key, str(value).strip())
+
+    def _build_vocabulary(self) -> None:
+        # Longest values first so 'scorpio-n' wins over 'scorpio' and
+        # '1.2l turbo petrol' over '1.2l petrol'
+        vocab = [(key, 'model') for key in self.models]
+        vocab += [(key, 'engine') for key in self.engines]
+        vocab += [(key, 'trim') for key in self.trims]
+        vocab.sort(key=lambda x: len(x[0]), reverse=True)
+        self._vocabulary = [
+            (re.compile(r'(?<![\w.-])' + re.escape(key) + r'(?![\w-])'), key, kind)
+            for key, kind in vocab
+        ]
+
+    def rebuild_vocabulary(self) -> None:
+        """Refresh the query parser after parts were added incrementally."""
+        self._build_vocabulary()
+
+    def parse_query(self, query: str) -> Dict[str, Any]:
+        """Extract fitment criteria from text such as 'Thar, 2.5L Diesel, 2013'."""
+        text = query.lower()
+        criteria: Dict[str, Any] = {}
+        for pattern, key, kind in self._vocabulary:
+            if kind in criteria:
+                continue
+            match = pattern.search(text)
+            if match:
+                criteria[kind] = self._display_names.get(key, key)
+                text = text[:match.start()] + ' ' + text[match.end():]
+        year = _QUERY_YEAR.search(text)
+        if year:
+            criteria['year'] = int(year.group(1))
+        return criteria
+
+    def fitment(self, model: Optional[str] = None, engine: Optional[str] = None,
+                year: Optional[int] = None, trim: Optional[str] = None,
+                candidates: Optional[Set[int]] = None) -> Set[int]:
+        """Return positions of parts matching every given criterion.
+
+        ``candidates`` restricts the result to an id set coming from another
+        filter, so fitment can be combined with the other search paths.
+        """
+        postings = []
+        if model:
+            postings.append(self.models.get(str(model).strip().lower(), set()))
+        if engine:
+            postings.append(self.engines.get(str(engine).strip().lower(), set()))
+        if trim:
+            postings.append(self.trims.get(str(trim).strip().lower(), set()))
+        if year is not None:
+            postings.append(self.years.get(int(year), set()))
+        if candidates is not None:
+            postings.append(candidates)
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def parts_in_years(self, start: int, end: int) -> Set[int]:
+        """Positions of parts whose year range overlaps ``[start, end]``."""
+        result: Set[int] = set()
+        for year in range(start, end + 1):
+            result |= self.years.get(year, set())
+        return result
+
+    def known_models(self) -> List[str]:
+        """Display names of every indexed vehicle model."""
+        return sorted(self._display_names[key] for key in self.models)
@@ -0,0 +1,351 @@
+"""
+IntelliPart Conversation Store
+Session-keyed conversation turns with a per-session turn cap, idle eviction and a global memory budget
+
+A turn is a compact JSON-able dict: the query, the parsed understanding and
+the ranked result ids (``[part index, match type, score]`` rows), never the
+enhanced result records. Follow-ups rebuild records from those ids.
+
+Backends:
+    InMemoryConversationStore  - per process, fastest
+    SQLiteConversationStore    - file backed, so sessions survive worker restarts
+                                 and are shared by workers on one host
+
+``create_conversation_store`` picks one from INTELLIPART_CONVERSATION_STORE
+(``memory`` or ``sqlite:///path/to/sessions.db``).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+DEFAULT_SESSION = 'default'
+DEFAULT_MAX_TURNS = int(os.environ.get('INTELLIPART_SESSION_MAX_TURNS', '20'))
+DEFAULT_IDLE_SECONDS = float(os.environ.get('INTELLIPART_SESSION_IDLE_SECONDS', '1800'))
+DEFAULT_MAX_BYTES = int(os.environ.get('INTELLIPART_SESSION_MEMORY_MB', '64')) * 2**20
+# Longest LLM answer kept per turn; the prompt only ever uses the last few
+MAX_STORED_RESPONSE_CHARS = 2000
+
+
+def _turn_size(turn: Dict[str, Any]) -> int:
+    return len(json.dumps(turn, ensure_ascii=False, separators=(',', ':')))
+
+
+class ConversationStore:
+    """Interface shared by the backends. Every method takes the session id first."""
+
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_turns = max(1, int(max_turns))
+        self.idle_seconds = float(idle_seconds)
+        self.max_bytes = int(max_bytes)
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update_last_turn(self, session_id: str, **fields: Any) -> None:
+        """Merge ``fields`` into the newest turn (e.g. the LLM answer once it arrives)."""
+        raise NotImplementedError
+
+    def turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Oldest-first turns of a session, the last ``limit`` of them when given."""
+        raise NotImplementedError
+
+    def last_turn(self, session_id: str) -> Optional[Dict[str, Any]]:
+        turns = self.turns(session_id, limit=1)
+        return turns[-1] if turns else None
+
+    def get_preferences(self, session_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def set_preferences(self, session_id: str, preferences: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def clear(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than ``idle_seconds``; returns how many went."""
+        raise NotImplementedError
+
+    def status(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class _Session:
+    __slots__ = ('turns', 'sizes', 'preferences', 'last_seen', 'bytes')
+
+    def __init__(self, max_turns: int):
+        self.turns: Deque[Dict[str, Any]] = deque(maxlen=max_turns)
+        self.sizes: Deque[int] = deque(maxlen=max_turns)
+        self.preferences: Dict[str, Any] = {}
+        self.last_seen = time.time()
+        self.bytes = 0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Sessions in an LRU; the least recently active ones go first when the budget is exceeded."""
+
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(max_turns, idle_seconds, max_bytes)
+        self._sessions: 'OrderedDict[str, _Session]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'evicted_idle': 0, 'evicted_budget': 0, 'trimmed_turns': 0}
+
+    def _touch(self, session_id: str, create: bool = False) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is not None and time.time() - session.last_seen > self.idle_seconds:
+            self._drop(session_id)
+            self.stats['evicted_idle'] += 1
+            session = None
+        if session is None and create:
+            session = self._sessions[session_id] = _Session(self.max_turns)
+        if session is not None:
+            session.last_seen = time.time()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.bytes
+
+    def _enforce_budget(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+            self.stats['evicted_budget'] += 1
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        size = _turn_size(turn)
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            if len(session.turns) == session.turns.maxlen:
+                # deque drops the oldest turn; keep the byte count in step
+                session.bytes -= session.sizes[0]
+                self._bytes -= session.sizes[0]
+                self.stats['trimmed_turns'] += 1
+            session.turns.append(turn)
+            session.sizes.append(size)
+            session.bytes += size
+            self._bytes += size
+            self._enforce_budget(session_id)
+
+    def update_last_turn(self, session_id: str, **fields: Any) -> None:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None or not session.turns:
+                return
+            session.turns[-1].update(fields)
+            size = _turn_size(session.turns[-1])
+            delta = size - session.sizes[-1]
+            session.sizes[-1] = size
+            session.bytes += delta
+            self._bytes += delta
+            self._enforce_budget(session_id)
+
+    def turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return []
+            turns = list(session.turns)
+        return turns[-limit:] if limit else turns
+
+    def get_preferences(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            session = self._touch(session_id)
+            return dict(session.preferences) if session is not None else {}
+
+    def set_preferences(self, session_id: str, preferences: Dict[str, Any]) -> None:
+        with self._lock:
+            self._touch(session_id, create=True).preferences = dict(preferences)
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._drop(session_id)
+
+    def evict_idle(self) -> int:
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s.last_seen < cutoff]
+            for session_id in idle:
+                self._drop(session_id)
+            self.stats['evicted_idle'] += len(idle)
+        return len(idle)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_turns': self.max_turns,
+                'idle_seconds': self.idle_seconds,
+                **self.stats,
+            }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """Sessions in a WAL-mode SQLite file, shared by every worker that opens the same path."""
+
+    def __init__(self, path: str, max_turns: int = DEFAULT_MAX_TURNS, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(max_turns, idle_seconds, max_bytes)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_seen REAL,
+                preferences TEXT
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT,
+                seq INTEGER,
+                size INTEGER,
+                data TEXT,
+                PRIMARY KEY (session_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_seen ON sessions(last_seen);
+        ''')
+        self.conn.commit()
+
+    def _touch(self, session_id: str, create: bool = False) -> bool:
+        """Refresh ``last_seen``; drops the session first when it has gone idle. Caller holds the lock."""
+        now = time.time()
+        row = self.conn.execute('SELECT last_seen FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        if row is not None and now - row[0] > self.idle_seconds:
+            self._drop(session_id)
+            row = None
+        if row is None:
+            if not create:
+                return False
+            self.conn.execute('INSERT INTO sessions VALUES (?, ?, ?)', (session_id, now, '{}'))
+        else:
+            self.conn.execute('UPDATE sessions SET last_seen = ? WHERE session_id = ?', (now, session_id))
+        return True
+
+    def _drop(self, session_id: str) -> None:
+        self.conn.execute('DELETE FROM turns WHERE session_id = ?', (session_id,))
+        self.conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def _enforce_limits(self, session_id: str) -> None:
+        self.conn.execute('''
+            DELETE FROM turns WHERE session_id = ? AND seq <= (
+                SELECT MAX(seq) FROM turns WHERE session_id = ?) - ?
+        ''', (session_id, session_id, self.max_turns))
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM turns').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Over budget: drop least recently active sessions other than this one
+        for (oldest,) in self.conn.execute('''
+                SELECT session_id FROM sessions WHERE session_id != ? ORDER BY last_seen
+            ''', (session_id,)).fetchall():
+            freed = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM turns WHERE session_id = ?',
+                                      (oldest,)).fetchone()[0]
+            self._drop(oldest)
+            total -= freed
+            if total <= self.max_bytes:
+                break
+
+    def append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        data = json.dumps(turn, ensure_ascii=False, separators=(',', ':'))
+        with self._lock, self.conn:
+            self._touch(session_id, create=True)
+            self.conn.execute('''
+                INSERT INTO turns VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM turns WHERE session_id = ?), ?, ?)
+            ''', (session_id, session_id, len(data), data))
+            self._enforce_limits(session_id)
+
+    def update_last_turn(self, session_id: str, **fields: Any) -> None:
+        with self._lock, self.conn:
+            if not self._touch(session_id):
+                return
+            row = self.conn.execute('''
+                SELECT seq, data FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT 1
+            ''', (session_id,)).fetchone()
+            if row is None:
+                return
+            turn = json.loads(row[1])
+            turn.update(fields)
+            data = json.dumps(turn, ensure_ascii=False, separators=(',', ':'))
+            self.conn.execute('UPDATE turns SET size = ?, data = ? WHERE session_id = ? AND seq = ?',
+                              (len(data), data, session_id, row[0]))
+
+    def turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock, self.conn:
+            if not self._touch(session_id):
+                return []
+            rows = self.conn.execute('''
+                SELECT data FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?
+            ''', (session_id, limit or self.max_turns)).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def get_preferences(self, session_id: str) -> Dict[str, Any]:
+        with self._lock, self.conn:
+            if not self._touch(session_id):
+                return {}
+            row = self.conn.execute('SELECT preferences FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def set_preferences(self, session_id: str, preferences: Dict[str, Any]) -> None:
+        with self._lock, self.conn:
+            self._touch(session_id, create=True)
+            self.conn.execute('UPDATE sessions SET preferences = ? WHERE session_id = ?',
+                              (json.dumps(preferences, ensure_ascii=False), session_id))
+
+    def clear(self, session_id: str) -> None:
+        with self._lock, self.conn:
+            self._drop(session_id)
+
+    def evict_idle(self) -> int:
+        cutoff = time.time() - self.idle_seconds
+        with self._lock, self.conn:
+            idle = [row[0] for row in self.conn.execute(
+                'SELECT session_id FROM sessions WHERE last_seen < ?', (cutoff,)).fetchall()]
+            for session_id in idle:
+                self._drop(session_id)
+        return len(idle)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = self.conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM turns').fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'sessions': sessions,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'max_turns': self.max_turns,
+            'idle_seconds': self.idle_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def create_conversation_store(spec: Optional[str] = None) -> ConversationStore:
+    """Store named by ``spec`` or INTELLIPART_CONVERSATION_STORE: ``memory`` or ``sqlite:///path``."""
+    spec = spec or os.environ.get('INTELLIPART_CONVERSATION_STORE', 'memory')
+    if spec.startswith('sqlite:///'):
+        return SQLiteConversationStore(spec[len('sqlite:///'):])
+    if spec != 'memory':
+        raise ValueError(f"Unknown conversation store '{spec}' (use 'memory' or 'sqlite:///path')")
+    return InMemoryConversationStore()
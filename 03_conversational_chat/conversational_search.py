@@ -6,13 +6,38 @@ Advanced natural language search for automotive parts with similarity detection
 import json
 import re
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 import sqlite3
-# from lightweight_ai_search import LightweightAISearch  # Moved to archive
 import os
+import sys
+from collections import ChainMap
 from google import genai
 from google.genai import types
+from part_number_index import PartNumberTrigramIndex
+from compatibility_index import VehicleCompatibilityIndex
+from query_matcher import QueryMatcher
+from result_projection import project
+from result_cache import ResultSetCursors, InvalidCursor
+from response_cache import ResponseCache
+from conversation_store import ConversationStore, DEFAULT_SESSION, MAX_STORED_RESPONSE_CHARS, create_conversation_store
+from catalog_artifacts import catalog_fingerprint
+
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
+from text_normalization import normalize, part_search_text
+
+try:
+    from sparse_similarity import SparseTfidfSearch
+except ImportError:
+    SparseTfidfSearch = None
+
+_DECIMAL = re.compile(r'[\d.]+')
+_INTEGER = re.compile(r'\d+')
+_PART_NUMBER = re.compile(r'\b[A-Z0-9]{3,}[-_]?[A-Z0-9]*\b')
+_MAX_PRICE = re.compile(r'under \$?([\d,]+)')
+_MIN_PRICE = re.compile(r'over \$?([\d,]+)')
 
 # --- Gemini/LLM Integration Module ---
 class GeminiLLM:
@@ -38,13 +63,16 @@ class GeminiLLM:
         )
 
     def generate_response(self, prompt: str, context: list = None) -> str:
+        return ''.join(self.stream_response(prompt, context=context)).strip()
+
+    def stream_response(self, prompt: str, context: list = None) -> Iterator[str]:
+        """Answer text chunk by chunk, as Gemini produces it."""
         # Compose context if provided
         context_str = ""
         if context:
             for turn in context[-3:]:
                 context_str += f"User: {turn.get('query', '')}\nAI: {turn.get('llm_response', '')}\n"
         full_prompt = f"{context_str}\n{prompt}" if context_str else prompt
-        response = ""
         contents = [
             types.Content(
                 role="user",
@@ -60,35 +88,73 @@ class GeminiLLM:
                 max_output_tokens=2000,
             )
         ):
-            response += chunk.text
-        return response.strip()
+            if chunk.text:
+                yield chunk.text
 
 # --- Modular Conversational Engine ---
 class ConversationalEngine:
     """Modular conversational engine orchestrating LLM and search backend."""
-    def __init__(self, parts: list, llm: GeminiLLM = None):
-        self.parts_search = ConversationalPartsSearch(parts)
+    # Version of the prompt _build_llm_prompt produces; bump it when the wording changes
+    prompt_template = 'conversational_answer:v1'
+
+    def __init__(self, parts: list, llm: GeminiLLM = None, result_cursors: Optional[ResultSetCursors] = None,
+                 store: Optional[ConversationStore] = None, response_cache: Optional[ResponseCache] = None):
+        self.parts_search = ConversationalPartsSearch(parts, result_cursors=result_cursors, store=store)
+        self.store = self.parts_search.store
         self.llm = llm or GeminiLLM()
-        self.conversation_history = []
+        self.response_cache = response_cache if response_cache is not None else ResponseCache()
 
-    def process_query(self, query: str, limit: int = 10, user_language: str = "en") -> dict:
-        # Use the search backend for understanding and retrieval
-        search_result = self.parts_search.search(query, limit=limit)
+    def _llm_context(self, search_result: dict, history: list, user_language: str) -> str:
+        """Everything besides the question that shapes the answer: retrieved parts, recent turns, language."""
+        parts = [r.get('part_number') or r.get('part_id') or r.get('part_name') for r in search_result.get('results', [])]
+        turns = [(t.get('query'), t.get('llm_response')) for t in history[-3:]]
+        return json.dumps({'parts': parts, 'turns': turns, 'language': user_language}, default=str)
+
+    def process_query(self, query: str, limit: int = 10, user_language: str = "en",
+                      session_id: str = DEFAULT_SESSION) -> dict:
+        # Use the search backend for understanding and retrieval (records this session's turn)
+        search_result = self.parts_search.search(query, limit=limit, session_id=session_id)
         # Compose LLM prompt with search context and user language
         llm_prompt = self._build_llm_prompt(query, search_result, user_language)
-        llm_response = self.llm.generate_response(llm_prompt, context=self.conversation_history)
-        # Update conversation history
-        self.conversation_history.append({
-            'query': query,
-            'search_result': search_result,
-            'llm_response': llm_response
-        })
+        history = self.store.turns(session_id)[:-1]
+        # Same question over the same parts and conversation: reuse the earlier answer
+        llm_response, _ = self.response_cache.get_or_generate(
+            query, lambda: self.llm.generate_response(llm_prompt, context=history),
+            model=self.llm.model_name, template=self.prompt_template,
+            context=self._llm_context(search_result, history, user_language),
+            dataset_version=self.parts_search.catalog_key)
+        # Keep the answer on the turn (trimmed) for the next prompt's context
+        self.store.update_last_turn(session_id, llm_response=llm_response[:MAX_STORED_RESPONSE_CHARS])
         # Return combined result
         return {
             'llm_response': llm_response,
             'search_result': search_result
         }
 
+    def stream_query(self, query: str, limit: int = 10, user_language: str = "en",
+                     session_id: str = DEFAULT_SESSION) -> Iterator[Tuple[str, dict]]:
+        """
+        ``process_query`` as ``(event, data)`` pairs: 'parts' with the search result as soon as
+        retrieval is done, a 'token' per answer chunk as the LLM produces it, then 'done'.
+        Closing the generator stops the LLM call; an abandoned answer is neither cached nor stored.
+        """
+        search_result = self.parts_search.search(query, limit=limit, session_id=session_id)
+        yield 'parts', {'search_result': search_result}
+        llm_prompt = self._build_llm_prompt(query, search_result, user_language)
+        history = self.store.turns(session_id)[:-1]
+        pieces = []
+        cache_match = None
+        for piece, cache_match in self.response_cache.get_or_stream(
+                query, lambda: self.llm.stream_response(llm_prompt, context=history),
+                model=self.llm.model_name, template=self.prompt_template,
+                context=self._llm_context(search_result, history, user_language),
+                dataset_version=self.parts_search.catalog_key):
+            pieces.append(piece)
+            yield 'token', {'text': piece}
+        llm_response = ''.join(pieces).strip()
+        self.store.update_last_turn(session_id, llm_response=llm_response[:MAX_STORED_RESPONSE_CHARS])
+        yield 'done', {'llm_response': llm_response, 'cache': cache_match}
+
     def _build_llm_prompt(self, query: str, search_result: dict, user_language: str = "en") -> str:
         """
         Build a prompt for the LLM grounded in the search results, user query, and recent context.
@@ -136,26 +202,46 @@ class ConversationalEngine:
 # --- ConversationalPartsSearch (Search Implementation) ---
 class ConversationalPartsSearch:
     """Intelligent conversational interface for finding similar and exact automotive parts."""
-    def __init__(self, parts: list):
+    def __init__(self, parts: list, result_cursors: Optional[ResultSetCursors] = None,
+                 store: Optional[ConversationStore] = None):
         # ...existing code...
         self.parts = parts
-        # self.ai_search = LightweightAISearch(parts)  # Moved to archive - using alternative search
-        self.ai_search = None  # Placeholder for now
+        # Offline sparse TF-IDF similarity backing the ai_similarity / hybrid strategies
+        self.ai_search = SparseTfidfSearch(parts) if SparseTfidfSearch and parts else None
         
-        # Setup conversational context
-        self.conversation_history = []
-        self.last_search_results = []
-        self.user_preferences = {}
+        # Conversational context is per session: each turn keeps the parsed
+        # query and ranked part ids, bounded by the store's turn cap and budget
+        self.store = store or create_conversation_store()
+        # Stored ids are only meaningful against the catalog they were ranked on
+        self.catalog_key = catalog_fingerprint(parts)
+        # Ranked hits are also signed into cursors for paging and follow-ups
+        self.result_cursors = result_cursors or ResultSetCursors()
         
         # Setup database for fast exact matching
         self._setup_search_database()
+
+        # Trigram index for partial / punctuation-insensitive part numbers
+        self.part_number_index = PartNumberTrigramIndex(self.parts)
+
+        # Fitment (model / engine / trim / year) index over compatibility blocks
+        self.compatibility_index = VehicleCompatibilityIndex(self.parts)
+
+        # Entity / intent automaton, rebuilt only when the catalog changes
+        self.rebuild_query_matcher()
         
         print(f"🤖 ConversationalPartsSearch ready with {len(self.parts)} parts!")
     
     def _setup_search_database(self):
-        """Setup SQLite database for fast searching."""
-        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
-        cursor = self.conn.cursor()
+        """Setup SQLite database for fast searching.
+
+        Loaded once through the writer thread; request threads then query
+        through their own read connections.
+        """
+        self.db = SQLiteDatabase(name='parts_search')
+        self.db.transaction(self._load_search_table)
+    
+    def _load_search_table(self, conn: sqlite3.Connection) -> None:
+        cursor = conn.cursor()
         
         # Create optimized search table
         cursor.execute('''
@@ -171,32 +257,27 @@ class ConversationalPartsSearch:
                 feature TEXT,
                 cost REAL,
                 stock INTEGER,
-                search_text TEXT,
-                data TEXT
+                search_text TEXT
             )
         ''')
         
         # Insert data with searchable text
-        for i, part in enumerate(self.parts):
-            search_text = self._create_search_text(part)
-            
-            cursor.execute('''
-                INSERT INTO parts_search VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                i,
-                part.get('part_number', ''),
-                part.get('part_name', ''),
-                part.get('system', ''),
-                part.get('sub_system', ''),
-                part.get('manufacturer', ''),
-                part.get('material', ''),
-                part.get('part_type', ''),
-                part.get('feature', ''),
-                self._extract_cost(part.get('cost', '0')),
-                self._extract_stock(part.get('stock', '0')),
-                search_text,
-                json.dumps(part)
-            ))
+        cursor.executemany('''
+            INSERT INTO parts_search VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ((
+            i,
+            part.get('part_number', ''),
+            part.get('part_name', ''),
+            part.get('system', ''),
+            part.get('sub_system', ''),
+            part.get('manufacturer', ''),
+            part.get('material', ''),
+            part.get('part_type', ''),
+            part.get('feature', ''),
+            self._extract_cost(part.get('cost', '0')),
+            self._extract_stock(part.get('stock', '0')),
+            part_search_text(part)
+        ) for i, part in enumerate(self.parts)))
         
         # Create search indexes
         cursor.execute('CREATE INDEX idx_part_number ON parts_search(part_number)')
@@ -204,31 +285,13 @@ class ConversationalPartsSearch:
         cursor.execute('CREATE INDEX idx_system ON parts_search(system)')
         cursor.execute('CREATE INDEX idx_manufacturer ON parts_search(manufacturer)')
         cursor.execute('CREATE INDEX idx_search_text ON parts_search(search_text)')
-        
-        self.conn.commit()
-    
-    def _create_search_text(self, part: Dict) -> str:
-        """Create comprehensive search text for a part."""
-        fields = [
-            'part_name', 'part_type', 'system', 'sub_system',
-            'manufacturer', 'material', 'feature', 'part_number',
-            'oem_part_number', 'description', 'application'
-        ]
-        
-        text_parts = []
-        for field in fields:
-            value = part.get(field, '')
-            if value and str(value).strip():
-                text_parts.append(str(value).strip())
-        
-        return ' '.join(text_parts).lower()
     
     def _extract_cost(self, cost_str: str) -> float:
         """Extract numeric cost."""
         if isinstance(cost_str, (int, float)):
             return float(cost_str)
         try:
-            numbers = re.findall(r'[\d.]+', str(cost_str))
+            numbers = _DECIMAL.findall(str(cost_str))
             return float(numbers[0]) if numbers else 0.0
         except:
             return 0.0
@@ -238,7 +301,7 @@ class ConversationalPartsSearch:
         if isinstance(stock_str, int):
             return stock_str
         try:
-            numbers = re.findall(r'\d+', str(stock_str))
+            numbers = _INTEGER.findall(str(stock_str))
             return int(numbers[0]) if numbers else 0
         except:
             return 0
@@ -247,14 +310,17 @@ class ConversationalPartsSearch:
         """Parse and understand natural language query."""
         query_lower = query.lower()
         
+        # Single pass over the query for intent, entity and filter keywords
+        matches = self.query_matcher.match(query_lower)
+        
         # Intent classification
-        intent = self._classify_intent(query_lower)
+        intent = self._classify_intent(query_lower, matches)
         
         # Extract entities
-        entities = self._extract_entities(query_lower)
+        entities = self._extract_entities(query_lower, matches)
         
         # Extract filters
-        filters = self._extract_filters(query_lower)
+        filters = self._extract_filters(query_lower, matches)
         
         # Determine search strategy
         search_strategy = self._determine_search_strategy(intent, entities, filters)
@@ -268,96 +334,72 @@ class ConversationalPartsSearch:
             'processed_at': datetime.now().isoformat()
         }
     
-    def _classify_intent(self, query: str) -> str:
+    def rebuild_query_matcher(self) -> None:
+        """Recompile the entity/intent automaton; call when the catalog changes."""
+        self.query_matcher = QueryMatcher(self.parts, self.compatibility_index.known_models())
+    
+    def _classify_intent(self, query: str, matches: Optional[Dict[str, Any]] = None) -> str:
         """Classify user intent from query."""
-        # Exact search patterns
-        if any(word in query for word in ['exact', 'exactly', 'precise', 'specific part number']):
-            return 'exact_search'
-        
-        # Similar/alternative search patterns  
-        if any(word in query for word in ['similar', 'like', 'alternative', 'substitute', 'replacement', 'equivalent']):
-            return 'similarity_search'
-        
-        # Comparison patterns
-        if any(word in query for word in ['compare', 'vs', 'versus', 'difference', 'better']):
-            return 'comparison'
-        
-        # Recommendation patterns
-        if any(word in query for word in ['recommend', 'suggest', 'best', 'optimal', 'should i']):
-            return 'recommendation'
-        
-        # Price/cost patterns
-        if any(word in query for word in ['cheap', 'affordable', 'cost', 'price', 'budget']):
-            return 'cost_search'
-        
-        # Availability patterns
-        if any(word in query for word in ['available', 'stock', 'inventory', 'in stock']):
-            return 'availability_search'
-        
-        # Default to general search
-        return 'general_search'
+        if matches is None:
+            matches = self.query_matcher.match(query)
+        return matches['intent']
     
-    def _extract_entities(self, query: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, query: str, matches: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
         """Extract entities like part names, systems, manufacturers."""
+        if matches is None:
+            matches = self.query_matcher.match(query)
+        found = matches['entities']
         entities = {
             'part_numbers': [],
             'part_names': [],
-            'systems': [],
-            'manufacturers': [],
-            'materials': [],
+            'systems': list(found.get('systems', [])),
+            'manufacturers': list(found.get('manufacturers', [])),
+            'materials': list(found.get('materials', [])),
+            'vehicle_models': list(found.get('vehicle_models', [])),
             'features': []
         }
         
-        # Extract part numbers (alphanumeric patterns)
-        part_number_patterns = re.findall(r'\b[A-Z0-9]{3,}[-_]?[A-Z0-9]*\b', query.upper())
-        entities['part_numbers'] = part_number_patterns
-        
-        # Extract known systems from database
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT DISTINCT system FROM parts_search WHERE system IS NOT NULL')
-        known_systems = [row[0].lower() for row in cursor.fetchall() if row[0]]
-        
-        for system in known_systems:
-            if system in query:
-                entities['systems'].append(system)
-        
-        # Extract known manufacturers
-        cursor.execute('SELECT DISTINCT manufacturer FROM parts_search WHERE manufacturer IS NOT NULL')
-        known_manufacturers = [row[0].lower() for row in cursor.fetchall() if row[0]]
-        
-        for manufacturer in known_manufacturers:
-            if manufacturer in query:
-                entities['manufacturers'].append(manufacturer)
-        
-        # Extract materials
-        materials = ['steel', 'aluminum', 'plastic', 'rubber', 'metal', 'carbon', 'fiber']
-        for material in materials:
-            if material in query:
-                entities['materials'].append(material)
+        # Extract part numbers (alphanumeric patterns), keeping only candidates
+        # that contain a digit and resolve against the part number index.
+        # Bare numbers shorter than 5 digits are prices or model years.
+        part_number_patterns = _PART_NUMBER.findall(query.upper())
+        entities['part_numbers'] = [
+            p for p in part_number_patterns
+            if any(c.isdigit() for c in p)
+            and not (p.isdigit() and len(p) < 5)
+            and self.part_number_index.contains(p)
+        ]
         
         return entities
     
-    def _extract_filters(self, query: str) -> Dict[str, Any]:
+    def _extract_filters(self, query: str, matches: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Extract filter criteria from query."""
+        if matches is None:
+            matches = self.query_matcher.match(query)
         filters = {}
         
         # Price filters - fixed regex patterns
-        price_matches = re.findall(r'under \$?([\d,]+)', query)
+        price_matches = _MAX_PRICE.findall(query)
         if price_matches:
             filters['max_cost'] = float(price_matches[0].replace(',', ''))
         
-        price_matches = re.findall(r'over \$?([\d,]+)', query)
+        price_matches = _MIN_PRICE.findall(query)
         if price_matches:
             filters['min_cost'] = float(price_matches[0].replace(',', ''))
         
         # Stock filters
-        if 'in stock' in query or 'available' in query:
+        if 'in_stock' in matches['flags']:
             filters['min_stock'] = 1
         
         # Quality filters
-        if any(word in query for word in ['high quality', 'premium', 'best']):
+        if 'high_quality' in matches['flags']:
             filters['quality_level'] = 'high'
         
+        # Vehicle fitment filters (model, engine, trim, year)
+        fitment = self.compatibility_index.parse_query(query)
+        if fitment:
+            filters['fitment'] = fitment
+        
         return filters
     
     def _determine_search_strategy(self, intent: str, entities: Dict, filters: Dict) -> str:
@@ -366,6 +408,10 @@ class ConversationalPartsSearch:
         if entities['part_numbers']:
             return 'exact_match'
         
+        # If the query names a vehicle, engine, trim or year, resolve fitment first
+        if filters.get('fitment'):
+            return 'fitment_search'
+        
         # If intent is similarity, use AI similarity search
         if intent == 'similarity_search':
             return 'ai_similarity'
@@ -381,41 +427,51 @@ class ConversationalPartsSearch:
         # Default to hybrid search
         return 'hybrid_search'
     
-    def search(self, query: str, limit: int = 10) -> Dict[str, Any]:
-        """Main search function with conversational understanding."""
+    def search(self, query: str, limit: int = 10, fields: Optional[List[str]] = None,
+               session_id: str = DEFAULT_SESSION) -> Dict[str, Any]:
+        """Main search function with conversational understanding.
+
+        Strategies rank ``(part index, match type, score)`` hits; records are
+        built once, projected to ``fields`` (every field when None). The turn
+        is recorded under ``session_id`` for follow-up questions.
+        """
         start_time = time.time()
         
         # Understand the query
         understanding = self.understand_query(query)
         
-        # Store in conversation history
-        self.conversation_history.append({
-            'query': query,
-            'understanding': understanding,
-            'timestamp': datetime.now().isoformat()
-        })
-        
         # Execute search based on strategy
-        results = self._execute_search(understanding, limit)
+        hits = self._execute_search(understanding, limit)
         
         # Enhance results with similarity scores and explanations
-        enhanced_results = self._enhance_results(results, understanding)
+        enhanced_results = self._enhance_results(hits, understanding, fields)
         
-        # Store results for follow-up questions
-        self.last_search_results = enhanced_results
+        # Keep the ranked ids (not the records) for follow-up questions
+        result_set = self.result_cursors.put(hits, self.catalog_key, query=query, understanding=understanding)
+        cursor = self.result_cursors.encode(result_set, 0)
+        self.store.append_turn(session_id, {
+            'query': query,
+            'understanding': {key: understanding[key] for key in ('intent', 'entities', 'filters', 'search_strategy')},
+            'hits': [[idx, match_type, round(float(score), 4)] for idx, match_type, score in hits],
+            'catalog': self.catalog_key,
+            'cursor': cursor,
+            'timestamp': datetime.now().isoformat()
+        })
         
         search_time = time.time() - start_time
         
         return {
             'query': query,
+            'session_id': session_id,
             'understanding': understanding,
             'results': enhanced_results,
             'result_count': len(enhanced_results),
+            'cursor': cursor,
             'search_time_ms': round(search_time * 1000, 2),
             'suggestions': self._generate_suggestions(understanding, enhanced_results)
         }
     
-    def _execute_search(self, understanding: Dict, limit: int) -> List[Dict]:
+    def _execute_search(self, understanding: Dict, limit: int) -> List[Tuple[int, str, float]]:
         """Execute search based on determined strategy."""
         strategy = understanding['search_strategy']
         entities = understanding['entities']
@@ -425,6 +481,8 @@ class ConversationalPartsSearch:
             return self._exact_match_search(entities, filters, limit)
         elif strategy == 'ai_similarity':
             return self._ai_similarity_search(understanding['original_query'], filters, limit)
+        elif strategy == 'fitment_search':
+            return self._fitment_search(entities, filters, limit)
         elif strategy == 'filtered_search':
             return self._filtered_search(entities, filters, limit)
         elif strategy == 'cost_optimized':
@@ -432,46 +490,37 @@ class ConversationalPartsSearch:
         else:  # hybrid_search
             return self._hybrid_search(understanding['original_query'], entities, filters, limit)
     
-    def _exact_match_search(self, entities: Dict, filters: Dict, limit: int) -> List[Dict]:
-        """Search for exact part number matches."""
-        results = []
-        cursor = self.conn.cursor()
+    def _exact_match_search(self, entities: Dict, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
+        """Search for exact or partial part number matches via the trigram index."""
+        hits = []
+        seen = set()
         
         for part_number in entities['part_numbers']:
-            query = '''
-                SELECT * FROM parts_search 
-                WHERE part_number LIKE ? OR search_text LIKE ?
-                ORDER BY part_number = ? DESC
-                LIMIT ?
-            '''
-            cursor.execute(query, (f'%{part_number}%', f'%{part_number}%', part_number, limit))
-            
-            for row in cursor.fetchall():
-                part_data = json.loads(row[12])  # data column
-                part_data['match_type'] = 'exact'
-                part_data['match_score'] = 1.0
-                results.append(part_data)
-        
-        return results[:limit]
+            for idx, score in self.part_number_index.lookup(part_number, limit=limit):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                hits.append((idx, 'exact', score))
+        
+        hits.sort(key=lambda hit: hit[2], reverse=True)
+        return hits[:limit]
     
-    def _ai_similarity_search(self, query: str, filters: Dict, limit: int) -> List[Dict]:
+    def _ai_similarity_search(self, query: str, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
         """Use AI to find similar parts."""
-        # Use the existing lightweight AI search
-        ai_results = self.ai_search.search(query, limit=limit*2)  # Get more for filtering
+        if self.ai_search is None:
+            return []
         
-        results = []
-        for result in ai_results['results']:
+        hits = []
+        for idx, score in self.ai_search.top_k(query, limit * 2):  # Get more for filtering
             # Apply filters
-            if self._passes_filters(result, filters):
-                result['match_type'] = 'similarity'
-                result['match_score'] = result.get('similarity_score', 0.5)
-                results.append(result)
+            if self._passes_filters(self.parts[idx], filters):
+                hits.append((idx, 'similarity', round(score, 4)))
         
-        return results[:limit]
+        return hits[:limit]
     
-    def _filtered_search(self, entities: Dict, filters: Dict, limit: int) -> List[Dict]:
+    def _filtered_search(self, entities: Dict, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
         """Search with specific system/manufacturer filters."""
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         where_conditions = []
         params = []
@@ -502,7 +551,7 @@ class ConversationalPartsSearch:
         where_clause = ' AND '.join(where_conditions) if where_conditions else '1=1'
         
         query = f'''
-            SELECT * FROM parts_search 
+            SELECT id FROM parts_search 
             WHERE {where_clause}
             ORDER BY cost ASC
             LIMIT ?
@@ -511,73 +560,76 @@ class ConversationalPartsSearch:
         
         cursor.execute(query, params)
         
-        results = []
-        for row in cursor.fetchall():
-            part_data = json.loads(row[12])
-            part_data['match_type'] = 'filtered'
-            part_data['match_score'] = 0.8
-            results.append(part_data)
-        
-        return results
+        return [(row[0], 'filtered', 0.8) for row in cursor.fetchall()]
     
-    def _cost_optimized_search(self, query: str, filters: Dict, limit: int) -> List[Dict]:
+    def _fitment_search(self, entities: Dict, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
+        """Exact vehicle fitment via index intersection, then system/manufacturer/cost filters."""
+        matched_ids = self.compatibility_index.fitment(**filters['fitment'])
+        
+        hits = []
+        for idx in sorted(matched_ids):
+            part = self.parts[idx]
+            system = str(part.get('system') or part.get('category') or '').lower()
+            manufacturer = str(part.get('manufacturer') or '').lower()
+            if entities['systems'] and not any(s in system for s in entities['systems']):
+                continue
+            if entities['manufacturers'] and not any(m in manufacturer for m in entities['manufacturers']):
+                continue
+            if not self._passes_filters(part, filters):
+                continue
+            hits.append((idx, 'fitment', 1.0))
+            if len(hits) >= limit:
+                break
+        
+        return hits
+    
+    def _cost_optimized_search(self, query: str, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
         """Search optimized for cost considerations."""
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
-        # First get parts matching the query
+        # First get parts matching the query (search_text is stored normalized)
         cursor.execute('''
-            SELECT * FROM parts_search 
+            SELECT id FROM parts_search 
             WHERE search_text LIKE ?
             ORDER BY cost ASC
             LIMIT ?
-        ''', (f'%{query.lower()}%', limit*3))
-        
-        results = []
-        for row in cursor.fetchall():
-            part_data = json.loads(row[12])
-            if self._passes_filters(part_data, filters):
-                part_data['match_type'] = 'cost_optimized'
-                part_data['match_score'] = 0.7
-                results.append(part_data)
+        ''', (f'%{normalize(query)}%', limit*3))
         
-        return results[:limit]
+        hits = [(row[0], 'cost_optimized', 0.7) for row in cursor.fetchall()
+                if self._passes_filters(self.parts[row[0]], filters)]
+        return hits[:limit]
     
-    def _hybrid_search(self, query: str, entities: Dict, filters: Dict, limit: int) -> List[Dict]:
+    def _hybrid_search(self, query: str, entities: Dict, filters: Dict, limit: int) -> List[Tuple[int, str, float]]:
         """Hybrid search combining multiple strategies."""
-        results = []
+        hits = []
         
         # 1. Try exact matches first (30% of results)
         exact_limit = max(1, limit // 3)
         if entities['part_numbers']:
-            exact_results = self._exact_match_search(entities, filters, exact_limit)
-            results.extend(exact_results)
+            hits.extend(self._exact_match_search(entities, filters, exact_limit))
         
         # 2. Try AI similarity (40% of results) 
-        remaining = limit - len(results)
+        remaining = limit - len(hits)
         if remaining > 0:
             ai_limit = max(1, min(remaining, limit * 2 // 5))
-            ai_results = self._ai_similarity_search(query, filters, ai_limit)
-            results.extend(ai_results)
+            hits.extend(self._ai_similarity_search(query, filters, ai_limit))
         
         # 3. Fill remaining with filtered search
-        remaining = limit - len(results)
+        remaining = limit - len(hits)
         if remaining > 0:
-            filtered_results = self._filtered_search(entities, filters, remaining)
-            results.extend(filtered_results)
+            hits.extend(self._filtered_search(entities, filters, remaining))
         
-        # Remove duplicates and sort by match score
+        # Remove duplicates (same part index) and sort by match score
         seen_parts = set()
-        unique_results = []
-        for result in results:
-            part_id = result.get('part_number', '') + result.get('part_name', '')
-            if part_id not in seen_parts:
-                seen_parts.add(part_id)
-                unique_results.append(result)
+        unique_hits = []
+        for hit in hits:
+            if hit[0] not in seen_parts:
+                seen_parts.add(hit[0])
+                unique_hits.append(hit)
         
-        # Sort by match score
-        unique_results.sort(key=lambda x: x.get('match_score', 0), reverse=True)
+        unique_hits.sort(key=lambda hit: hit[2], reverse=True)
         
-        return unique_results[:limit]
+        return unique_hits[:limit]
     
     def _passes_filters(self, part: Dict, filters: Dict) -> bool:
         """Check if part passes the specified filters."""
@@ -595,10 +647,13 @@ class ConversationalPartsSearch:
         
         return True
     
-    def _enhance_results(self, results: List[Dict], understanding: Dict) -> List[Dict]:
+    def _enhance_results(self, hits: List[Tuple[int, str, float]], understanding: Dict,
+                         fields: Optional[List[str]] = None) -> List[Dict]:
         """Enhance results with additional information and explanations. Always include expected fields for frontend."""
         enhanced = []
-        for result in results:
+        for idx, match_type, match_score in hits:
+            # Read-only view over the stored part; the record is built once below
+            result = ChainMap({'match_type': match_type, 'match_score': match_score}, self.parts[idx])
             # Add explanation for why this part was matched
             explanation = self._generate_match_explanation(result, understanding)
             # Add similarity to previous searches
@@ -609,7 +664,9 @@ class ConversationalPartsSearch:
             availability_insights = self._get_availability_insights(result)
             # Ensure all expected fields are present for frontend rendering
             enhanced_result = {
-                **result,
+                **project(self.parts[idx], fields),
+                'match_type': match_type,
+                'match_score': match_score,
                 'part_name': result.get('part_name') or result.get('name') or 'N/A',
                 'part_number': result.get('part_number') or result.get('oem_part_number') or 'N/A',
                 'system': result.get('system') or result.get('category') or 'N/A',
@@ -633,6 +690,7 @@ class ConversationalPartsSearch:
             'exact': f"Exact match for part number {result.get('part_number', 'N/A')}",
             'similarity': f"Similar to your search with {result.get('match_score', 0.5)*100:.0f}% relevance",
             'filtered': f"Matches your criteria for {understanding['entities']['systems'] or understanding['entities']['manufacturers']}",
+            'fitment': f"Fits {', '.join(str(v) for v in understanding['filters'].get('fitment', {}).values())}",
             'cost_optimized': f"Cost-effective option at ₹{self._extract_cost(result.get('cost', '0')):.2f}",
             'general': "General match based on your search terms"
         }
@@ -641,7 +699,7 @@ class ConversationalPartsSearch:
     
     def _get_similarity_context(self, result: Dict) -> Dict[str, Any]:
         """Get context about similar parts."""
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Find parts in same system
         system = result.get('system', '')
@@ -663,7 +721,7 @@ class ConversationalPartsSearch:
     def _get_cost_insights(self, result: Dict) -> Dict[str, Any]:
         """Get cost insights for the part."""
         cost = self._extract_cost(result.get('cost', '0'))
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Get average cost for similar parts
         system = result.get('system', '')
@@ -735,11 +793,33 @@ class ConversationalPartsSearch:
         
         return suggestions[:3]  # Limit to 3 suggestions
     
-    def ask_followup(self, question: str) -> Dict[str, Any]:
-        """Handle follow-up questions about previous search results."""
+    def _cached_results(self, cursor: Optional[str] = None, session_id: str = DEFAULT_SESSION) -> List[Dict]:
+        """Display records behind ``cursor``, or of the session's last search; [] once they have expired."""
+        if cursor:
+            try:
+                _, result_set = self.result_cursors.resolve(cursor, self.catalog_key, len(self.parts))
+            except InvalidCursor:
+                return []
+            return self._enhance_results(result_set.hits, result_set.meta['understanding'], fields=())
+        turn = self.store.last_turn(session_id)
+        if not turn or turn.get('catalog') != self.catalog_key:
+            return []
+        hits = [tuple(hit) for hit in turn.get('hits', [])]
+        return self._enhance_results(hits, turn['understanding'], fields=())
+    
+    def last_search_results(self, session_id: str = DEFAULT_SESSION) -> List[Dict]:
+        return self._cached_results(session_id=session_id)
+    
+    def conversation_history(self, session_id: str = DEFAULT_SESSION) -> List[Dict]:
+        return self.store.turns(session_id)
+    
+    def ask_followup(self, question: str, cursor: Optional[str] = None,
+                     session_id: str = DEFAULT_SESSION) -> Dict[str, Any]:
+        """Handle follow-up questions about previous search results (the session's last search unless ``cursor`` is given)."""
         question_lower = question.lower()
+        results = self._cached_results(cursor, session_id)
         
-        if not self.last_search_results:
+        if not results:
             return {
                 'response': "I don't have any previous search results to reference. Please start with a new search.",
                 'type': 'no_context'
@@ -747,7 +827,7 @@ class ConversationalPartsSearch:
         
         # Analyze follow-up question type
         if any(word in question_lower for word in ['cheaper', 'less expensive', 'lower cost']):
-            return self._find_cheaper_alternatives()
+            return self._find_cheaper_alternatives(results)
         
         elif any(word in question_lower for word in ['more like', 'similar to', 'alternatives']):
             return self._find_more_similar_parts(question)
@@ -761,31 +841,31 @@ class ConversationalPartsSearch:
         else:
             return self._general_followup_response(question)
     
-    def _find_cheaper_alternatives(self) -> Dict[str, Any]:
+    def _find_cheaper_alternatives(self, results: List[Dict]) -> Dict[str, Any]:
         """Find cheaper alternatives to previous results."""
-        if not self.last_search_results:
+        if not results:
             return {'response': 'No previous results to compare against.', 'type': 'error'}
         
         # Get average cost of previous results
-        costs = [self._extract_cost(r.get('cost', '0')) for r in self.last_search_results]
+        costs = [self._extract_cost(r.get('cost', '0')) for r in results]
         avg_cost = sum(costs) / len(costs) if costs else 0
         
         # Find cheaper alternatives with same functionality
         alternatives = []
-        for result in self.last_search_results:
+        for result in results:
             system = result.get('system', '')
             current_cost = self._extract_cost(result.get('cost', '0'))
             
-            cursor = self.conn.cursor()
+            cursor = self.db.reader.cursor()
             cursor.execute('''
-                SELECT * FROM parts_search 
+                SELECT id FROM parts_search 
                 WHERE system = ? AND cost < ? AND cost > 0
                 ORDER BY cost ASC
                 LIMIT 5
             ''', (system, current_cost))
             
             for row in cursor.fetchall():
-                part_data = json.loads(row[12])
+                part_data = dict(self.parts[row[0]])
                 part_data['savings'] = round(current_cost - self._extract_cost(part_data.get('cost', '0')), 2)
                 alternatives.append(part_data)
         
@@ -795,18 +875,24 @@ class ConversationalPartsSearch:
             'type': 'cheaper_alternatives'
         }
     
-    def get_conversation_summary(self) -> Dict[str, Any]:
-        """Get summary of current conversation."""
+    def get_conversation_summary(self, session_id: str = DEFAULT_SESSION) -> Dict[str, Any]:
+        """Get summary of a session's conversation."""
+        history = self.store.turns(session_id)
+        last = history[-1] if history else {}
         return {
-            'total_queries': len(self.conversation_history),
-            'recent_queries': self.conversation_history[-5:] if self.conversation_history else [],
-            'last_result_count': len(self.last_search_results),
-            'user_preferences': self.user_preferences
+            'session_id': session_id,
+            'total_queries': len(history),
+            'recent_queries': [{'query': t['query'], 'intent': t['understanding'].get('intent'),
+                                'result_count': len(t.get('hits', [])), 'timestamp': t.get('timestamp')}
+                               for t in history[-5:]],
+            'last_result_count': len(last.get('hits', [])),
+            'last_result_cursor': last.get('cursor'),
+            'user_preferences': self.store.get_preferences(session_id)
         }
     
     def get_quick_metrics(self):
         """Return quick insights for dashboard: total parts, systems, manufacturers, avg cost, low stock alerts."""
-        cursor = self.conn.cursor()
+        cursor = self.db.reader.cursor()
         # Total parts
         cursor.execute('SELECT COUNT(*) FROM parts_search')
         total_parts = cursor.fetchone()[0]
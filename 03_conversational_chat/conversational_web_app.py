@@ -12,18 +12,36 @@ The web app includes the following features:
 - Integration with the advanced analytics module for quick insights.
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, g, has_request_context
+import heapq
 import json
 import time
 import os
 import ssl
+import signal
 import re
-import requests
 import numpy as np
 from datetime import datetime
 from conversational_search import ConversationalEngine, ConversationalPartsSearch
+from cross_reference_index import CrossReferenceIndex
+from compatibility_index import VehicleCompatibilityIndex
+from text_encoders import create_encoder, part_to_embedding_text, EncoderUnavailableError
+from catalog_artifacts import APP_DATASET_FILES, load_embedding_artifact, catalog_fingerprint
+from multi_field_embeddings import MultiFieldEmbeddingIndex
+from engine_warmup import EngineWarmup
+from index_handle import IndexHandle
+from shared_catalog import open_shared_catalog
+from sharded_search import coordinator_from_config
+from result_projection import resolve_fields, project, materialize
+from result_cache import ResultSetCursors, InvalidCursor
+from response_cache import ResponseCache
+from llm_clients import LLMClients, LLMError
+from text_normalization import normalize, normalize_value, clean_query, tokenize
+from hierarchy_index import HierarchyIndex
+from spelling_correction import SpellingCorrector
+from spec_index import SpecRangeIndex, parse_spec_expressions, spec_value
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union, Sequence
+from typing import Optional, List, Dict, Any, Union, Sequence, Tuple
 
 # Configure SSL for corporate networks
 try:
@@ -71,7 +89,7 @@ def load_all_parts_from_datasets():
     all_parts = []
     
     # Try loading from local data directory first
-    local_dataset = Path(__file__).parent / "data" / "training Dataset.jsonl"
+    local_dataset = APP_DATASET_FILES[0]
     if local_dataset.is_file():
         try:
             print(f"[DEBUG] Loading local dataset: {local_dataset}")
@@ -85,7 +103,7 @@ def load_all_parts_from_datasets():
             print(f"Error loading local dataset {local_dataset}: {e}")
     
     # Try loading from main dataset
-    main_dataset = Path(__file__).parent.parent / "data" / "car_parts_dataset.jsonl"
+    main_dataset = APP_DATASET_FILES[1]
     if main_dataset.is_file():
         try:
             print(f"[DEBUG] Loading main dataset: {main_dataset}")
@@ -99,7 +117,7 @@ def load_all_parts_from_datasets():
             print(f"Error loading main dataset {main_dataset}: {e}")
     
     # Fallback to synthetic dataset if main dataset not found
-    synthetic_dataset = Path(__file__).parent.parent / "synthetic_car_parts_500.jsonl"
+    synthetic_dataset = APP_DATASET_FILES[2]
     if synthetic_dataset.is_file():
         try:
             print(f"[DEBUG] Loading synthetic dataset: {synthetic_dataset}")
@@ -143,62 +161,43 @@ def load_all_parts_from_datasets():
     
     return all_parts
 
+GEMINI_API_MODEL = "models/gemini-1.5-pro-latest"
+GEMINI_VERTEX_MODEL = "gemini-1.0-pro"
+OLLAMA_DEFAULT_MODEL = "llama3"
+
 # --- Gemini GenAI utility using Vertex AI Python client ---
-def call_gemini_vertex(prompt: str, model_name: str = "gemini-1.0-pro", max_output_tokens: int = 512) -> str:
+def call_gemini_vertex(prompt: str, model_name: str = GEMINI_VERTEX_MODEL, max_output_tokens: int = 512) -> str:
     """
-    Calls Gemini Vertex AI using the Python client and service account key.
+    Calls Gemini Vertex AI through the shared, long-lived Vertex client.
     """
     try:
-        client = connect_to_google_genai()
-        from google.genai import types
-        from google.generativeai.types import ContentType, GenerateContentResponse
-        
-        # Create content in the correct format
-        content: ContentType = types.Content(
-            role="user",
-            parts=[types.Part.from_text(text=prompt)]
-        )
-        
-        response = ""
-        for chunk in client.models.generate_content_stream(
-            model=model_name,
-            contents=[content],
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=max_output_tokens
-            )
-        ):
-            if chunk.text is not None:  # Type check for None
-                response += chunk.text
-        return response.strip()
-    except Exception as e:
+        return llm_clients.gemini_vertex.generate(prompt, model=model_name, max_output_tokens=max_output_tokens)
+    except LLMError as e:
         return f"[ERROR: Gemini Vertex call failed: {e}]"
 
 # --- Gemini GenAI utility (auto: API key or Vertex client) ---
-def call_gemini(prompt: str, api_key: Optional[str] = None, model: str = "models/gemini-1.5-pro-latest") -> str:
+def call_gemini(prompt: str, api_key: Optional[str] = None, model: str = GEMINI_API_MODEL) -> str:
     """
     Calls Gemini API with the given prompt and returns the response text.
     Uses API key if set, else falls back to Vertex AI Python client.
     """
     api_key = api_key or os.environ.get("GEMINI_API_KEY", "")  # Default to empty string if not found
     if api_key:
-        url = f"https://generativelanguage.googleapis.com/v1beta/{model}:generateContent?key={api_key}"
-        headers = {"Content-Type": "application/json"}
-        data = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {"temperature": 0.7, "maxOutputTokens": 512}
-        }
         try:
-            resp = requests.post(url, headers=headers, json=data, timeout=15)
-            resp.raise_for_status()
-            out = resp.json()
-            return out['candidates'][0]['content']['parts'][0]['text']
-        except Exception as e:
+            return llm_clients.gemini_api(api_key).generate(prompt, model=model, temperature=0.7,
+                                                            max_output_tokens=512)
+        except LLMError as e:
             return f"[ERROR: Gemini API call failed: {e}]"
     else:
         # Use Vertex AI Python client
         return call_gemini_vertex(prompt)
 
+def gemini_model_key(api_key: Optional[str] = None) -> str:
+    """Cache key of the model ``call_gemini`` actually calls: the API model with a key, else the Vertex one."""
+    if api_key or os.environ.get("GEMINI_API_KEY"):
+        return f"gemini:{GEMINI_API_MODEL}"
+    return f"gemini-vertex:{GEMINI_VERTEX_MODEL}"
+
 # --- Gemini Vertex AI authentication utility ---
 def authenticate_json():
     json_key_path = "D://OneDrive - Mahindra & Mahindra Ltd//Desktop//POC//Gemini//gemini_v1//scripts//mdp-ad-parts-dev-api-json-key.json"  # JSON key file
@@ -217,273 +216,251 @@ def connect_to_google_genai():
     )
     return client
 
+# Long-lived LLM providers (keep-alive sessions, one Vertex client) shared by every request;
+# concurrency, timeouts and retries via INTELLIPART_LLM_MAX_CONCURRENCY / _TIMEOUT / _DEADLINE / _RETRIES
+llm_clients = LLMClients(vertex_client_factory=connect_to_google_genai)
+
 # --- Semantic Search Engine ---
 class SemanticSearchEngineHF:
-    def __init__(self, parts: List[Dict[str, Any]], embedding_model_name: Optional[str] = None):
+    def __init__(self, parts: List[Dict[str, Any]], embedding_model_name: Optional[str] = None,
+                 encoder_backend: Optional[str] = None, embeddings_dir: Optional[str] = None,
+                 embedding_mode: Optional[str] = None, catalog=None):
         self.parts = parts
+        # Optional SharedCatalog: posting lists narrow literal scans so records
+        # stay in the shared mapping instead of being decoded per query
+        self.catalog = catalog
+        self.embeddings_dir = embeddings_dir or os.environ.get('INTELLIPART_EMBEDDINGS_DIR')
+        # 'single' embeds one serialized string per part; 'multi_field' embeds
+        # name, hierarchy and specs separately and fuses them with per-endpoint weights
+        self.embedding_mode = embedding_mode or os.environ.get('INTELLIPART_EMBEDDING_MODE', 'single')
+        self.field_index: Optional[MultiFieldEmbeddingIndex] = None
         if hf_logging:
             hf_logging.set_verbosity_error()
         
-        # Use a simple, reliable model that can be downloaded automatically
-        if embedding_model_name is None:
-            # Use a small, efficient model that works well for general text
-            embedding_model_name = 'all-MiniLM-L6-v2'
-        
-        if not SentenceTransformer:
-            raise ImportError("sentence_transformers is required but not installed")
-        
-        if not faiss:
-            raise ImportError("faiss-cpu is required but not installed")
-            
-        if not np:
-            raise ImportError("numpy is required but not installed")
-            
-        print(f"🔄 Loading SentenceTransformer model: {embedding_model_name}")
-        
-        # Corporate-friendly model loading with multiple fallback strategies
-        model_loaded = False
-        
-        # Strategy 1: Try loading from local cache first
-        try:
-            cache_dir = Path.home() / ".cache" / "huggingface" / "transformers"
-            self.embedding_model = SentenceTransformer(embedding_model_name, cache_folder=str(cache_dir))
-            print(f"✅ SentenceTransformer model loaded from local cache")
-            model_loaded = True
-        except Exception as cache_error:
-            print(f"⚠️ Local cache loading failed: {cache_error}")
-        
-        # Strategy 2: Try with corporate SSL settings
-        if not model_loaded:
-            try:
-                import ssl
-                import os
-                # Temporarily disable SSL verification for corporate networks
-                ssl._create_default_https_context = ssl._create_unverified_context
-                os.environ['REQUESTS_CA_BUNDLE'] = ''
-                os.environ['CURL_CA_BUNDLE'] = ''
-                
-                self.embedding_model = SentenceTransformer(
-                    embedding_model_name, 
-                    trust_remote_code=False,
-                    use_auth_token=False
-                )
-                print(f"✅ SentenceTransformer model loaded with corporate SSL settings")
-                model_loaded = True
-            except Exception as ssl_error:
-                print(f"⚠️ Corporate SSL method failed: {ssl_error}")
-        
-        # Strategy 3: Try offline mode with pre-downloaded model
-        if not model_loaded:
-            try:
-                # Try to load from a local model directory if it exists
-                local_model_path = Path(__file__).parent / "models" / embedding_model_name
-                if local_model_path.exists():
-                    self.embedding_model = SentenceTransformer(str(local_model_path))
-                    print(f"✅ SentenceTransformer model loaded from local directory")
-                    model_loaded = True
-                else:
-                    print(f"💡 Local model directory not found: {local_model_path}")
-            except Exception as local_error:
-                print(f"⚠️ Local model loading failed: {local_error}")
-        
-        # Strategy 4: Try with minimal model (fallback)
-        if not model_loaded:
-            try:
-                # Use a smaller, simpler model that might be easier to download
-                fallback_model = 'paraphrase-MiniLM-L3-v2'
-                print(f"💡 Trying fallback model: {fallback_model}")
-                self.embedding_model = SentenceTransformer(fallback_model)
-                print(f"✅ Fallback SentenceTransformer model loaded successfully")
-                model_loaded = True
-            except Exception as fallback_error:
-                print(f"⚠️ Fallback model also failed: {fallback_error}")
-        
-        if not model_loaded:
-            print("❌ All model loading strategies failed!")
-            print("🏢 CORPORATE NETWORK DETECTED:")
-            print("   1. Contact your IT department to whitelist huggingface.co")
-            print("   2. Or ask them to configure proxy settings for ML models")
-            print("   3. Alternatively, use the simple keyword search (which works perfectly!)")
-            raise Exception("Unable to load SentenceTransformer model in corporate environment")
+        # Backend comes from explicit config (argument or INTELLIPART_ENCODER);
+        # loading fails fast with EncoderUnavailableError instead of retrying
+        # downloads, so air-gapped hosts reach the keyword fallback immediately
+        self.encoder = create_encoder(encoder_backend, embedding_model_name)
+        print(f"✅ Text encoder ready: {self.encoder.name} ({self.encoder.dimension} dims)")
             
         self.index = None
         self.id_to_idx: Dict[str, int] = {}
         self.idx_to_id: Dict[int, str] = {}
         self.embeddings: Optional[np.ndarray] = None
         self._build_index()
+        # Suggestion strings per part as flat arrays, so suggest() never decodes records from a shared catalog
+        self._suggest_names = np.array([str(p.get('part_name') or '') for p in self.parts])
+        self._suggest_numbers = np.array([str(p.get('part_number') or '') for p in self.parts])
 
     def _get_text(self, part):
         # Serialize all attributes in a structured way for embedding
-        return '; '.join(f"{k}: {v}" for k, v in part.items() if v and isinstance(v, (str, int, float)))
+        return part_to_embedding_text(part)
 
     def _build_index(self) -> None:
         print(f"🔄 Building search index for {len(self.parts)} parts...")
         
-        descriptions = [self._get_text(p) for p in self.parts]
-        self.embeddings = self.embedding_model.encode(descriptions, show_progress_bar=False, convert_to_numpy=True)
+        if self.embedding_mode == 'multi_field':
+            self.field_index = MultiFieldEmbeddingIndex(self.parts, self.encoder)
+            self._index_part_ids()
+            print(f"✅ Multi-field index built in {self.field_index.build_seconds:.2f}s ({', '.join(self.field_index.fields)})")
+            return
+        
+        # Prefer vectors from the offline build_embeddings.py job when they match
+        self.embeddings = load_embedding_artifact(self.embeddings_dir, self.parts, self.encoder.name,
+                                                  self.encoder.model_name, self.encoder.dimension)
+        if self.embeddings is not None:
+            print(f"📂 Using precomputed embeddings from {self.embeddings_dir}")
+        else:
+            descriptions = [self._get_text(p) for p in self.parts]
+            self.embeddings = self.encoder.encode(descriptions)
         
         if self.embeddings is not None:
             dimension = self.embeddings.shape[1]
-            self.index = faiss.IndexFlatL2(dimension)
-            self.index.add(self.embeddings.astype('float32'))
-            
-            for idx, part in enumerate(self.parts):
-                part_id = str(part.get('part_number', str(idx)))
-                self.id_to_idx[part_id] = idx
-                self.idx_to_id[idx] = part_id
+            if faiss and not isinstance(self.embeddings, np.memmap):
+                # A memory-mapped artifact is scanned with NumPy instead: a flat
+                # FAISS index would copy it into every worker's private heap
+                # Encoder output is L2-normalized, so inner product == cosine
+                self.index = faiss.IndexFlatIP(dimension)
+                self.index.add(np.ascontiguousarray(self.embeddings, dtype=np.float32))
+            self._index_part_ids()
                 
         print(f"✅ Search index built successfully with {len(self.parts)} parts")
 
-    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.7) -> List[Dict[str, Any]]:
-        """Semantic search implementation"""
-        if self.index is None or self.embeddings is None:
+    def _scan(self, query: str, match_all: bool = True, candidate_ids=None):
+        """(index, part) pairs worth checking for a literal match on ``query``, within ``candidate_ids`` if given."""
+        ids = self.catalog.candidates(query, match_all) if self.catalog is not None else None
+        if candidate_ids is not None:
+            ids = candidate_ids if ids is None else np.intersect1d(ids, candidate_ids)
+        if ids is None:
+            return enumerate(self.parts)
+        return ((int(i), self.parts[int(i)]) for i in ids)
+
+    def _index_part_ids(self) -> None:
+        for idx, part in enumerate(self.parts):
+            part_id = str(part.get('part_number', str(idx)))
+            self.id_to_idx[part_id] = idx
+            self.idx_to_id[idx] = part_id
+
+    def _scores(self, query_vec: np.ndarray, field_weights: Optional[Dict[str, float]] = None,
+                candidate_ids=None) -> np.ndarray:
+        """Cosine (or fused multi-field) score of the query against every part, or only ``candidate_ids``."""
+        if self.field_index is not None:
+            scores = self.field_index.scores(query_vec[0], field_weights)
+            return scores if candidate_ids is None else scores[candidate_ids]
+        if candidate_ids is None:
+            return self.embeddings @ query_vec[0]
+        return self.embeddings[candidate_ids] @ query_vec[0]
+
+    def _nearest(self, query_vec: np.ndarray, k: int, field_weights: Optional[Dict[str, float]] = None,
+                 candidate_ids=None):
+        """Top-k (index, cosine) pairs via FAISS, or NumPy when FAISS is absent or the candidates are restricted."""
+        if self.index is not None and candidate_ids is None:
+            D, I = self.index.search(query_vec, k)
+            return [(int(i), float(d)) for i, d in zip(I[0], D[0]) if i >= 0]
+        scores = self._scores(query_vec, field_weights, candidate_ids)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        if candidate_ids is not None:
+            return [(int(candidate_ids[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def search_ids(self, query: str, top_k: int = 5, min_similarity: float = 0.7,
+                   field_weights: Optional[Dict[str, float]] = None, candidate_ids=None) -> List[Tuple[int, float]]:
+        """Ranked (part index, similarity) pairs; no records are copied.
+
+        ``candidate_ids`` (sorted part positions, e.g. from a spec range
+        predicate) restricts both the literal scan and the vector ranking.
+        """
+        if self.embeddings is None and self.field_index is None:
             return []
             
         # Hybrid: Try keyword/entity match in any attribute first
-        query_lower = query.lower().strip()
+        normalized_query = normalize(query)
         filtered = []
-        for part in self.parts:
-            for v in part.values():
-                if isinstance(v, str) and query_lower in v.lower():
-                    filtered.append(part.copy())
-                    break
+        if normalized_query:
+            for idx, part in self._scan(normalized_query, candidate_ids=candidate_ids):
+                for v in part.values():
+                    if isinstance(v, str) and normalized_query in normalize_value(v):
+                        filtered.append(idx)
+                        break
+        query_vec = self.encoder.encode([query])
         if filtered:
-            # Optionally, sort by semantic similarity
-            query_vec = self.embedding_model.encode([query], convert_to_numpy=True)
-            for part in filtered:
-                part_text = self._get_text(part)
-                part_vec = self.embedding_model.encode([part_text], convert_to_numpy=True)
-                sim = float(np.dot(query_vec, part_vec.T) / (np.linalg.norm(query_vec) * np.linalg.norm(part_vec)))
-                part['similarity'] = sim
-            filtered = sorted(filtered, key=lambda x: x['similarity'], reverse=True)
-            return filtered[:top_k]
+            # Sort keyword hits by semantic similarity using the stored embeddings
+            if self.field_index is not None:
+                sims = self.field_index.scores(query_vec[0], field_weights)[filtered]
+            else:
+                sims = self.embeddings[filtered] @ query_vec[0]
+            order = np.argsort(-sims)[:top_k]
+            return [(filtered[pos], float(sims[pos])) for pos in order]
             
         # Fallback: semantic search on all attributes
-        query_vec = self.embedding_model.encode([query], convert_to_numpy=True)
-        if self.index is not None:  # Type check
-            D, I = self.index.search(query_vec, top_k * 2)
-            similarities = 1 - (D[0] / 2)
-            results = []
-            for idx, sim in zip(I[0], similarities):
-                if sim >= min_similarity:
-                    part = self.parts[idx].copy()
-                    part['similarity'] = float(sim)
-                    results.append(part)
-            results = sorted(results, key=lambda x: x['similarity'], reverse=True)[:top_k]
-            return results
-        return []
+        hits = [(idx, sim) for idx, sim in self._nearest(query_vec, top_k * 2, field_weights, candidate_ids)
+                if sim >= min_similarity]
+        return hits[:top_k]
+
+    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.7,
+               field_weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Semantic search implementation"""
+        return materialize(self.parts, self.search_ids(query, top_k, min_similarity, field_weights),
+                           None, 'similarity')
 
     def suggest(self, query: str, limit: int = 5) -> List[str]:
         """Get query suggestions"""
         if not fuzzy_process:
             return []
             
-        choices = [p.get('part_name', '') for p in self.parts] + [p.get('part_number', '') for p in self.parts]
+        ids = self.catalog.candidates(query, match_all=False) if self.catalog is not None else None
+        names, numbers = self._suggest_names, self._suggest_numbers
+        if ids is not None:
+            names, numbers = names[ids], numbers[ids]
+        choices = names.tolist() + numbers.tolist()
         suggestions = fuzzy_process.extract(query, choices, limit=limit)
         return [s[0] for s in suggestions if s[1] > 60]
 
-    def _normalize(self, text):
-        if not isinstance(text, str):
-            text = str(text)
-        import re
-        # Lowercase, remove punctuation, collapse whitespace, remove filler words
-        text = text.lower()
-        text = re.sub(r"[\?\.,!;:>\-_/\\]", " ", text)  # Remove/replace common punctuation and separators
-        text = re.sub(r"\s+", " ", text)
-        text = text.strip()
-        return text
-
-    def _clean_query(self, query):
-        """
-        Remove common filler words, stopwords, and trailing phrases from the query for robust direct/field matching.
-        Handles cases like trailing 'can', 'please', etc. anywhere in the query.
-        """
-        import re
-        stop_phrases = [
-            r"\bplease\b", r"\bcan you\b", r"\bcould you\b", r"\bshow me\b", r"\bfind\b", r"\blist\b", r"\bgive me\b", r"\bi want\b", r"\bi need\b",
-            r"\bthe\b", r"\ba\b", r"\ban\b", r"\bof\b", r"\bfor\b", r"\bwith\b", r"\bto\b", r"\bin\b", r"\bon\b", r"\bby\b", r"\babout\b", r"\bshow\b", r"\bfind\b", r"\blist\b", r"\bgive\b", r"\bme\b", r"\bcan\b"
-        ]
-        cleaned = query.lower()
-        for phrase in stop_phrases:
-            cleaned = re.sub(phrase, "", cleaned)
-        cleaned = re.sub(r"[\?\.,!;:>\-_/\\]", " ", cleaned)
-        cleaned = re.sub(r"\s+", " ", cleaned).strip()
-        return cleaned
-
-    def direct_or_semantic_search(self, query, top_k=5, min_similarity=0.7):
-        key_fields = [
-            "Part Number", "Part Description", "System Name", "Sub System Name",
-            "Sub Sub System Name", "Serviceability", "End Items", "Source"
-        ]
-        import re
-        normalized_query = self._normalize(query)
-        cleaned_query = self._clean_query(query)
-        normalized_cleaned_query = self._normalize(cleaned_query)
+    def direct_or_semantic_search_ids(self, query, top_k=5, min_similarity=0.7,
+                                      field_weights=None, candidate_ids=None) -> List[Tuple[int, float]]:
+        """Direct field matches (score 1.0 / 0.95) if any, otherwise ``search_ids``."""
+        normalized_query = normalize(query)
+        cleaned_query = clean_query(query)
         # Try direct/field match for any field (not just key_fields)
-        for part in self.parts:
+        for idx, part in self._scan(normalized_query, candidate_ids=candidate_ids):
             for v in part.values():
-                if self._normalize(v) == normalized_query or self._normalize(v) == normalized_cleaned_query:
-                    part_copy = part.copy()
-                    part_copy['similarity'] = 1.0
-                    part_copy['direct_match'] = True
-                    return [part_copy]
+                # Nested specs/compatibility render with their keys and can never equal a query
+                if isinstance(v, (dict, list)):
+                    continue
+                value = normalize_value(v)
+                if value == normalized_query or value == cleaned_query:
+                    return [(idx, 1.0)]
         # Try key_fields logic (field:value extraction)
-        for field in key_fields:
-            if field.lower() in normalized_query or field.lower() in normalized_cleaned_query:
-                match = re.search(rf"{field}.*?[=:]?\\s*([\w\-\s\(\)\/]+)", query, re.IGNORECASE)
-                if not match:
-                    match = re.search(rf"{field}.*?[=:]?\\s*([\w\-\s\(\)\/]+)", cleaned_query, re.IGNORECASE)
+        for field, field_key, pattern in _KEY_FIELD_PATTERNS:
+            if field_key in normalized_query or field_key in cleaned_query:
+                match = pattern.search(query) or pattern.search(cleaned_query)
                 if match:
-                    value = self._normalize(match.group(1))
-                    results = [p.copy() for p in self.parts if self._normalize(p.get(field, "")) == value]
-                    if results:
-                        for part in results:
-                            part['similarity'] = 1.0
-                            part['direct_match'] = True
-                        return sorted(results, key=lambda x: x['similarity'], reverse=True)[:top_k]
-                    results = [p.copy() for p in self.parts if value in self._normalize(p.get(field, ""))]
-                    if results:
-                        for part in results:
-                            part['similarity'] = 0.95
-                            part['direct_match'] = True
-                        return sorted(results, key=lambda x: x['similarity'], reverse=True)[:top_k]
-                return []
+                    value = normalize(match.group(1))
+                    hits = [(i, 1.0) for i, p in self._scan(value, candidate_ids=candidate_ids)
+                            if normalize_value(p.get(field, "")) == value]
+                    if hits:
+                        return hits[:top_k]
+                    hits = [(i, 0.95) for i, p in self._scan(value, candidate_ids=candidate_ids)
+                            if value in normalize_value(p.get(field, ""))]
+                    if hits:
+                        return hits[:top_k]
+                # A named field whose value matched nothing falls through to semantic search
+                break
         # Only use semantic search if no direct/field match
-        return self.search(query, top_k=top_k, min_similarity=min_similarity)
+        return self.search_ids(query, top_k=top_k, min_similarity=min_similarity, field_weights=field_weights,
+                               candidate_ids=candidate_ids)
+
+    def direct_or_semantic_search(self, query, top_k=5, min_similarity=0.7, field_weights=None):
+        return materialize(self.parts, self.direct_or_semantic_search_ids(query, top_k, min_similarity, field_weights),
+                           None, 'similarity')
+
+# "Part Number: X", "system name brakes", ...: field name then the value to match in that field.
+# Longest names first, so "Sub System Name" is not read as "System Name"
+_KEY_FIELD_PATTERNS = [
+    (field, normalize(field), re.compile(re.escape(field) + r".*?[=:]?\s*([\w\-\s\(\)\/]+)", re.IGNORECASE))
+    for field in sorted(("Part Number", "Part Description", "System Name", "Sub System Name",
+                         "Sub Sub System Name", "Serviceability", "End Items", "Source"), key=len, reverse=True)
+]
+# "with ceramic material"
+_MATERIAL_SPEC = re.compile(r"(?:with|made of) (\w+) material", re.IGNORECASE)
 
 def extract_technical_specs(query):
-    """Extract technical specifications from the query."""
+    """Extract technical specifications from the query.
+
+    Numeric phrases ("friction coefficient above 0.4", "weight under 5 kg",
+    "cooling capacity over 15000 BTU") become ``ranges``: SpecPredicates in
+    the spec column's base unit, resolved against the catalog's SpecRangeIndex.
+    """
     specs = {}
-    # Example: "friction coefficient above 0.4"
-    friction_match = re.search(r"friction coefficient (?:above|of|greater than) (\d\.\d+)", query, re.IGNORECASE)
-    if friction_match:
-        specs['friction_coefficient'] = float(friction_match.group(1))
+    ranges = parse_spec_expressions(query)
+    if ranges:
+        specs['ranges'] = ranges
 
-    # Example: "with ceramic material"
-    material_match = re.search(r"(?:with|made of) (\w+) material", query, re.IGNORECASE)
+    material_match = _MATERIAL_SPEC.search(query)
     if material_match:
         specs['material'] = material_match.group(1)
         
     return specs
 
+def part_matches_specs(part, specs):
+    """True if a part satisfies every extracted technical spec."""
+    for predicate in specs.get('ranges', ()):
+        if not predicate.matches(spec_value(part, predicate.column)):
+            return False
+    if 'material' in specs:
+        if part.get('material', '').lower() != specs['material'].lower():
+            return False
+    return True
+
 def filter_results_by_specs(results, specs):
     """Filter search results based on extracted technical specs."""
     if not specs:
         return results
-    
-    filtered_results = []
-    for r in results:
-        match = True
-        if 'friction_coefficient' in specs:
-            if float(r.get('friction_coefficient', 0)) < specs['friction_coefficient']:
-                match = False
-        if 'material' in specs:
-            if r.get('material', '').lower() != specs['material'].lower():
-                match = False
-        if match:
-            filtered_results.append(r)
-            
-    return filtered_results
+    return [r for r in results if part_matches_specs(r, specs)]
 
 # --- Simple Keyword Search Engine (Fallback when AI libraries are not available) ---
 class SimpleKeywordSearchEngine:
@@ -492,56 +469,67 @@ class SimpleKeywordSearchEngine:
     This serves as a fallback when advanced semantic search is not available.
     """
     
-    def __init__(self, parts: List[Dict[str, Any]]):
+    def __init__(self, parts: List[Dict[str, Any]], catalog=None):
         self.parts = parts
+        self.catalog = catalog
         print(f"✅ Simple keyword search engine initialized with {len(parts)} parts")
     
-    def _normalize(self, text):
-        """Normalize text for matching"""
-        if not isinstance(text, str):
-            text = str(text)
-        return text.lower().strip()
+    def _scan(self, query: str, candidate_ids=None):
+        """(index, part) pairs sharing at least one token prefix with ``query`` (all parts without a shared catalog)."""
+        ids = self.catalog.candidates(query, match_all=False) if self.catalog is not None else None
+        if candidate_ids is not None:
+            ids = candidate_ids if ids is None else np.intersect1d(ids, candidate_ids)
+        if ids is None:
+            return enumerate(self.parts)
+        return ((int(i), self.parts[int(i)]) for i in ids)
     
     def _calculate_score(self, part, query_terms):
         """Calculate relevance score based on keyword matches"""
         score = 0
-        part_text = " ".join(str(v) for v in part.values()).lower()
+        part_text = normalize(" ".join(str(v) for v in part.values()))
         
         for term in query_terms:
-            term_lower = term.lower()
-            if term_lower in part_text:
+            if term in part_text:
                 # Boost score for exact matches in important fields
-                if term_lower in self._normalize(part.get('part_name', '')):
+                if term in normalize_value(part.get('part_name', '')):
                     score += 3
-                elif term_lower in self._normalize(part.get('system_name', '')):
+                elif term in normalize_value(part.get('system_name', '')):
                     score += 2
-                elif term_lower in self._normalize(part.get('manufacturer', '')):
+                elif term in normalize_value(part.get('manufacturer', '')):
                     score += 2
                 else:
                     score += 1
         
         return score
     
-    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.1) -> List[Dict[str, Any]]:
-        """Perform keyword-based search"""
-        if not query.strip():
+    def search_ids(self, query: str, top_k: int = 5, min_similarity: float = 0.1,
+                   field_weights: Optional[Dict[str, float]] = None, candidate_ids=None) -> List[Tuple[int, float]]:
+        """Ranked (part index, score) pairs within ``candidate_ids`` if given (field_weights is accepted for interface parity)"""
+        query_terms = tokenize(query)
+        if not query_terms:
             return []
+        hits = []
         
-        query_terms = query.lower().split()
-        results = []
-        
-        for part in self.parts:
+        for idx, part in self._scan(query, candidate_ids):
             score = self._calculate_score(part, query_terms)
             if score > 0:
-                part_copy = part.copy()
-                part_copy['similarity'] = min(score / len(query_terms), 1.0)
-                results.append(part_copy)
+                hits.append((idx, min(score / len(query_terms), 1.0)))
         
         # Sort by score and return top results
-        results = sorted(results, key=lambda x: x['similarity'], reverse=True)
-        return results[:top_k]
+        return heapq.nlargest(top_k, hits, key=lambda hit: hit[1])
+    
+    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.1,
+               field_weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Perform keyword-based search"""
+        return materialize(self.parts, self.search_ids(query, top_k, min_similarity), None, 'similarity')
     
-    def direct_or_semantic_search(self, query: str, top_k: int = 5, min_similarity: float = 0.1) -> List[Dict[str, Any]]:
+    def direct_or_semantic_search_ids(self, query: str, top_k: int = 5, min_similarity: float = 0.1,
+                                      field_weights: Optional[Dict[str, float]] = None,
+                                      candidate_ids=None) -> List[Tuple[int, float]]:
+        return self.search_ids(query, top_k, min_similarity, candidate_ids=candidate_ids)
+    
+    def direct_or_semantic_search(self, query: str, top_k: int = 5, min_similarity: float = 0.1,
+                                  field_weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
         """Perform direct keyword search"""
         return self.search(query, top_k, min_similarity)
     
@@ -571,7 +559,7 @@ class SimpleKeywordSearchEngine:
         
         # Use fuzzy matching if available
         choices = []
-        for part in self.parts:
+        for _, part in self._scan(query):
             choices.extend([
                 part.get('part_name', ''),
                 part.get('system_name', ''),
@@ -587,6 +575,14 @@ class SimpleKeywordSearchEngine:
             return []
 
 # Remove OpenAI engine and all switching logic
+# Multi-field embedding weights per endpoint (used when INTELLIPART_EMBEDDING_MODE=multi_field)
+ENDPOINT_FIELD_WEIGHTS = {
+    'search': {'name': 0.5, 'hierarchy': 0.3, 'specs': 0.2},
+    'semantic_search': {'name': 0.6, 'hierarchy': 0.25, 'specs': 0.15},
+    'rag': {'name': 0.4, 'hierarchy': 0.3, 'specs': 0.3},
+    'duplicate': {'name': 0.7, 'hierarchy': 0.2, 'specs': 0.1},
+}
+
 # Engine selection logic with fallback
 print("🔄 Initializing search engine...")
 print(f"📊 Available libraries:")
@@ -595,47 +591,372 @@ print(f"   - FAISS: {'✅' if faiss else '❌'}")
 print(f"   - NumPy: {'✅' if np else '❌'}")
 print(f"   - RapidFuzz: {'✅' if fuzzy_process else '❌'}")
 
+class CatalogIndexes:
+    """Everything built from one catalog load. Swapped as a unit so a request
+    never mixes part positions from one dataset with indexes from another."""
+
+    def __init__(self, parts, search, cross_reference, fitment, shared=None, spelling=None, specs=None,
+                 hierarchy=None):
+        self.parts = parts
+        self.search = search
+        self.cross_reference = cross_reference
+        self.fitment = fitment
+        self.shared = shared
+        self.spelling = spelling
+        self.specs = specs
+        self.hierarchy = hierarchy
+        self._version = None
+
+    @property
+    def version(self):
+        """Content fingerprint of the parts; cached LLM answers and search cursors are tied to it.
+
+        A shared catalog's export already recorded it. Otherwise it is
+        computed on first use, the same value in every worker.
+        """
+        if self._version is None:
+            fingerprint = self.shared.manifest.get('fingerprint') if self.shared is not None else None
+            self._version = fingerprint or catalog_fingerprint(self.parts)
+        return self._version
+
+    def with_search(self, search):
+        indexes = CatalogIndexes(self.parts, search, self.cross_reference, self.fitment, self.shared, self.spelling,
+                                 self.specs, self.hierarchy)
+        indexes._version = self._version
+        return indexes
+
+    def close(self):
+        # Called once the generation is retired and drained (shard processes, pools)
+        close = getattr(self.search, 'close', None)
+        if callable(close):
+            close()
+
+def load_catalog_parts():
+    """Parts plus the SharedCatalog they came from, if INTELLIPART_SHARED_CATALOG points at an export.
+
+    A shared catalog keeps records, columns and posting lists in read-only
+    memory maps so every worker process uses the same physical pages.
+    """
+    shared = open_shared_catalog(os.environ.get('INTELLIPART_SHARED_CATALOG'))
+    if shared is not None:
+        print(f"📂 Using shared memory-mapped catalog from {shared.catalog_dir}")
+        return shared.parts, shared
+    return load_all_parts_from_datasets(), None
+
+def build_catalog_indexes(parts, shared=None):
+    """Keyword search, cross-reference and fitment indexes for ``parts`` (all fast to build)."""
+    return CatalogIndexes(
+        parts,
+        SimpleKeywordSearchEngine(parts, catalog=shared),
+        # OEM / aftermarket / part id cross-reference
+        CrossReferenceIndex(parts),
+        # Vehicle fitment (model / engine / trim / year range) index
+        VehicleCompatibilityIndex(parts),
+        shared,
+        # Symmetric-delete spelling dictionary over the catalog vocabulary and hierarchy names
+        SpellingCorrector.from_catalog(parts, shared),
+        # Sorted numeric technical_specs columns for range predicates
+        SpecRangeIndex(parts),
+        # System / sub system / sub sub system tree with counts, rollups and posting lists
+        HierarchyIndex(parts),
+    )
+
+def spec_candidate_ids(catalog, tech_specs):
+    """Sorted positions of the parts satisfying every numeric spec range, or None when there are none."""
+    if catalog.specs is None:
+        return None
+    return catalog.specs.resolve(tech_specs.get('ranges', []))
+
+# Below this top score the original wording counts as a poor match and the spelling correction is tried
+SPELLING_POOR_SCORE = float(os.environ.get('INTELLIPART_SPELLING_POOR_SCORE', '0.5'))
+
+def search_with_correction(catalog, query, search):
+    """``(hits, Correction or None)`` from ``search(query)``, retried on the spell-corrected query if needed.
+
+    The user's wording wins whenever it finds something scoring at least
+    SPELLING_POOR_SCORE; the correction is then only offered as a
+    suggestion. It is used (``applied``) only when it ranks better.
+    """
+    hits = search(query)
+    correction = catalog.spelling.correct(query) if catalog.spelling is not None else None
+    if correction is None:
+        return hits, None
+    top = max((score for _, score in hits), default=None)
+    if top is None or top < SPELLING_POOR_SCORE:
+        corrected_hits = search(correction.text)
+        if corrected_hits and (top is None or max(score for _, score in corrected_hits) > top):
+            correction.applied = True
+            return corrected_hits, correction
+    return hits, correction
+
+def with_correction(suggestions, correction):
+    """Offer the corrected query first among the suggestions."""
+    if correction is None:
+        return suggestions
+    return [correction.text] + [s for s in suggestions if s != correction.text]
+
+def _build_semantic_engine(parts, encoder_backend, shared=None):
+    shards = os.environ.get('INTELLIPART_SHARDS')
+    if shards:
+        # Scatter-gather over shard processes/hosts: 'local:4[:category]' or shard URLs
+        print(f"🧩 Starting sharded search from '{shards}'...")
+        return coordinator_from_config(shards, parts, encoder_backend)
+    print(f"🚀 Initializing semantic search engine with '{encoder_backend}' encoder...")
+    engine = SemanticSearchEngineHF(parts, encoder_backend=encoder_backend, catalog=shared)
+    print(f"✅ Advanced semantic engine (HF) initialized successfully with {len(parts)} parts")
+    return engine
+
+# Encoder backend is explicit config: INTELLIPART_ENCODER=sentence-transformers|onnx|hashing
+encoder_backend = os.environ.get('INTELLIPART_ENCODER', 'sentence-transformers')
+
+# Engines that finish building in the background report their state here
+engine_warmup = EngineWarmup()
+
+# INTELLIPART_CATALOG_AUTOLOAD=0 imports the engines without loading the
+# dataset (benchmarks and scripts that bring their own catalog)
+catalog_autoload = os.environ.get('INTELLIPART_CATALOG_AUTOLOAD', '1') != '0'
+
 try:
-    all_parts = load_all_parts_from_datasets()
+    all_parts, shared_catalog = load_catalog_parts() if catalog_autoload else ([], None)
     print(f"📦 Loaded {len(all_parts)} parts from dataset")
-    
-    if SentenceTransformer and faiss and np and len(all_parts) > 0:
-        # Try to use advanced semantic search with a simple model
-        print("🚀 Attempting to initialize advanced semantic search engine...")
+except Exception as e:
+    print(f"❌ Error loading dataset: {e}")
+    all_parts, shared_catalog = [], None
+
+# Double-buffered handle for the live catalog; requests pin one generation
+# and a reload or warm-up publishes the next one without blocking them
+catalog_handle = IndexHandle('catalog', build_catalog_indexes(all_parts, shared_catalog))
+engine_warmup.mark_warm('keyword', catalog_handle.current.search)
+engine_warmup.mark_warm('cross_reference', catalog_handle.current.cross_reference)
+engine_warmup.mark_warm('fitment', catalog_handle.current.fitment)
+print("✅ Keyword search engine serving while the semantic index warms up")
+
+def _publish_semantic_engine(engine):
+    # Checked and swapped under the handle's lock, so a reload published meanwhile is never overwritten
+    def with_engine(catalog):
+        return catalog.with_search(engine) if catalog.parts is engine.parts else None
+    if catalog_handle.swap_if(with_engine) is None:
+        # A reload replaced the catalog while this engine was building; release
+        # what it holds (shard processes, thread pools) since nothing will retire it
+        print("⚠️ Discarding semantic engine built for a previous catalog")
+        close = getattr(engine, 'close', None)
+        if callable(close):
+            close()
+
+if all_parts:
+    if os.environ.get('INTELLIPART_SYNC_WARMUP') == '1':
+        # Block startup until the semantic engine is ready (scripts, benchmarks);
+        # the fingerprint is computed here too, once, before gunicorn forks
+        catalog_handle.current.version
         try:
-            semantic_engine = SemanticSearchEngineHF(all_parts, embedding_model_name='all-MiniLM-L6-v2')
-            print(f"✅ Advanced semantic engine (HF) initialized successfully with {len(all_parts)} parts")
-        except Exception as e:
-            print(f"❌ Failed to initialize advanced engine with model download: {e}")
-            print("🔄 Trying with fallback to simple search...")
-            semantic_engine = SimpleKeywordSearchEngine(all_parts)
-            print("✅ Using simple keyword search engine as fallback")
+            _publish_semantic_engine(_build_semantic_engine(all_parts, encoder_backend, shared_catalog))
+            engine_warmup.mark_warm('semantic', catalog_handle.current.search)
+        except EncoderUnavailableError as e:
+            print(f"❌ Encoder backend unavailable: {e}")
     else:
-        missing_libs = []
-        if not SentenceTransformer:
-            missing_libs.append("sentence_transformers")
-        if not faiss:
-            missing_libs.append("faiss")
-        if not np:
-            missing_libs.append("numpy")
-        if len(all_parts) == 0:
-            missing_libs.append("dataset_files")
-        print(f"❌ Advanced semantic engine not available: {missing_libs}")
-        semantic_engine = SimpleKeywordSearchEngine(all_parts)
-        print("✅ Using simple keyword search engine")
-        
-except Exception as e:
-    print(f"❌ Error initializing search engine: {e}")
+        engine_warmup.start('semantic', lambda parts=all_parts: _build_semantic_engine(parts, encoder_backend, shared_catalog),
+                            _publish_semantic_engine)
+elif catalog_autoload:
+    print("❌ Advanced semantic engine not available: ['dataset_files']")
+
+def _build_reloaded_catalog():
+    try:
+        parts, shared = load_catalog_parts()
+        if not parts:
+            raise RuntimeError("reload found no parts; keeping the current catalog")
+        catalog = build_catalog_indexes(parts, shared)
+        # Fingerprint off the request path (with_search carries it over)
+        catalog.version
+        try:
+            catalog = catalog.with_search(_build_semantic_engine(parts, encoder_backend, shared))
+        except EncoderUnavailableError as e:
+            print(f"❌ Encoder backend unavailable, reloaded catalog uses keyword search: {e}")
+        return catalog
+    except Exception:
+        # Leave the live generation in place and allow another reload
+        catalog_handle.end_pending()
+        raise
+
+def _publish_reloaded_catalog(catalog):
+    global all_parts
+    generation = catalog_handle.swap(catalog, end_pending=True)
+    all_parts = catalog.parts
+    print(f"🔁 Catalog generation {generation} live with {len(catalog.parts)} parts")
+
+def reload_catalog() -> bool:
+    """Rebuild every index from the datasets in the background and swap it in.
+
+    Returns False when a reload is already running.
+    """
+    if not catalog_handle.begin_pending(datetime.now().isoformat()):
+        return False
+    engine_warmup.start('catalog_reload', _build_reloaded_catalog, _publish_reloaded_catalog)
+    return True
+
+# Workers forked from one master each hold their own catalog, so a reload is
+# broadcast through a marker file: whoever bumps it (the admin endpoint,
+# gunicorn's HUP hook) and every worker that sees it change rebuilds locally.
+# Checked at most every INTELLIPART_RELOAD_CHECK_SECONDS per worker.
+RELOAD_MARKER = Path(os.environ.get('INTELLIPART_RELOAD_MARKER',
+                                    Path(__file__).parent / ".search_cache" / "reload_marker"))
+RELOAD_CHECK_SECONDS = float(os.environ.get('INTELLIPART_RELOAD_CHECK_SECONDS', '2'))
+
+def _reload_marker_stamp() -> int:
+    try:
+        return RELOAD_MARKER.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+# Stamp of the marker this process's catalog reflects; workers inherit the
+# master's, so a worker forked after a reload catches up on its first request
+_reload_seen = _reload_marker_stamp()
+_reload_checked_at = 0.0
+
+def request_reload_everywhere() -> None:
+    """Bump the reload marker so every worker sharing it rebuilds its catalog."""
+    RELOAD_MARKER.parent.mkdir(parents=True, exist_ok=True)
+    RELOAD_MARKER.write_text(datetime.now().isoformat())
+
+def _follow_reload_marker():
+    global _reload_seen, _reload_checked_at
+    now = time.monotonic()
+    if now - _reload_checked_at < RELOAD_CHECK_SECONDS:
+        return
+    _reload_checked_at = now
+    stamp = _reload_marker_stamp()
+    # A reload already running may have read the old datasets: retry on the next check
+    if stamp > _reload_seen and reload_catalog():
+        _reload_seen = stamp
+        print("🔁 Reload marker changed, reloading catalog")
+
+def _reload_on_signal(signum, frame):
+    print("🔁 SIGHUP received, reloading catalog")
+    reload_catalog()
+
+if hasattr(signal, 'SIGHUP'):
     try:
-        # Fall back to simple keyword search with sample data
-        if not all_parts:
-            all_parts = load_all_parts_from_datasets()
-        semantic_engine = SimpleKeywordSearchEngine(all_parts)
-        print("✅ Using simple keyword search engine as fallback")
-    except Exception as e2:
-        print(f"❌ Error initializing fallback search engine: {e2}")
-        semantic_engine = None
-        all_parts = []
+        signal.signal(signal.SIGHUP, _reload_on_signal)
+    except ValueError:
+        # Only the main thread may install handlers (e.g. when imported by a worker thread)
+        pass
+
+@app.before_request
+def _pin_catalog():
+    _follow_reload_marker()
+    g.catalog_generation = catalog_handle.acquire_generation()
+
+@app.teardown_request
+def _unpin_catalog(exc=None):
+    generation = g.pop('catalog_generation', None)
+    if generation is not None:
+        catalog_handle.release_generation(generation)
+
+def current_catalog():
+    """The catalog generation pinned by the current request (or the live one outside requests)."""
+    generation = g.get('catalog_generation') if has_request_context() else None
+    return generation.value if generation is not None else catalog_handle.current
+
+def current_catalog_generation() -> int:
+    """Number of the catalog generation the current request is pinned to."""
+    generation = g.get('catalog_generation') if has_request_context() else None
+    return generation.number if generation is not None else catalog_handle.generation
+
+# Cursor pagination: ranked ids and scores travel inside signed cursors, so
+# any worker can serve the next page. Signed with INTELLIPART_CURSOR_SECRET
+# (else a random key, valid in this process and its forked workers only) and
+# expired via INTELLIPART_RESULT_CACHE_TTL
+result_cursors = ResultSetCursors(os.environ.get('INTELLIPART_CURSOR_SECRET'))
+# LLM answers keyed by model, prompt template version and retrieved context (INTELLIPART_LLM_CACHE_*)
+response_cache = ResponseCache()
+# Prompt template versions; bump one whenever its prompt text changes
+RAG_ANSWER_TEMPLATE = 'rag_answer:v1'
+# Single-line answers are cached apart: a streamed one stops at the first line break, so it
+# must never be served to a question that asked for a list or details
+RAG_LINE_ANSWER_TEMPLATE = 'rag_answer_line:v1'
+QUERY_ENHANCEMENT_TEMPLATE = 'query_enhancement:v1'
+DESIGN_OPTIMIZATION_TEMPLATE = 'design_optimization:v1'
+# Hits ranked per /api/search query, and the page size served from them
+SEARCH_RESULT_SET_SIZE = int(os.environ.get('INTELLIPART_RESULT_SET_SIZE', '20'))
+SEARCH_PAGE_SIZE = 10
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Upper bound on numbers resolved per bulk cross-reference call
+MAX_CROSS_REFERENCE_BATCH = 10000
+
+# Streamed answers: server-sent events by default, JSON lines with ?format=ndjson (or that Accept type)
+STREAM_FORMATS = {'sse': 'text/event-stream', 'ndjson': 'application/x-ndjson'}
+
+def stream_format() -> str:
+    requested = request.args.get('format')
+    if requested in STREAM_FORMATS:
+        return requested
+    return 'ndjson' if request.accept_mimetypes.best == STREAM_FORMATS['ndjson'] else 'sse'
+
+def encode_stream_event(event: str, data: Dict[str, Any], fmt: str) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if fmt == 'ndjson':
+        return json.dumps({'event': event, **data}, ensure_ascii=False, default=str) + '\n'
+    return f'event: {event}\ndata: {payload}\n\n'
+
+def event_stream_response(events, fmt: str) -> Response:
+    """Relay ``(event, data)`` pairs as they are produced.
+
+    The status line is sent with the first event, so later failures arrive as an 'error' event. When the client
+    disconnects the server closes this body, which closes ``events`` and with it the LLM call feeding it.
+    """
+    def body():
+        try:
+            for event, data in events:
+                yield encode_stream_event(event, data, fmt)
+        except Exception as e:
+            yield encode_stream_event('error', {'error': str(e)}, fmt)
+        finally:
+            events.close()
+    # No proxy buffering: every event should reach the client when it is written
+    return Response(body(), mimetype=STREAM_FORMATS[fmt], headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and answering requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/ready')
+def api_ready():
+    """Readiness: which engines are warm and which one is serving search."""
+    catalog = current_catalog()
+    engines = engine_warmup.status()
+    serving = catalog.search is not None
+    return jsonify({
+        'ready': serving,
+        'serving_engine': type(catalog.search).__name__ if serving else None,
+        'semantic_ready': isinstance(catalog.search, SemanticSearchEngineHF),
+        'parts': len(catalog.parts),
+        'catalog': catalog_handle.status(),
+        'result_cursors': result_cursors.status(),
+        'llm_cache': response_cache.status(),
+        'llm_providers': llm_clients.status(),
+        'spelling': catalog.spelling.status() if catalog.spelling is not None else None,
+        'spec_columns': catalog.specs.stats() if catalog.specs is not None else None,
+        'hierarchy': catalog.hierarchy.status() if catalog.hierarchy is not None else None,
+        'engines': engines
+    }), (200 if serving else 503)
+
+@app.route('/api/admin/reload', methods=['POST'])
+def api_admin_reload():
+    """
+    Rebuilds all indexes from the dataset files in the background and swaps
+    them in atomically. Protected by INTELLIPART_ADMIN_TOKEN when it is set.
+    The other workers follow through the reload marker on their next request.
+    """
+    global _reload_seen
+    token = os.environ.get('INTELLIPART_ADMIN_TOKEN')
+    if token and request.headers.get('X-Admin-Token') != token:
+        return jsonify({'error': 'Forbidden'}), 403
+    if not reload_catalog():
+        return jsonify({'error': 'Reload already in progress', 'catalog': catalog_handle.status()}), 409
+    request_reload_everywhere()
+    _reload_seen = _reload_marker_stamp()
+    return jsonify({'success': True, 'status': 'reloading', 'catalog': catalog_handle.status()}), 202
 
 @app.route('/')
 def conversational_interface():
@@ -651,54 +972,70 @@ def conversational_interface():
 def api_search():
     """
     Handles conversational search queries from the user.
+
+    The first request ranks up to SEARCH_RESULT_SET_SIZE parts and signs
+    their ids into ``next_cursor``. Posting ``{"cursor": ...}`` returns the
+    following page on any worker without running the search again.
     """
-    if not semantic_engine:
+    catalog = current_catalog()
+    if not catalog.search:
         return jsonify({'error': 'Semantic search engine not available'}), 500
     try:
         data = request.get_json()
+        fields = resolve_fields(data.get('fields'), 'search')
+        page_size = max(1, min(int(data.get('page_size', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE))
+        if data.get('cursor'):
+            return search_page_from_cursor(catalog, data['cursor'], page_size, fields)
+        
         query = data.get('query', '').strip()
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
         start_time = time.time()
         
-        # 1. Perform initial semantic search
-        semantic_results = semantic_engine.direct_or_semantic_search(query, top_k=20)
-        
-        # 2. Extract technical specs and filter results
+        # 1. Numeric spec ranges ("weight under 5 kg") resolve to an id set over the whole catalog
         tech_specs = extract_technical_specs(query)
+        candidate_ids = spec_candidate_ids(catalog, tech_specs)
+        
+        # 2. Semantic search within the spec id set, spell-corrected only if the query as typed matches poorly
+        #    (ranked part ids, nothing copied yet)
+        hits, correction = search_with_correction(catalog, query, lambda q: catalog.search.direct_or_semantic_search_ids(
+            q, top_k=SEARCH_RESULT_SET_SIZE, field_weights=ENDPOINT_FIELD_WEIGHTS['search'],
+            candidate_ids=candidate_ids))
+        if not hits and candidate_ids is not None:
+            # Spec-only queries ("weight under 5 kg") have no text to rank by: list the matching parts
+            hits = [(int(i), 1.0) for i in candidate_ids[:SEARCH_RESULT_SET_SIZE]]
+        
+        # 3. Filter on the remaining (non-numeric) specs
         if tech_specs:
-            final_results = filter_results_by_specs(semantic_results, tech_specs)
-        else:
-            final_results = semantic_results
+            hits = [(idx, score) for idx, score in hits if part_matches_specs(catalog.parts[idx], tech_specs)]
+        final_results = [catalog.parts[idx] for idx, _ in hits]
             
-        suggestions = semantic_engine.suggest(query, limit=5)
+        suggestions = with_correction(catalog.search.suggest(query, limit=5), correction)
         search_time_ms = round((time.time() - start_time) * 1000, 2)
         
-        # 3. Generate intelligent response based on the *final* results
+        # 4. Generate intelligent response based on the *final* results
         intelligent_response = generate_intelligent_response(query, final_results, search_time_ms, tech_specs)
         
         if not final_results:
             return jsonify({
                 'success': False,
                 'query': query,
+                'corrected_query': correction.to_dict() if correction else None,
+                'suggestions': suggestions,
                 'intelligent_response': generate_no_results_response(query),
             })
 
-        # 4. Sanitize results for frontend
-        sanitized_results = []
-        for part in final_results:
-            part_copy = dict(part)
-            part_copy.pop('similarity', None) # Remove internal score
-            part_copy.pop('direct_match', None)
-            sanitized_results.append(part_copy)
-
+        # 5. Keep the ranked ids for later pages; materialize only this page, with the requested fields
+        result_set = result_cursors.put(hits, catalog.version, query=query)
         response = {
             'success': True,
             'query': query,
-            'results': sanitized_results[:10], # Limit to top 10 for display
-            'result_count': len(sanitized_results),
+            'results': [project(part, fields) for part in final_results[:page_size]],
+            'result_count': len(final_results),
+            'next_cursor': result_cursors.cursor(result_set, page_size),
             'search_time_ms': search_time_ms,
+            'corrected_query': correction.to_dict() if correction else None,
             'suggestions': suggestions,
             'intelligent_response': intelligent_response,
         }
@@ -708,15 +1045,35 @@ def api_search():
         app.logger.error(f"API Search Error: {e}", exc_info=True)
         return jsonify({'error': 'An internal server error occurred. Please try again later.'}), 500
 
+def search_page_from_cursor(catalog, cursor, page_size, fields):
+    """Serve the page a cursor points at from the result set it carries (no search is run)."""
+    start_time = time.time()
+    try:
+        offset, result_set = result_cursors.resolve(cursor, catalog.version, len(catalog.parts))
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 410
+    hits = result_set.page(offset, page_size)
+    return jsonify({
+        'success': True,
+        'query': result_set.meta.get('query'),
+        'results': [project(catalog.parts[idx], fields) for idx, _ in hits],
+        'result_count': len(result_set.hits),
+        'offset': offset,
+        'next_cursor': result_cursors.cursor(result_set, offset + len(hits)),
+        'search_time_ms': round((time.time() - start_time) * 1000, 2),
+        'from_cache': True,
+    })
+
 # --- Dynamic Assistant Intro, Example Queries, and Quick Insights ---
 @app.route('/api/assistant-intro')
 def api_assistant_intro():
     """
     Returns a static assistant intro and questionnaire (no LLM, fully offline).
     """
-    if not all_parts:
+    catalog = current_catalog()
+    if not catalog.parts:
         return jsonify({'error': 'No dataset loaded'}), 500
-    sample = all_parts[0] if all_parts else {}
+    sample = catalog.parts[0] if catalog.parts else {}
     intro_json = {
         "greeting": "Welcome to IntelliPart!",
         "intro": "I am your expert assistant for Mahindra automotive parts. You can search for parts by name, number, system, or manufacturer. All search is powered by fast, offline semantic search.",
@@ -735,7 +1092,8 @@ def api_example_queries():
     """
     Returns dynamic example queries based on actual dataset (no LLM, fully offline).
     """
-    if not all_parts:
+    catalog = current_catalog()
+    if not catalog.parts:
         return jsonify({'error': 'No dataset loaded'}), 500
     
     # Generate relevant queries based on actual dataset
@@ -773,12 +1131,13 @@ def api_quick_insights():
     """
     Returns quick dataset insights using the actual loaded dataset (no LLM).
     """
-    if not all_parts:
+    catalog = current_catalog()
+    if not catalog.parts:
         return jsonify({'error': 'No dataset loaded'}), 500
-    total_parts = len(all_parts)
-    unique_part_numbers = len(set(p.get('part_number') for p in all_parts if p.get('part_number')))
-    avg_cost = sum(float(p.get('cost', 0)) for p in all_parts if p.get('cost')) / total_parts if total_parts else 0
-    total_stock = sum(int(p.get('stock', 0)) for p in all_parts if p.get('stock'))
+    total_parts = len(catalog.parts)
+    unique_part_numbers = len(set(p.get('part_number') for p in catalog.parts if p.get('part_number')))
+    avg_cost = sum(float(p.get('cost', 0)) for p in catalog.parts if p.get('cost')) / total_parts if total_parts else 0
+    total_stock = sum(int(p.get('stock', 0)) for p in catalog.parts if p.get('stock'))
     metrics = {
         "total_parts": total_parts,
         "unique_parts": unique_part_numbers,
@@ -821,11 +1180,13 @@ def patched_build_llm_prompt(self, query: str, search_result: dict, user_languag
     return prompt
 
 ConversationalEngine._build_llm_prompt = patched_build_llm_prompt
+ConversationalEngine.prompt_template = 'conversational_dataset_sample:v1'
 
 # --- Semantic Search API ---
 @app.route('/api/semantic-search', methods=['POST'])
 def api_semantic_search():
-    if not semantic_engine:
+    catalog = current_catalog()
+    if not catalog.search:
         return jsonify({'error': 'Semantic search engine not available'}), 500
     try:
         data = request.get_json()
@@ -833,103 +1194,309 @@ def api_semantic_search():
         top_k = int(data.get('top_k', 5))
         if not query:
             return jsonify({'error': 'Query is required'}), 400
-        results = semantic_engine.search(query, top_k=top_k)
-        suggestions = semantic_engine.suggest(query, limit=5)
-        return jsonify({'success': True, 'results': results, 'suggestions': suggestions})
+        fields = resolve_fields(data.get('fields'), 'semantic_search')
+        candidate_ids = spec_candidate_ids(catalog, extract_technical_specs(query))
+        hits, correction = search_with_correction(catalog, query, lambda q: catalog.search.search_ids(
+            q, top_k=top_k, field_weights=ENDPOINT_FIELD_WEIGHTS['semantic_search'], candidate_ids=candidate_ids))
+        results = materialize(catalog.parts, hits, fields, 'similarity')
+        suggestions = with_correction(catalog.search.suggest(query, limit=5), correction)
+        return jsonify({'success': True, 'results': results, 'suggestions': suggestions,
+                        'corrected_query': correction.to_dict() if correction else None})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # --- Ollama LLM utility ---
-def call_ollama_llm(prompt, model="llama3"):
+def call_ollama_llm(prompt, model=OLLAMA_DEFAULT_MODEL):
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=60
-        )
-        response.raise_for_status()
-        return response.json()["response"].strip()
-    except Exception as e:
+        return llm_clients.ollama.generate(prompt, model=model)
+    except LLMError as e:
         return f"[ERROR: Ollama call failed: {e}]"
 
+def single_line_answer(query: str) -> bool:
+    """RAG answers are cut to their first line unless the user asks for a list or details."""
+    lowered = query.lower()
+    return not any(word in lowered for word in ("list", "show", "all", "details"))
+
+def prepare_rag_answer(catalog, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Retrieve the top records for a RAG request and compose its prompt; 'results' is empty when nothing matched."""
+    query = data.get('query', '').strip()
+    limit = int(data.get('limit', 5))
+    min_similarity = float(data.get('min_similarity', 0.55))
+    llm = data.get('llm', 'ollama')  # 'ollama' (default) or 'openai'
+    openai_api_key = data.get('openai_api_key') or os.environ.get('OPENAI_API_KEY')
+    fields = resolve_fields(data.get('fields'), 'rag')
+
+    # 1. Retrieve top-k records (direct_or_semantic_search, spell-corrected only on a poor match), projected to the RAG fields
+    candidate_ids = spec_candidate_ids(catalog, extract_technical_specs(query))
+    hits, correction = search_with_correction(catalog, query, lambda q: catalog.search.direct_or_semantic_search_ids(
+        q, top_k=limit, min_similarity=min_similarity, field_weights=ENDPOINT_FIELD_WEIGHTS['rag'],
+        candidate_ids=candidate_ids))
+    top_k_records = materialize(catalog.parts, hits, fields)
+
+    # 2. Compose prompt for LLM
+    context = "\n".join([json.dumps(rec, ensure_ascii=False) for rec in top_k_records])
+    prompt = (
+        "You are an expert automotive parts assistant. Here is the dataset context:\n"
+        f"{context}\n"
+        f"User Query: {query}\n"
+        "Answer the query using only the dataset context above. Your answer must be concise and fit in a single line, unless the user explicitly asks for a list or detailed explanation. If you don't know, say so."
+    )
+    use_openai = bool(llm == 'openai' and openai and openai_api_key)  # Check if OpenAI is available
+    ollama_model = data.get('ollama_model', 'llama3')
+    rag = {
+        'query': query,
+        'results': top_k_records,
+        'corrected_query': correction.to_dict() if correction else None,
+        'context': context,
+        'prompt': prompt,
+        'use_openai': use_openai,
+        'openai_api_key': openai_api_key,
+        'ollama_model': ollama_model,
+        'model': 'openai:gpt-3.5-turbo' if use_openai else f'ollama:{ollama_model}',
+        'single_line': single_line_answer(query),
+        # Read now: a streamed body outlives the request's catalog pin
+        'dataset_version': catalog.version,
+    }
+    # The raw dataset sample is opt-in; it used to be attached to every answer
+    if data.get('include_dataset_sample'):
+        rag['dataset_sample'] = [project(p, fields) for p in catalog.parts[:10]]
+    return rag
+
+def rag_answer_template(rag: Dict[str, Any]) -> str:
+    return RAG_LINE_ANSWER_TEMPLATE if rag['single_line'] else RAG_ANSWER_TEMPLATE
+
+def rag_response_fields(rag: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {'results': rag['results'], 'corrected_query': rag['corrected_query']}
+    if 'dataset_sample' in rag:
+        fields['dataset_sample'] = rag['dataset_sample']
+    return fields
+
 @app.route('/api/rag-answer', methods=['POST'])
 def api_rag_answer():
     """
     RAG endpoint: fetch top-k records with semantic search, then synthesize an answer using Ollama (local LLM) or OpenAI.
     """
-    if not semantic_engine:
+    catalog = current_catalog()
+    if not catalog.search:
         return jsonify({'error': 'Semantic search engine not available'}), 500
     try:
         data = request.get_json()
-        query = data.get('query', '').strip()
-        limit = int(data.get('limit', 5))
-        min_similarity = float(data.get('min_similarity', 0.55))
-        llm = data.get('llm', 'ollama')  # 'ollama' (default) or 'openai'
-        openai_api_key = data.get('openai_api_key') or os.environ.get('OPENAI_API_KEY')
-        
-        if not query:
+        if not data.get('query', '').strip():
             return jsonify({'error': 'Query is required'}), 400
-            
-        # 1. Retrieve top-k records (use direct_or_semantic_search)
-        top_k_records = semantic_engine.direct_or_semantic_search(query, top_k=limit, min_similarity=min_similarity)
-        if not top_k_records:
+        rag = prepare_rag_answer(catalog, data)
+        query, prompt = rag['query'], rag['prompt']
+        if not rag['results']:
             return jsonify({'success': False, 'answer': '', 'results': [], 'error': 'No relevant results found.'})
-            
-        # 2. Compose prompt for LLM
-        context = "\n".join([json.dumps(rec, ensure_ascii=False) for rec in top_k_records])
-        prompt = (
-            "You are an expert automotive parts assistant. Here is the dataset context:\n"
-            f"{context}\n"
-            f"User Query: {query}\n"
-            "Answer the query using only the dataset context above. Your answer must be concise and fit in a single line, unless the user explicitly asks for a list or detailed explanation. If you don't know, say so."
-        )
-        
-        # 3. Call LLM (Ollama by default)
-        if llm == 'openai' and openai and openai_api_key:  # Check if OpenAI is available
-            openai.api_key = openai_api_key
-            try:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=256,
-                    temperature=0.2
-                )
-                answer = response['choices'][0]['message']['content']
-            except Exception as e:
-                answer = f"Error calling OpenAI: {str(e)}"
-        else:
-            answer = call_ollama_llm(prompt, model=data.get('ollama_model', 'llama3'))
+
+        # 3. Call LLM (Ollama by default), unless this question was answered from the same context before
+        def generate():
+            if rag['use_openai']:
+                try:
+                    return llm_clients.openai.generate(prompt, model="gpt-3.5-turbo", api_key=rag['openai_api_key'],
+                                                       max_tokens=256, temperature=0.2)
+                except LLMError as e:
+                    return f"Error calling OpenAI: {str(e)}"
+            return call_ollama_llm(prompt, model=rag['ollama_model'])
+
+        answer, cache_match = response_cache.get_or_generate(
+            query, generate, model=rag['model'], template=rag_answer_template(rag), context=rag['context'],
+            dataset_version=rag['dataset_version'])
             
         # Post-process answer
-        if ("list" not in query.lower() and "show" not in query.lower() and 
-            "all" not in query.lower() and "details" not in query.lower()):
+        if rag['single_line']:
             answer = answer.split("\n")[0].strip()
             
-        # Add dataset sample
-        dataset_sample = all_parts[:10] if all_parts else []
-        return jsonify({
-            'success': True,
-            'answer': answer,
-            'results': top_k_records,
-            'dataset_sample': dataset_sample
-        })
+        return jsonify({'success': True, 'answer': answer, **rag_response_fields(rag), 'cache': cache_match})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def first_line(pieces):
+    """Pieces up to the answer's first line break; the upstream stream is closed there, ending the generation."""
+    started = False
+    try:
+        for piece in pieces:
+            if not started:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+                started = True
+            head, newline, _ = piece.partition('\n')
+            if head:
+                yield head
+            if newline:
+                return
+    finally:
+        pieces.close()
+
+def stream_rag_answer(rag: Dict[str, Any]):
+    """The RAG answer as events: 'parts' at once, then a 'token' per LLM chunk, then 'done'."""
+    yield 'parts', {'success': True, **rag_response_fields(rag)}
+    query, prompt = rag['query'], rag['prompt']
+
+    def stream():
+        if rag['use_openai']:
+            pieces = llm_clients.openai.stream(prompt, model="gpt-3.5-turbo", api_key=rag['openai_api_key'],
+                                               max_tokens=256, temperature=0.2)
+        else:
+            pieces = llm_clients.ollama.stream(prompt, model=rag['ollama_model'])
+        # Stop the model at the first line break when only one line will be shown
+        return first_line(pieces) if rag['single_line'] else pieces
+
+    answer = []
+    cache_match = None
+    for piece, cache_match in response_cache.get_or_stream(
+            query, stream, model=rag['model'], template=rag_answer_template(rag), context=rag['context'],
+            dataset_version=rag['dataset_version']):
+        if cache_match and rag['single_line']:
+            piece = piece.strip().split("\n")[0].strip()
+        answer.append(piece)
+        yield 'token', {'text': piece}
+    yield 'done', {'answer': ''.join(answer).strip(), 'cache': cache_match}
+
+@app.route('/api/rag-answer/stream', methods=['POST'])
+def api_rag_answer_stream():
+    """
+    Streaming RAG: the retrieved records are sent as soon as retrieval finishes, then the LLM answer token by
+    token, as server-sent events (default) or JSON lines (?format=ndjson). Disconnecting cancels the LLM call.
+    """
+    catalog = current_catalog()
+    if not catalog.search:
+        return jsonify({'error': 'Semantic search engine not available'}), 500
+    try:
+        data = request.get_json()
+        if not data.get('query', '').strip():
+            return jsonify({'error': 'Query is required'}), 400
+        rag = prepare_rag_answer(catalog, data)
+        if not rag['results']:
+            return jsonify({'success': False, 'answer': '', 'results': [], 'error': 'No relevant results found.'})
+        return event_stream_response(stream_rag_answer(rag), stream_format())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # --- Dataset Sample API ---
 @app.route('/api/dataset-sample')
 def api_dataset_sample():
     """
     Returns the first N records from the loaded dataset as JSONL (for LLM context, debugging, or UI display).
     """
-    if not all_parts:
+    catalog = current_catalog()
+    if not catalog.parts:
         return jsonify({'error': 'No dataset loaded'}), 500
     n = int(request.args.get('n', 10))
-    sample = all_parts[:n]
+    sample = catalog.parts[:n]
     dataset_jsonl = "\n".join(json.dumps(rec, ensure_ascii=False) for rec in sample)
     return jsonify({'success': True, 'sample_jsonl': dataset_jsonl, 'sample': sample, 'count': len(sample)})
 
+# --- Hierarchy Browse API ---
+@app.route('/api/hierarchy')
+def api_hierarchy():
+    """
+    Browses the System -> Sub System -> Sub Sub System tree. Returns the node
+    (``?node=brakes/brake-pads``, the root when omitted) with its part count and
+    cost / stock rollups, its children with theirs, and one page of the parts
+    under it (``offset``, ``page_size``, ``fields``).
+    """
+    catalog = current_catalog()
+    if catalog.hierarchy is None:
+        return jsonify({'error': 'Hierarchy index not available'}), 503
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        page_size = max(1, min(int(request.args.get('page_size', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'offset and page_size must be integers'}), 400
+    view = catalog.hierarchy.browse(request.args.get('node', ''), offset, page_size)
+    if view is None:
+        return jsonify({'error': f"Unknown hierarchy node '{request.args.get('node')}'"}), 404
+    fields = resolve_fields(request.args.get('fields'), 'search')
+    part_ids = view.pop('part_ids')
+    next_offset = offset + len(part_ids)
+    return jsonify({
+        'success': True,
+        **view,
+        'parts': [project(catalog.parts[idx], fields) for idx in part_ids],
+        'next_offset': next_offset if next_offset < view['total'] else None,
+    })
+
+# --- Cross-Reference API ---
+@app.route('/api/cross-reference', methods=['POST'])
+def api_cross_reference():
+    """
+    Resolves OEM, aftermarket or internal part numbers to their equivalents.
+    Accepts a single 'number' or a bulk 'numbers' list.
+    """
+    catalog = current_catalog()
+    try:
+        data = request.get_json() or {}
+        numbers = data.get('numbers')
+        if numbers is None and data.get('number'):
+            numbers = [data['number']]
+        if not numbers or not isinstance(numbers, list):
+            return jsonify({'error': 'numbers (list) or number is required'}), 400
+        if len(numbers) > MAX_CROSS_REFERENCE_BATCH:
+            return jsonify({'error': f'At most {MAX_CROSS_REFERENCE_BATCH} numbers per call'}), 400
+        
+        start_time = time.time()
+        resolved = catalog.cross_reference.bulk_resolve(str(n) for n in numbers)
+        return jsonify({
+            'success': True,
+            'results': resolved,
+            'resolved_count': sum(1 for r in resolved if r['found']),
+            'requested_count': len(resolved),
+            'lookup_time_ms': round((time.time() - start_time) * 1000, 2)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# --- Vehicle Fitment API ---
+@app.route('/api/fitment', methods=['POST'])
+def api_fitment():
+    """
+    Exact vehicle fitment lookup. Accepts free text ('Thar, 2.5L Diesel, 2013')
+    or explicit model/engine/year/trim, combinable with category, manufacturer
+    and max_cost filters.
+    """
+    catalog = current_catalog()
+    try:
+        data = request.get_json() or {}
+        limit = int(data.get('limit', 20))
+        criteria = catalog.fitment.parse_query(data['query']) if data.get('query') else {}
+        for key in ('model', 'engine', 'trim', 'year'):
+            if data.get(key):
+                criteria[key] = data[key]
+        if not criteria:
+            return jsonify({'error': 'query or one of model, engine, year, trim is required'}), 400
+        
+        start_time = time.time()
+        matched_ids = catalog.fitment.fitment(**criteria)
+        
+        category = str(data.get('category', '')).lower()
+        manufacturer = str(data.get('manufacturer', '')).lower()
+        max_cost = data.get('max_cost')
+        results = []
+        total = 0
+        for idx in sorted(matched_ids):
+            part = catalog.parts[idx]
+            if category and category not in str(part.get('category', '')).lower():
+                continue
+            if manufacturer and manufacturer not in str(part.get('manufacturer', '')).lower():
+                continue
+            if max_cost is not None and float(part.get('cost_price') or part.get('cost') or 0) > float(max_cost):
+                continue
+            total += 1
+            if len(results) < limit:
+                results.append(part)
+        
+        return jsonify({
+            'success': True,
+            'criteria': criteria,
+            'results': results,
+            'result_count': total,
+            'search_time_ms': round((time.time() - start_time) * 1000, 2)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # --- AI Intelligence Enhancement Functions ---
 
 def enhance_query_with_ai(query, llm_provider="gemini"):
@@ -958,9 +1525,14 @@ def enhance_query_with_ai(query, llm_provider="gemini"):
         """
         
         if llm_provider == "gemini":
-            response = call_gemini(enhancement_prompt)
+            call, model = call_gemini, gemini_model_key()
         else:
-            response = call_ollama_llm(enhancement_prompt)
+            call, model = call_ollama_llm, f"ollama:{OLLAMA_DEFAULT_MODEL}"
+        # The answer rewrites this exact query, so the query is the context: only the same
+        # wording (after normalization) may reuse it, never a merely similar one
+        response, _ = response_cache.get_or_generate(
+            query, lambda: call(enhancement_prompt), model=model, template=QUERY_ENHANCEMENT_TEMPLATE,
+            context=normalize(query), dataset_version=current_catalog().version)
             
         # Try to parse JSON response
         try:
@@ -1125,22 +1697,24 @@ def generate_inspection_checklist(part_data):
         print(f"Checklist generation error: {e}")
         return ["Perform visual inspection", "Check part number", "Document condition"]
 
-def detect_potential_duplicates(query_part, all_parts, threshold=0.8):
+def detect_potential_duplicates(query_part, all_parts, threshold=0.8, fields=None):
     """
     Intelligent duplicate detection using multiple similarity metrics.
     This demonstrates AI-driven quality control and data management.
     """
+    catalog = current_catalog()
     try:
         potential_duplicates = []
         
-        if not semantic_engine:
+        if not catalog.search:
             return potential_duplicates
             
         # Get semantic similarity
-        semantic_results = semantic_engine.search(query_part, top_k=10, min_similarity=threshold)
+        hits = catalog.search.search_ids(query_part, top_k=10, min_similarity=threshold,
+                                         field_weights=ENDPOINT_FIELD_WEIGHTS['duplicate'])
         
-        for result in semantic_results:
-            similarity_score = result.get('similarity', 0)
+        for idx, similarity_score in hits:
+            result = catalog.parts[idx]
             
             # Additional similarity checks
             name_similarity = 0
@@ -1152,7 +1726,7 @@ def detect_potential_duplicates(query_part, all_parts, threshold=0.8):
             
             if combined_score >= threshold:
                 potential_duplicates.append({
-                    'part': result,
+                    'part': project(result, fields),
                     'similarity_score': combined_score,
                     'semantic_score': similarity_score,
                     'name_similarity': name_similarity,
@@ -1173,7 +1747,8 @@ def api_intelligent_search():
     Enhanced search with AI query understanding, reusability scoring, and intelligent recommendations.
     This demonstrates genuine AI beyond basic search.
     """
-    if not semantic_engine:
+    catalog = current_catalog()
+    if not catalog.search:
         return jsonify({'error': 'Semantic search engine not available'}), 500
         
     try:
@@ -1194,8 +1769,10 @@ def api_intelligent_search():
         else:
             search_query = query
             
+        fields = resolve_fields(data.get('fields'), 'intelligent_search')
+        
         # Step 2: Semantic Search
-        semantic_results = semantic_engine.direct_or_semantic_search(
+        hits = catalog.search.direct_or_semantic_search_ids(
             search_query, 
             top_k=10, 
             min_similarity=0.35
@@ -1203,7 +1780,8 @@ def api_intelligent_search():
         
         # Step 3: AI-Enhanced Results Processing
         intelligent_results = []
-        for result in semantic_results:
+        for idx, _ in hits:
+            result = catalog.parts[idx]
             # Calculate reusability score
             reusability_score, reusability_factors = calculate_reusability_score(result)
             
@@ -1211,14 +1789,16 @@ def api_intelligent_search():
             inspection_checklist = generate_inspection_checklist(result)
             
             # Detect potential duplicates
+            # Only the count is reported here, so no duplicate records are materialized
             duplicates = detect_potential_duplicates(
                 result.get('part_name', ''), 
-                all_parts, 
-                threshold=0.75
+                catalog.parts, 
+                threshold=0.75,
+                fields=()
             )
             
             enhanced_result = {
-                **result,
+                **project(result, fields),
                 'ai_insights': {
                     'reusability_score': round(reusability_score, 2),
                     'reusability_factors': reusability_factors,
@@ -1228,10 +1808,6 @@ def api_intelligent_search():
                 }
             }
             
-            # Remove sensitive internal data
-            enhanced_result.pop('similarity', None)
-            enhanced_result.pop('direct_match', None)
-            
             intelligent_results.append(enhanced_result)
         
         search_time = time.time() - start_time
@@ -1259,7 +1835,8 @@ def api_duplicate_analysis():
     """
     Intelligent duplicate detection and analysis using AI-powered similarity matching.
     """
-    if not semantic_engine:
+    catalog = current_catalog()
+    if not catalog.search:
         return jsonify({'error': 'Semantic search engine not available'}), 500
         
     try:
@@ -1273,7 +1850,8 @@ def api_duplicate_analysis():
         start_time = time.time()
         
         # Detect duplicates
-        duplicates = detect_potential_duplicates(part_description, all_parts, threshold)
+        duplicates = detect_potential_duplicates(part_description, catalog.parts, threshold,
+                                                 fields=resolve_fields(data.get('fields'), 'search'))
         
         analysis_time = time.time() - start_time
         
@@ -1390,8 +1968,11 @@ def api_design_optimization():
         }}
         """
         
-        # Get AI suggestions
-        ai_response = call_gemini(optimization_prompt)
+        # Get AI suggestions (identical or near-identical requirements reuse the cached answer)
+        ai_response, _ = response_cache.get_or_generate(
+            context, lambda: call_gemini(optimization_prompt), model=gemini_model_key(),
+            template=DESIGN_OPTIMIZATION_TEMPLATE, context=json.dumps(requirements, sort_keys=True),
+            dataset_version=current_catalog().version)
         
         try:
             optimization_data = json.loads(ai_response)
@@ -1459,9 +2040,7 @@ def generate_intelligent_response(query, results, search_time, tech_specs=None):
             response_parts.append(f"Hi! I found {len(results)} excellent matches for your search! ✨")
         
         if tech_specs:
-            spec_details = []
-            if 'friction_coefficient' in tech_specs:
-                spec_details.append(f"friction coefficient > {tech_specs['friction_coefficient']}")
+            spec_details = [predicate.describe() for predicate in tech_specs.get('ranges', ())]
             if 'material' in tech_specs:
                 spec_details.append(f"material: {tech_specs['material']}")
             
@@ -0,0 +1,70 @@
+"""
+IntelliPart Cross-Reference Index
+Bidirectional OEM / aftermarket / internal part id mapping with bulk lookup
+"""
+
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable
+
+from part_number_index import normalize_part_number
+
+# Identifier kinds, keyed by the part field they come from
+CROSS_REFERENCE_FIELDS = {
+    'part_id': 'part_id',
+    'part_number': 'part_id',
+    'Part Number': 'part_id',
+    'oem_part_number': 'oem',
+    'aftermarket_numbers': 'aftermarket',
+}
+
+
+class CrossReferenceIndex:
+    """Hash maps from every normalized identifier to the parts that carry it.
+
+    Because OEM numbers, aftermarket numbers and internal ids all point at the
+    same part position, resolving any one of them yields the others.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]]):
+        self.parts = parts
+        self.number_to_parts: Dict[str, List[tuple]] = defaultdict(list)
+        for idx, part in enumerate(parts):
+            self.add_part(idx, part)
+        print(f"🔗 Cross-reference index built with {len(self.number_to_parts)} identifiers")
+
+    def add_part(self, idx: int, part: Dict[str, Any]) -> None:
+        """Register every identifier of ``part`` under position ``idx``."""
+        for field, kind in CROSS_REFERENCE_FIELDS.items():
+            value = part.get(field)
+            if not value:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                key = normalize_part_number(v)
+                if key and (idx, kind) not in self.number_to_parts[key]:
+                    self.number_to_parts[key].append((idx, kind))
+
+    def _describe(self, idx: int, kind: str) -> Dict[str, Any]:
+        part = self.parts[idx]
+        return {
+            'part_id': part.get('part_id') or part.get('part_number') or part.get('Part Number'),
+            'name': part.get('name') or part.get('part_name') or part.get('Part Description'),
+            'manufacturer': part.get('manufacturer'),
+            'oem_part_number': part.get('oem_part_number'),
+            'aftermarket_numbers': list(part.get('aftermarket_numbers') or []),
+            'matched_as': kind,
+        }
+
+    def resolve(self, number: str) -> Dict[str, Any]:
+        """Resolve one OEM, aftermarket or internal number to its equivalents."""
+        entries = self.number_to_parts.get(normalize_part_number(number), [])
+        matches = [self._describe(idx, kind) for idx, kind in entries]
+        return {'query': number, 'found': bool(matches), 'matches': matches}
+
+    def bulk_resolve(self, numbers: Iterable[str]) -> List[Dict[str, Any]]:
+        """Resolve many numbers in one pass; order of the input is preserved."""
+        return [self.resolve(n) for n in numbers]
+
+    def part_indices(self, number: str) -> List[int]:
+        """Positions of the parts carrying ``number``."""
+        return [idx for idx, _ in self.number_to_parts.get(normalize_part_number(number), [])]
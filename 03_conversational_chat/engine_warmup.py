@@ -0,0 +1,78 @@
+"""
+IntelliPart Engine Warm-up
+Builds slow search engines on background threads while a fast engine keeps serving
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+COLD, WARMING, WARM, FAILED = 'cold', 'warming', 'warm', 'failed'
+
+
+class EngineWarmup:
+    """Tracks the warm-up state of named engines and builds them off the request path.
+
+    ``start`` runs a builder on a daemon thread and hands the finished engine
+    to ``on_ready``, which is expected to swap it in with a single reference
+    assignment. Requests already running keep the engine they looked up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, threading.Event] = {}
+
+    def _set(self, name: str, **fields) -> None:
+        with self._lock:
+            entry = self._status.setdefault(name, {'status': COLD})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat()
+
+    def _event(self, name: str) -> threading.Event:
+        with self._lock:
+            return self._events.setdefault(name, threading.Event())
+
+    def mark_warm(self, name: str, engine: Any) -> None:
+        """Record an engine that was built synchronously."""
+        self._set(name, status=WARM, engine=type(engine).__name__, error=None)
+        self._event(name).set()
+
+    def start(self, name: str, builder: Callable[[], Any],
+              on_ready: Callable[[Any], None]) -> threading.Thread:
+        """Build ``name`` in the background and pass the result to ``on_ready``."""
+        done = self._event(name)
+        done.clear()
+        self._set(name, status=WARMING, error=None)
+
+        def _run():
+            started = time.time()
+            try:
+                engine = builder()
+                on_ready(engine)
+                self._set(name, status=WARM, engine=type(engine).__name__,
+                          build_seconds=round(time.time() - started, 2))
+                print(f"✅ {name} engine warm after {time.time() - started:.1f}s")
+            except Exception as e:
+                self._set(name, status=FAILED, error=str(e),
+                          build_seconds=round(time.time() - started, 2))
+                print(f"❌ {name} engine failed to warm up: {e}")
+            finally:
+                done.set()
+
+        thread = threading.Thread(target=_run, name=f"warmup-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def is_warm(self, name: str) -> bool:
+        with self._lock:
+            return self._status.get(name, {}).get('status') == WARM
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until ``name`` finished warming (successfully or not)."""
+        return self._event(name).wait(timeout)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._status.items()}
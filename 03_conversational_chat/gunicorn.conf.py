@@ -0,0 +1,56 @@
+# Gunicorn configuration for the conversational web app
+#   gunicorn -c gunicorn.conf.py conversational_web_app:app
+#
+# The app is imported once in the master (preload) and workers are forked
+# from it. Point INTELLIPART_SHARED_CATALOG / INTELLIPART_EMBEDDINGS_DIR at
+# exported artifacts so the catalog and embeddings are memory-mapped and
+# shared between workers; see docs/SHARED_MEMORY_WORKERS.md.
+#
+# Reload the catalog on every worker with `kill -HUP <master pid>` or
+# POST /api/admin/reload; both go through the reload marker file.
+
+import gc
+import os
+
+bind = "0.0.0.0:5000"
+workers = int(os.environ.get('INTELLIPART_WORKERS', 4))
+# Threaded workers: a streamed LLM answer holds its thread, not the whole
+# worker, and the worker keeps heartbeating while it streams
+worker_class = "gthread"
+threads = int(os.environ.get('INTELLIPART_THREADS', 4))
+# Kept above the LLM call deadline (INTELLIPART_LLM_DEADLINE, 60 s) so a
+# worker is never killed while an answer is still within its budget
+timeout = int(float(os.environ.get('INTELLIPART_LLM_DEADLINE', 60))) + 30
+keepalive = 2
+max_requests = 1000
+max_requests_jitter = 50
+preload_app = True
+
+# Threads do not survive fork: build the semantic engine in the master
+# before the workers are created instead of warming it in the background
+os.environ.setdefault('INTELLIPART_SYNC_WARMUP', '1')
+
+
+def when_ready(server):
+    # Move everything allocated during preload out of the collector's reach so
+    # gc passes in the workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Local shard processes (INTELLIPART_SHARDS=local:N) started in the master
+    # cannot be shared between workers; each worker starts its own before it
+    # takes requests (otherwise it would on its first search)
+    from conversational_web_app import catalog_handle
+    start_after_fork = getattr(catalog_handle.current.search, 'start_after_fork', None)
+    if callable(start_after_fork):
+        start_after_fork()
+
+
+def on_reload(server):
+    # gunicorn takes over SIGHUP and, with preload_app, forks the new workers
+    # from the master's stale catalog. Bumping the reload marker makes every
+    # worker (old and new) rebuild from the current datasets / exports
+    from conversational_web_app import request_reload_everywhere
+    request_reload_everywhere()
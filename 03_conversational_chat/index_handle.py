@@ -0,0 +1,144 @@
+"""
+IntelliPart Index Handles
+Double-buffered, reference-counted handles so indexes can be replaced while requests are running
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class IndexGeneration:
+    """One published version of an index plus the number of requests using it."""
+
+    def __init__(self, value: Any, number: int):
+        self.value = value
+        self.number = number
+        self.refs = 0
+        self.retired = False
+        self.published_at = datetime.now().isoformat()
+
+    def release(self) -> None:
+        """Drop the index so its memory can be reclaimed; close it if it knows how."""
+        close = getattr(self.value, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"⚠️ Error closing index generation {self.number}: {e}")
+        self.value = None
+
+
+class IndexHandle:
+    """Holds the live generation of an index and at most one being built behind it.
+
+    Readers ``acquire`` the live generation for the duration of a request.
+    ``swap`` publishes a new generation atomically; the previous one is
+    retired and released as soon as its last reader lets go, so in-flight
+    requests always finish on the index they started with. ``swap_if``
+    derives the new value from the live one under the same lock, so a
+    builder that started from an older generation cannot overwrite a newer
+    one, and ``begin_pending`` claims the single rebuild slot atomically.
+    """
+
+    def __init__(self, name: str, value: Any = None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._current = IndexGeneration(value, self._counter)
+        self._retired: Dict[int, IndexGeneration] = {}
+        self.pending: Optional[str] = None
+
+    @property
+    def current(self) -> Any:
+        """The live value, without taking a reference (startup code and status pages)."""
+        return self._current.value
+
+    @property
+    def generation(self) -> int:
+        return self._current.number
+
+    def acquire_generation(self) -> IndexGeneration:
+        with self._lock:
+            generation = self._current
+            generation.refs += 1
+            return generation
+
+    def release_generation(self, generation: IndexGeneration) -> None:
+        with self._lock:
+            generation.refs -= 1
+            done = generation.retired and generation.refs <= 0
+            if done:
+                self._retired.pop(generation.number, None)
+        if done:
+            generation.release()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        generation = self.acquire_generation()
+        try:
+            yield generation.value
+        finally:
+            self.release_generation(generation)
+
+    def begin_pending(self, label: str) -> bool:
+        """Claim the rebuild slot; False if a rebuild is already pending."""
+        with self._lock:
+            if self.pending:
+                return False
+            self.pending = label
+            return True
+
+    def end_pending(self) -> None:
+        with self._lock:
+            self.pending = None
+
+    def _publish(self, value: Any) -> Optional[IndexGeneration]:
+        """Make ``value`` live and retire the previous generation (caller holds the lock).
+
+        Returns the previous generation if no request holds it, for the caller to release after unlocking.
+        """
+        self._counter += 1
+        old, self._current = self._current, IndexGeneration(value, self._counter)
+        old.retired = True
+        if old.refs > 0:
+            self._retired[old.number] = old
+            return None
+        return old
+
+    def swap(self, value: Any, end_pending: bool = False) -> int:
+        """Publish ``value`` as the live generation and retire the previous one."""
+        with self._lock:
+            idle = self._publish(value)
+            number = self._counter
+            if end_pending:
+                self.pending = None
+        if idle is not None:
+            idle.release()
+        return number
+
+    def swap_if(self, replace: Callable[[Any], Optional[Any]]) -> Optional[int]:
+        """Compare-and-swap: publish ``replace(live value)``, or nothing if it returns None.
+
+        ``replace`` runs under the handle's lock, so keep it cheap (no index builds).
+        """
+        with self._lock:
+            value = replace(self._current.value)
+            if value is None:
+                return None
+            idle = self._publish(value)
+            number = self._counter
+        if idle is not None:
+            idle.release()
+        return number
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'generation': self._current.number,
+                'published_at': self._current.published_at,
+                'active_requests': self._current.refs,
+                'draining_generations': {n: g.refs for n, g in self._retired.items()},
+                'pending': self.pending,
+            }
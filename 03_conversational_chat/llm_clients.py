@@ -0,0 +1,529 @@
+"""
+IntelliPart LLM Clients
+Long-lived clients for Gemini (API key or Vertex AI), Ollama and OpenAI with pooled keep-alive
+connections, per-provider concurrency limits, per-call and total deadlines, and jittered retries
+
+Each provider is built once and reused: HTTP providers keep one
+``requests.Session`` whose connection pool holds as many keep-alive
+connections as the provider may have calls in flight, and the Vertex AI
+provider authenticates and builds its ``genai.Client`` on first use only.
+
+A call waits for a slot on the provider's semaphore, then tries up to
+``1 + retries`` times. Every attempt's timeout is the provider's read
+timeout (60 s for a local Ollama, 15 s for the Gemini API) cut to what is
+left of the total deadline, and waiting for a slot counts against the
+deadline too. Connection failures, connect timeouts, 408/429 and 5xx
+responses are retried after a full-jitter exponential backoff; other
+errors fail at once. A read timeout is not retried: the model already has
+the prompt and is still working on it, so another attempt only doubles the
+load on a backend that is already too slow.
+
+``stream`` relays the answer piece by piece as the provider produces it
+(Ollama's NDJSON stream, Gemini's ``streamGenerateContent`` server-sent
+events, the Vertex client's chunk iterator). Queueing and retries work as
+for ``generate`` until the first piece arrives; a failure after that is
+raised to the consumer, since half an answer has already been relayed.
+Closing the stream closes the upstream connection and frees the slot, so
+a caller that goes away stops the generation it started.
+
+Endpoints come from ``INTELLIPART_OLLAMA_URL`` and ``INTELLIPART_GEMINI_URL``,
+so the providers can be pointed at ``stub_llm_server.py`` for testing.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+DEFAULT_OLLAMA_URL = os.environ.get('INTELLIPART_OLLAMA_URL', 'http://localhost:11434')
+DEFAULT_GEMINI_URL = os.environ.get('INTELLIPART_GEMINI_URL', 'https://generativelanguage.googleapis.com/v1beta')
+# Calls in flight per provider; also the size of its keep-alive connection pool
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('INTELLIPART_LLM_MAX_CONCURRENCY', '4'))
+# Seconds to wait for one attempt's answer, per provider; INTELLIPART_<PROVIDER>_TIMEOUT
+# (e.g. INTELLIPART_OLLAMA_TIMEOUT) overrides one provider, INTELLIPART_LLM_TIMEOUT all of them
+PROVIDER_READ_TIMEOUTS = {'ollama': 60.0, 'gemini': 15.0, 'gemini_vertex': 30.0, 'openai': 30.0}
+DEFAULT_CALL_TIMEOUT = 30.0
+# Seconds to open a connection; only this kind of timeout is retried
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get('INTELLIPART_LLM_CONNECT_TIMEOUT', '5'))
+# Seconds for the whole call including queueing and retries
+DEFAULT_DEADLINE = float(os.environ.get('INTELLIPART_LLM_DEADLINE', '60'))
+DEFAULT_RETRIES = int(os.environ.get('INTELLIPART_LLM_RETRIES', '2'))
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def provider_timeout(name: str) -> float:
+    """Read timeout for one attempt against provider ``name``."""
+    value = os.environ.get(f'INTELLIPART_{name.upper()}_TIMEOUT') or os.environ.get('INTELLIPART_LLM_TIMEOUT')
+    return float(value) if value else PROVIDER_READ_TIMEOUTS.get(name, DEFAULT_CALL_TIMEOUT)
+
+
+def is_retryable_transport_error(error: requests.RequestException) -> bool:
+    """True for failures to reach the provider (refused, reset, connect timeout), False for a read timeout."""
+    if isinstance(error, requests.ReadTimeout):
+        return False
+    if isinstance(error, requests.ConnectionError):
+        # requests reports a read timeout while reading the body as a ConnectionError
+        return not any(isinstance(arg, ReadTimeoutError) for arg in error.args)
+    return False
+
+
+class LLMError(RuntimeError):
+    """An LLM call failed; ``retryable`` marks failures worth another attempt."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class LLMTimeout(LLMError):
+    """The call's deadline passed (while queued for a slot or while waiting for the answer)."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+class Deadline:
+    """Wall-clock budget for one call, shared by queueing and every attempt."""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class RetryPolicy:
+    """Up to ``retries`` extra attempts, sleeping a full-jitter exponential backoff between them."""
+
+    def __init__(self, retries: int = DEFAULT_RETRIES, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.retries = max(0, retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter: concurrent callers that failed together do not retry together
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LLMProvider:
+    """Concurrency limit, deadlines and retries around one provider's ``_complete``."""
+
+    name = 'llm'
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, call_timeout: Optional[float] = None,
+                 deadline: float = DEFAULT_DEADLINE, retry: Optional[RetryPolicy] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.call_timeout = provider_timeout(self.name) if call_timeout is None else call_timeout
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'timeouts': 0, 'cancelled': 0,
+                      'in_flight': 0, 'seconds': 0.0}
+
+    def _complete(self, prompt: str, timeout: float, **options: Any) -> str:
+        raise NotImplementedError
+
+    def _stream(self, prompt: str, timeout: float, **options: Any) -> Iterator[str]:
+        # Providers without a streaming API answer in one piece
+        yield self._complete(prompt, timeout, **options)
+
+    def _count(self, **changes: float) -> None:
+        with self._stats_lock:
+            for key, value in changes.items():
+                self.stats[key] += value
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 **options: Any) -> str:
+        """Answer text for ``prompt``; raises LLMError (LLMTimeout once the deadline passes)."""
+        budget = Deadline(self.deadline if deadline is None else deadline)
+        per_call = self.call_timeout if timeout is None else timeout
+        started = self._acquire(budget)
+        try:
+            attempt = 0
+            while True:
+                remaining = self._remaining(budget, attempt)
+                try:
+                    text = self._complete(prompt, min(per_call, remaining), **options)
+                    self._count(succeeded=1)
+                    return text
+                except LLMError as e:
+                    self._before_retry(e, attempt, budget)
+                attempt += 1
+        finally:
+            self._release(started)
+
+    def stream(self, prompt: str, timeout: Optional[float] = None, deadline: Optional[float] = None,
+               **options: Any) -> Iterator[str]:
+        """Pieces of the answer as they arrive; ``timeout`` bounds the wait for each piece.
+
+        Failures before the first piece are retried as in ``generate``. Closing the
+        generator closes the upstream call and releases the slot.
+        """
+        budget = Deadline(self.deadline if deadline is None else deadline)
+        per_call = self.call_timeout if timeout is None else timeout
+        started = self._acquire(budget)
+        pieces = None
+        try:
+            attempt = 0
+            while True:
+                remaining = self._remaining(budget, attempt)
+                pieces = self._stream(prompt, min(per_call, remaining), **options)
+                try:
+                    first = next(pieces, None)
+                    break
+                except LLMError as e:
+                    pieces.close()
+                    self._before_retry(e, attempt, budget)
+                attempt += 1
+            if first is not None:
+                yield first
+                while True:
+                    try:
+                        piece = next(pieces, None)
+                    except LLMError:
+                        self._count(failed=1)
+                        raise
+                    if piece is None:
+                        break
+                    if budget.expired:
+                        self._count(timeouts=1, failed=1)
+                        raise LLMTimeout(f"{self.name}: deadline passed while streaming")
+                    yield piece
+            self._count(succeeded=1)
+        except GeneratorExit:
+            self._count(cancelled=1)
+            raise
+        finally:
+            if pieces is not None:
+                pieces.close()
+            self._release(started)
+
+    # --- slots, deadlines and retries shared by generate and stream ---
+
+    def _acquire(self, budget: Deadline) -> float:
+        self._count(calls=1)
+        if not self._slots.acquire(timeout=budget.remaining()):
+            self._count(timeouts=1, failed=1)
+            raise LLMTimeout(f"{self.name}: no free slot within the deadline ({self.max_concurrency} in flight)")
+        self._count(in_flight=1)
+        return time.monotonic()
+
+    def _release(self, started: float) -> None:
+        self._slots.release()
+        self._count(in_flight=-1, seconds=time.monotonic() - started)
+
+    def _remaining(self, budget: Deadline, attempt: int) -> float:
+        remaining = budget.remaining()
+        if remaining <= 0:
+            self._count(timeouts=1, failed=1)
+            raise LLMTimeout(f"{self.name}: deadline passed after {attempt} attempt(s)")
+        return remaining
+
+    def _before_retry(self, error: LLMError, attempt: int, budget: Deadline) -> None:
+        """Sleep the backoff before another attempt, or raise if ``error`` is final."""
+        if not error.retryable or attempt >= self.retry.retries:
+            self._count(failed=1)
+            raise error
+        pause = self.retry.delay(attempt)
+        if pause >= budget.remaining():
+            self._count(timeouts=1, failed=1)
+            raise LLMTimeout(f"{self.name}: deadline passed before retry ({error})")
+        time.sleep(pause)
+        self._count(retries=1)
+
+    def close(self) -> None:
+        pass
+
+    def status(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['seconds'] = round(stats['seconds'], 2)
+        return {'provider': self.name, 'max_concurrency': self.max_concurrency,
+                'call_timeout': self.call_timeout, 'deadline': self.deadline, 'retries': self.retry.retries,
+                **stats}
+
+
+class HTTPProvider(LLMProvider):
+    """Provider speaking JSON over HTTP through one keep-alive session."""
+
+    def __init__(self, base_url: str, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _post(self, path: str, payload: Dict[str, Any], timeout: float,
+              headers: Optional[Dict[str, str]] = None, stream: bool = False) -> requests.Response:
+        try:
+            response = self.session.post(f'{self.base_url}{path}', json=payload, headers=headers,
+                                         timeout=(min(self.connect_timeout, timeout), timeout), stream=stream)
+        except requests.RequestException as e:
+            raise LLMError(f'{self.name}: {e}', retryable=is_retryable_transport_error(e))
+        if response.status_code >= 400:
+            retryable = response.status_code in RETRYABLE_STATUS
+            detail = response.text[:200]
+            response.close()
+            raise LLMError(f'{self.name}: HTTP {response.status_code}: {detail}', retryable=retryable)
+        return response
+
+    def _lines(self, response: requests.Response) -> Iterator[bytes]:
+        """Non-empty lines of a streamed body; closing the iterator drops the connection mid-answer."""
+        try:
+            for line in response.iter_lines():
+                if line:
+                    yield line
+        except requests.RequestException as e:
+            raise LLMError(f'{self.name}: stream interrupted: {e}', retryable=is_retryable_transport_error(e))
+        finally:
+            response.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {**super().status(), 'connect_timeout': self.connect_timeout}
+
+
+class OllamaProvider(HTTPProvider):
+    name = 'ollama'
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, default_model: str = 'llama3', **kwargs: Any):
+        super().__init__(base_url, **kwargs)
+        self.default_model = default_model
+
+    def _payload(self, prompt: str, model: Optional[str], stream: bool, options: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {'model': model or self.default_model, 'prompt': prompt, 'stream': stream}
+        if options:
+            payload['options'] = options
+        return payload
+
+    def _complete(self, prompt: str, timeout: float, model: Optional[str] = None, **options: Any) -> str:
+        try:
+            return self._post('/api/generate', self._payload(prompt, model, False, options),
+                              timeout).json()['response'].strip()
+        except (ValueError, KeyError) as e:
+            raise LLMError(f'ollama: malformed response: {e}')
+
+    def _stream(self, prompt: str, timeout: float, model: Optional[str] = None, **options: Any) -> Iterator[str]:
+        # One JSON object per line: {"response": "<token>", "done": false} ... {"done": true}
+        response = self._post('/api/generate', self._payload(prompt, model, True, options), timeout, stream=True)
+        lines = self._lines(response)
+        try:
+            for line in lines:
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    raise LLMError(f'ollama: malformed stream line: {e}')
+                if chunk.get('error'):
+                    raise LLMError(f"ollama: {chunk['error']}")
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    return
+        finally:
+            lines.close()
+
+
+class GeminiAPIProvider(HTTPProvider):
+    """Gemini ``generateContent`` with an API key (sent as a header, not in the URL)."""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str, base_url: str = DEFAULT_GEMINI_URL,
+                 default_model: str = 'models/gemini-1.5-pro-latest', **kwargs: Any):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self.default_model = default_model
+
+    @staticmethod
+    def _payload(prompt: str, temperature: float, max_output_tokens: int) -> Dict[str, Any]:
+        return {
+            'contents': [{'parts': [{'text': prompt}]}],
+            'generationConfig': {'temperature': temperature, 'maxOutputTokens': max_output_tokens},
+        }
+
+    def _complete(self, prompt: str, timeout: float, model: Optional[str] = None, temperature: float = 0.7,
+                  max_output_tokens: int = 512) -> str:
+        response = self._post(f'/{model or self.default_model}:generateContent',
+                              self._payload(prompt, temperature, max_output_tokens), timeout,
+                              headers={'x-goog-api-key': self.api_key})
+        try:
+            return response.json()['candidates'][0]['content']['parts'][0]['text']
+        except (ValueError, KeyError, IndexError) as e:
+            raise LLMError(f'gemini: malformed response: {e}')
+
+    def _stream(self, prompt: str, timeout: float, model: Optional[str] = None, temperature: float = 0.7,
+                max_output_tokens: int = 512) -> Iterator[str]:
+        # Server-sent events, one "data: <GenerateContentResponse>" per chunk
+        response = self._post(f'/{model or self.default_model}:streamGenerateContent?alt=sse',
+                              self._payload(prompt, temperature, max_output_tokens), timeout,
+                              headers={'x-goog-api-key': self.api_key}, stream=True)
+        lines = self._lines(response)
+        try:
+            for line in lines:
+                if not line.startswith(b'data:'):
+                    continue
+                try:
+                    parts = json.loads(line[5:])['candidates'][0]['content'].get('parts', [])
+                except (ValueError, KeyError, IndexError) as e:
+                    raise LLMError(f'gemini: malformed stream event: {e}')
+                text = ''.join(part.get('text', '') for part in parts)
+                if text:
+                    yield text
+        finally:
+            lines.close()
+
+
+class GeminiVertexProvider(LLMProvider):
+    """Gemini on Vertex AI through one ``genai.Client``, built (and authenticated) on first use."""
+
+    name = 'gemini_vertex'
+
+    def __init__(self, client_factory: Callable[..., Any], default_model: str = 'gemini-1.0-pro', **kwargs: Any):
+        super().__init__(**kwargs)
+        self.client_factory = client_factory
+        self.default_model = default_model
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        self._client = self.client_factory()
+                    except Exception as e:
+                        raise LLMError(f'gemini_vertex: client unavailable: {e}')
+        return self._client
+
+    def _complete(self, prompt: str, timeout: float, model: Optional[str] = None, temperature: float = 0.7,
+                  max_output_tokens: int = 512) -> str:
+        return ''.join(self._stream(prompt, timeout, model, temperature, max_output_tokens)).strip()
+
+    def _stream(self, prompt: str, timeout: float, model: Optional[str] = None, temperature: float = 0.7,
+                max_output_tokens: int = 512) -> Iterator[str]:
+        from google.genai import types
+        config = types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            http_options=types.HttpOptions(timeout=int(timeout * 1000)),
+        )
+        content = types.Content(role='user', parts=[types.Part.from_text(text=prompt)])
+        try:
+            chunks = self.client.models.generate_content_stream(model=model or self.default_model,
+                                                                contents=[content], config=config)
+            for chunk in chunks:
+                if chunk.text:
+                    yield chunk.text
+        except LLMError:
+            raise
+        except Exception as e:
+            # API errors carry an HTTP ``code``; errors without one are transport failures, retried
+            # unless the model was reached and did not answer in time (httpx ReadTimeout)
+            code = getattr(e, 'code', None)
+            if code is not None:
+                retryable = code in RETRYABLE_STATUS
+            else:
+                retryable = not isinstance(e, (ValueError, TypeError)) and type(e).__name__ != 'ReadTimeout'
+            raise LLMError(f'gemini_vertex: {e}', retryable=retryable)
+
+
+class OpenAIProvider(LLMProvider):
+    """Chat completions through the ``openai`` package (pre-1.0 module API, as the app uses)."""
+
+    name = 'openai'
+
+    def __init__(self, default_model: str = 'gpt-3.5-turbo', **kwargs: Any):
+        super().__init__(**kwargs)
+        self.default_model = default_model
+
+    def _complete(self, prompt: str, timeout: float, model: Optional[str] = None, api_key: Optional[str] = None,
+                  **options: Any) -> str:
+        if openai is None:
+            raise LLMError('openai: package not installed')
+        try:
+            response = openai.ChatCompletion.create(
+                model=model or self.default_model,
+                messages=[{'role': 'user', 'content': prompt}],
+                api_key=api_key,
+                request_timeout=timeout,
+                **options
+            )
+            return response['choices'][0]['message']['content']
+        except Exception as e:
+            # Rate limits, connection failures and overload are transient; a Timeout means the
+            # request reached the model and no answer came in time, so it is not retried
+            transient = type(e).__name__ in ('RateLimitError', 'APIConnectionError', 'ServiceUnavailableError',
+                                             'TryAgain')
+            raise LLMError(f'openai: {e}', retryable=transient)
+
+
+class LLMClients:
+    """One long-lived provider of each kind, created on first use and shared by every request thread."""
+
+    def __init__(self, vertex_client_factory: Optional[Callable[..., Any]] = None, **provider_options: Any):
+        self.vertex_client_factory = vertex_client_factory
+        self.provider_options = provider_options
+        self._providers: Dict[str, LLMProvider] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, build: Callable[[], LLMProvider]) -> LLMProvider:
+        provider = self._providers.get(key)
+        if provider is None:
+            with self._lock:
+                provider = self._providers.get(key)
+                if provider is None:
+                    provider = self._providers[key] = build()
+        return provider
+
+    @property
+    def ollama(self) -> OllamaProvider:
+        return self._get('ollama', lambda: OllamaProvider(**self.provider_options))
+
+    def gemini_api(self, api_key: str) -> GeminiAPIProvider:
+        # One session per key; in practice there is one key per deployment
+        return self._get(f'gemini:{api_key}', lambda: GeminiAPIProvider(api_key, **self.provider_options))
+
+    @property
+    def gemini_vertex(self) -> GeminiVertexProvider:
+        if self.vertex_client_factory is None:
+            raise LLMError('gemini_vertex: no client factory configured')
+        return self._get('gemini_vertex',
+                         lambda: GeminiVertexProvider(self.vertex_client_factory, **self.provider_options))
+
+    @property
+    def openai(self) -> OpenAIProvider:
+        return self._get('openai', lambda: OpenAIProvider(**self.provider_options))
+
+    def close(self) -> None:
+        with self._lock:
+            for provider in self._providers.values():
+                provider.close()
+            self._providers.clear()
+
+    def status(self) -> Dict[str, Any]:
+        # Keyed providers are reported by kind so API keys never reach a status page
+        return {key.split(':', 1)[0]: provider.status() for key, provider in list(self._providers.items())}
@@ -0,0 +1,152 @@
+"""
+IntelliPart Multi-Field Embeddings
+Per-field embedding matrices (name, hierarchy, specs) scored with one fused weighted product
+
+Run as a script to benchmark encode time and query latency against the
+single-string embedding used by SemanticSearchEngineHF.
+"""
+
+import argparse
+import time
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from text_encoders import TextEncoder, create_encoder, part_to_embedding_text
+
+
+def _join(values) -> str:
+    return ' '.join(str(v) for v in values if v)
+
+
+def _name_text(part: Dict[str, Any]) -> str:
+    return _join([part.get('name'), part.get('part_name'), part.get('Part Description'),
+                  part.get('description'), part.get('manufacturer')])
+
+
+def _hierarchy_text(part: Dict[str, Any]) -> str:
+    return _join([part.get('category'), part.get('subcategory'), part.get('system'), part.get('sub_system'),
+                  part.get('System Name'), part.get('Sub System Name'), part.get('Sub Sub System Name')])
+
+
+def _specs_text(part: Dict[str, Any]) -> str:
+    values = [part.get('material'), part.get('feature')]
+    specs = part.get('technical_specs')
+    if isinstance(specs, dict):
+        values.extend(f"{k.replace('_', ' ')} {v}" for k, v in specs.items() if v is not None)
+    return _join(values)
+
+
+FIELD_EXTRACTORS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'name': _name_text,
+    'hierarchy': _hierarchy_text,
+    'specs': _specs_text,
+}
+
+DEFAULT_FIELD_WEIGHTS = {'name': 0.5, 'hierarchy': 0.3, 'specs': 0.2}
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> List[tuple]:
+    """``(index, score)`` of the k highest scores, best first; safe when k >= len(scores)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    top = top[np.argsort(-scores[top])]
+    return [(int(i), float(scores[i])) for i in top]
+
+
+class MultiFieldEmbeddingIndex:
+    """One short embedding per field instead of one long serialized string.
+
+    The field matrices are stored side by side in a single ``(n, fields * dim)``
+    array. Weights are applied to the query instead of the catalog: the query
+    vector is tiled once per field and scaled by that field's weight, so every
+    weighting is one matrix-vector product over the same stored matrix.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]], encoder: TextEncoder,
+                 fields: Optional[List[str]] = None, batch_size: int = 64):
+        self.encoder = encoder
+        self.fields = fields or list(FIELD_EXTRACTORS)
+        self.dimension = encoder.dimension
+        started = time.time()
+        blocks = []
+        for field in self.fields:
+            texts = [FIELD_EXTRACTORS[field](p) for p in parts]
+            blocks.append(encoder.encode(texts, batch_size=batch_size))
+        self.matrix = np.ascontiguousarray(np.hstack(blocks), dtype=np.float32)
+        self.build_seconds = time.time() - started
+
+    def field_matrix(self, field: str) -> np.ndarray:
+        """View of one field's embeddings."""
+        i = self.fields.index(field)
+        return self.matrix[:, i * self.dimension:(i + 1) * self.dimension]
+
+    def _field_scales(self, weights: Optional[Dict[str, float]]) -> List[float]:
+        weights = weights or DEFAULT_FIELD_WEIGHTS
+        total = sum(weights.get(f, 0.0) for f in self.fields) or 1.0
+        return [weights.get(f, 0.0) / total for f in self.fields]
+
+    def _query_vector(self, query_vec: np.ndarray, weights: Optional[Dict[str, float]]) -> np.ndarray:
+        query_vec = np.asarray(query_vec, dtype=np.float32).ravel()
+        return np.concatenate([query_vec * scale for scale in self._field_scales(weights)])
+
+    def scores(self, query_vec: np.ndarray, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted cosine of the query against every part, in one product."""
+        return self.matrix @ self._query_vector(query_vec, weights)
+
+    def part_scores(self, idx: int, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted field-by-field cosine of part ``idx`` against every part."""
+        scales = np.repeat(np.asarray(self._field_scales(weights), dtype=np.float32), self.dimension)
+        return self.matrix @ (self.matrix[idx] * scales)
+
+    def top_k(self, query_vec: np.ndarray, k: int = 10, weights: Optional[Dict[str, float]] = None) -> List[tuple]:
+        return top_k_indices(self.scores(query_vec, weights), k)
+
+
+def benchmark(parts: List[Dict[str, Any]], encoder: TextEncoder, queries: List[str], k: int = 10) -> Dict[str, Any]:
+    """Compare encode time and query latency of single-string vs multi-field embeddings."""
+    started = time.time()
+    single = encoder.encode([part_to_embedding_text(p) for p in parts])
+    single_build = time.time() - started
+
+    multi = MultiFieldEmbeddingIndex(parts, encoder)
+
+    def _latency(fn) -> float:
+        started = time.perf_counter()
+        for q in queries:
+            fn(encoder.encode([q])[0])
+        return (time.perf_counter() - started) * 1000 / max(len(queries), 1)
+
+    single_ms = _latency(lambda v: top_k_indices(single @ v, k))
+    multi_ms = _latency(lambda v: multi.top_k(v, k))
+    return {
+        'parts': len(parts),
+        'encoder': encoder.name,
+        'single_string': {'encode_seconds': round(single_build, 3), 'query_ms': round(single_ms, 3),
+                          'avg_text_chars': round(np.mean([len(part_to_embedding_text(p)) for p in parts]), 1)},
+        'multi_field': {'encode_seconds': round(multi.build_seconds, 3), 'query_ms': round(multi_ms, 3),
+                        'avg_text_chars': round(np.mean([sum(len(FIELD_EXTRACTORS[f](p)) for f in multi.fields)
+                                                         for p in parts]), 1)},
+    }
+
+
+def main():
+    from build_embeddings import load_parts, DEFAULT_DATASET
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark multi-field vs single-string embeddings")
+    parser.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)])
+    parser.add_argument('--backend', default='hashing')
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--limit', type=int, default=5000, help="Parts to encode")
+    args = parser.parse_args()
+
+    parts = load_parts(args.dataset)[:args.limit]
+    queries = ["ceramic brake pads", "radiator for thar", "clutch disc", "fuel lines rubber", "12V battery"]
+    print(json.dumps(benchmark(parts, create_encoder(args.backend, args.model), queries), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+IntelliPart Part Number Index
+Trigram index for partial and oddly formatted part-number / OEM-number lookup
+"""
+
+import re
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Tuple
+
+# Fields that carry identifiers across the generated and shrunk datasets
+PART_NUMBER_FIELDS = ('part_id', 'part_number', 'Part Number', 'oem_part_number', 'aftermarket_numbers')
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+def normalize_part_number(value: Any) -> str:
+    """Uppercase and strip punctuation/whitespace so 'mp-2025-a442' == 'MP2025A442'."""
+    if value is None:
+        return ''
+    return _NON_ALNUM.sub('', str(value).upper())
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PartNumberTrigramIndex:
+    """Trigram posting lists over every identifier a part carries.
+
+    Identifiers are normalized before indexing, so lookups are punctuation and
+    case insensitive. A lookup intersects the posting lists of the query's
+    trigrams (smallest first) and verifies the surviving keys by substring.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]], fields: Tuple[str, ...] = PART_NUMBER_FIELDS):
+        self.fields = fields
+        self.keys: List[str] = []
+        self.key_to_parts: List[List[int]] = []
+        self._key_ids: Dict[str, int] = {}
+        self.postings: Dict[str, set] = defaultdict(set)
+        for idx, part in enumerate(parts):
+            self.add_part(idx, part)
+
+    def _identifiers(self, part: Dict[str, Any]) -> List[str]:
+        identifiers = []
+        for field in self.fields:
+            value = part.get(field)
+            if not value:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                normalized = normalize_part_number(v)
+                if normalized:
+                    identifiers.append(normalized)
+        return identifiers
+
+    def add_part(self, idx: int, part: Dict[str, Any]) -> None:
+        """Index all identifiers of a single part under position ``idx``."""
+        # Positions are unique per call, so only a part repeating an identifier
+        # (part_id == part_number) could add ``idx`` twice
+        for key in dict.fromkeys(self._identifiers(part)):
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = len(self.keys)
+                self._key_ids[key] = key_id
+                self.keys.append(key)
+                self.key_to_parts.append([])
+                for gram in _trigrams(key):
+                    self.postings[gram].add(key_id)
+            self.key_to_parts[key_id].append(idx)
+
+    def _candidate_keys(self, normalized: str) -> Iterable[int]:
+        if len(normalized) < 3:
+            # Too short for a trigram; fall back to a scan of the key table
+            return (i for i, key in enumerate(self.keys) if normalized in key)
+        posting_lists = []
+        for gram in _trigrams(normalized):
+            posting = self.postings.get(gram)
+            if not posting:
+                return ()
+            posting_lists.append(posting)
+        posting_lists.sort(key=len)
+        candidates = set(posting_lists[0])
+        for posting in posting_lists[1:]:
+            candidates &= posting
+            if not candidates:
+                return ()
+        return (key_id for key_id in candidates if normalized in self.keys[key_id])
+
+    def lookup(self, query: str, limit: int = 50) -> List[Tuple[int, float]]:
+        """Return ``(part_index, score)`` pairs for a partial identifier.
+
+        Exact identifier matches score 1.0, prefix matches 0.9 and any other
+        substring match 0.8.
+        """
+        normalized = normalize_part_number(query)
+        if not normalized:
+            return []
+        best: Dict[int, float] = {}
+        for key_id in self._candidate_keys(normalized):
+            key = self.keys[key_id]
+            score = 1.0 if key == normalized else 0.9 if key.startswith(normalized) else 0.8
+            for idx in self.key_to_parts[key_id]:
+                if score > best.get(idx, 0.0):
+                    best[idx] = score
+        ranked = sorted(best.items(), key=lambda x: (-x[1], x[0]))
+        return ranked[:limit]
+
+    def contains(self, query: str) -> bool:
+        """True if any indexed identifier contains ``query``."""
+        normalized = normalize_part_number(query)
+        return bool(normalized) and next(iter(self._candidate_keys(normalized)), None) is not None
@@ -0,0 +1,145 @@
+"""
+IntelliPart Query Matcher
+Aho-Corasick automaton for single-pass entity, intent and filter keyword extraction
+"""
+
+from collections import deque, defaultdict
+from typing import List, Dict, Any, Iterable, Tuple
+
+# Intent keywords in priority order; the first intent with a hit wins
+INTENT_KEYWORDS = [
+    ('exact_search', ['exact', 'exactly', 'precise', 'specific part number']),
+    ('similarity_search', ['similar', 'like', 'alternative', 'substitute', 'replacement', 'equivalent']),
+    ('comparison', ['compare', 'vs', 'versus', 'difference', 'better']),
+    ('recommendation', ['recommend', 'suggest', 'best', 'optimal', 'should i']),
+    ('cost_search', ['cheap', 'affordable', 'cost', 'price', 'budget']),
+    ('availability_search', ['available', 'stock', 'inventory', 'in stock']),
+]
+
+# Keywords that switch on query filters
+FILTER_KEYWORDS = {
+    'in_stock': ['in stock', 'available'],
+    'high_quality': ['high quality', 'premium', 'best'],
+}
+
+DEFAULT_MATERIALS = ['steel', 'aluminum', 'plastic', 'rubber', 'metal', 'carbon', 'fiber']
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; one pass over the text finds every pattern."""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[str, Any]]] = [[]]
+        self._compiled = False
+
+    def add(self, pattern: str, payload: Any) -> None:
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        self.outputs[state].append((pattern, payload))
+        self._compiled = False
+
+    def compile(self) -> None:
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+        self._compiled = True
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, str, Any]]:
+        """Yield ``(end_index, pattern, payload)`` for every occurrence in ``text``."""
+        if not self._compiled:
+            self.compile()
+        state = 0
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern, payload in outputs[state]:
+                yield i, pattern, payload
+
+
+class QueryMatcher:
+    """Compiles catalog vocabulary and intent keywords into one automaton.
+
+    Build it once per catalog version; ``match`` then extracts systems,
+    manufacturers, materials, vehicle models, intent and filter flags in a
+    single linear pass over the lowercased query.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]], vehicle_models: Iterable[str] = ()):
+        self.automaton = AhoCorasick()
+        self.intent_priority = {intent: rank for rank, (intent, _) in enumerate(INTENT_KEYWORDS)}
+        vocab = self._collect_vocabulary(parts, vehicle_models)
+        for category, values in vocab.items():
+            for value in values:
+                self.automaton.add(value, (category, value))
+        for intent, keywords in INTENT_KEYWORDS:
+            for keyword in keywords:
+                self.automaton.add(keyword, ('intent', intent))
+        for flag, keywords in FILTER_KEYWORDS.items():
+            for keyword in keywords:
+                self.automaton.add(keyword, ('flag', flag))
+        self.automaton.compile()
+        self.vocabulary_size = sum(len(v) for v in vocab.values())
+
+    @staticmethod
+    def _collect_vocabulary(parts: List[Dict[str, Any]], vehicle_models: Iterable[str]) -> Dict[str, set]:
+        vocab = {
+            'systems': set(),
+            'manufacturers': set(),
+            'materials': set(DEFAULT_MATERIALS),
+            'vehicle_models': {str(m).lower() for m in vehicle_models if m},
+        }
+        for part in parts:
+            if part.get('system'):
+                vocab['systems'].add(str(part['system']).lower())
+            if part.get('manufacturer'):
+                vocab['manufacturers'].add(str(part['manufacturer']).lower())
+            material = part.get('material')
+            specs = part.get('technical_specs')
+            if not material and isinstance(specs, dict):
+                material = specs.get('material')
+            if material:
+                vocab['materials'].add(str(material).lower())
+            if part.get('vehicle_model'):
+                vocab['vehicle_models'].add(str(part['vehicle_model']).lower())
+        return vocab
+
+    def match(self, query_lower: str) -> Dict[str, Any]:
+        """Scan the query once and group every hit by category."""
+        entities: Dict[str, List[str]] = defaultdict(list)
+        intent = 'general_search'
+        intent_rank = len(self.intent_priority)
+        flags = set()
+        for _, _, (category, value) in self.automaton.iter_matches(query_lower):
+            if category == 'intent':
+                rank = self.intent_priority[value]
+                if rank < intent_rank:
+                    intent, intent_rank = value, rank
+            elif category == 'flag':
+                flags.add(value)
+            elif value not in entities[category]:
+                entities[category].append(value)
+        return {'intent': intent, 'entities': dict(entities), 'flags': flags}
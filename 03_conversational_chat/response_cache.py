@@ -0,0 +1,271 @@
+"""
+IntelliPart LLM Response Cache
+Bounded, expiring cache of LLM answers keyed by model, prompt template version and retrieved context,
+with a similarity match on the question
+
+Two calls share an answer only when they use the same model, the same
+prompt template version and the same retrieved context (hashed), so a
+cached answer never describes parts the current retrieval did not return.
+Within that bucket the question is matched exactly after normalization,
+then by cosine similarity of its embedding. Filler words are dropped
+before embedding, so "what is the price of the brake pads" reuses the
+answer to "what is the price of brake pads". Numbers in the question are
+part of the bucket: "under 500" and "under 5000" look alike to an
+embedding but must never share an answer.
+
+``get_or_stream`` serves streamed answers the same way: a hit is yielded
+in one piece, a miss relays the generator's pieces and caches the joined
+answer only if the stream ran to its end, so an answer the client
+abandoned half way is never reused.
+
+Entries remember the dataset version they were generated against; a
+lookup with a different version drops them. Bump the template version
+whenever a prompt's wording changes.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from text_encoders import create_encoder
+
+# Shared modules (text_normalization) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_normalization import clean_query, normalize
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get('INTELLIPART_LLM_CACHE_SIZE', '2000'))
+DEFAULT_TTL_SECONDS = float(os.environ.get('INTELLIPART_LLM_CACHE_TTL', '3600'))
+# Cosine threshold for a semantic hit; 0 disables semantic matching
+DEFAULT_SIMILARITY = float(os.environ.get('INTELLIPART_LLM_CACHE_SIMILARITY', '0.92'))
+# Char n-gram hashing by default: near-identical wording is what should match, and it needs no model
+DEFAULT_ENCODER = os.environ.get('INTELLIPART_LLM_CACHE_ENCODER', 'hashing')
+
+# What the LLM call helpers return instead of raising; never cached
+ERROR_PREFIXES = ('[ERROR', 'Error calling')
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def context_key(model: str, template: str, context: str, question: str = '') -> str:
+    """Bucket of answers that may be shared: same model, template version, retrieved context and numbers."""
+    digest = hashlib.sha1()
+    for piece in (model, template, context, ' '.join(_NUMBER.findall(question))):
+        digest.update(str(piece).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def is_cacheable(response: Any) -> bool:
+    return isinstance(response, str) and bool(response.strip()) and not response.startswith(ERROR_PREFIXES)
+
+
+class CachedResponse:
+    """One LLM answer, the question it answered and what it cost to produce."""
+
+    __slots__ = ('bucket', 'question', 'embedding', 'response', 'dataset_version', 'created_at', 'expires_at',
+                 'generation_seconds', 'hits')
+
+    def __init__(self, bucket: str, question: str, embedding: Optional[np.ndarray], response: str,
+                 dataset_version: Optional[str], ttl_seconds: float, generation_seconds: float):
+        self.bucket = bucket
+        self.question = question
+        self.embedding = embedding
+        self.response = response
+        self.dataset_version = dataset_version
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl_seconds
+        self.generation_seconds = generation_seconds
+        self.hits = 0
+
+
+class ResponseCache:
+    """LRU of LLM answers with a size bound, per-entry expiry and hit-rate counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 similarity_threshold: float = DEFAULT_SIMILARITY, encoder=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.similarity_threshold = float(similarity_threshold)
+        self._encoder = encoder
+        self._entries: 'OrderedDict[Tuple[str, str], CachedResponse]' = OrderedDict()
+        self._buckets: Dict[str, Dict[str, CachedResponse]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'stored': 0, 'expired': 0,
+                      'evicted': 0, 'invalidated': 0, 'saved_seconds': 0.0}
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity_threshold > 0
+
+    def _embed(self, question: str) -> np.ndarray:
+        if self._encoder is None:
+            self._encoder = create_encoder(DEFAULT_ENCODER)
+        return self._encoder.encode([clean_query(question) or question])[0]
+
+    # --- entries (caller holds the lock) ---
+
+    def _discard(self, entry: CachedResponse) -> None:
+        self._entries.pop((entry.bucket, entry.question), None)
+        bucket = self._buckets.get(entry.bucket)
+        if bucket is not None:
+            bucket.pop(entry.question, None)
+            if not bucket:
+                del self._buckets[entry.bucket]
+
+    def _live(self, entry: CachedResponse, now: float, dataset_version: Optional[str]) -> bool:
+        if entry.expires_at <= now:
+            self._discard(entry)
+            self.stats['expired'] += 1
+            return False
+        if dataset_version is not None and entry.dataset_version != dataset_version:
+            self._discard(entry)
+            self.stats['invalidated'] += 1
+            return False
+        return True
+
+    def _hit(self, entry: CachedResponse, match: str) -> str:
+        self._entries.move_to_end((entry.bucket, entry.question))
+        entry.hits += 1
+        self.stats[f'{match}_hits'] += 1
+        self.stats['saved_seconds'] += entry.generation_seconds
+        return entry.response
+
+    # --- lookups ---
+
+    def _lookup(self, question: str, bucket: str,
+                dataset_version: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[np.ndarray]]:
+        """``(response, 'exact' | 'semantic', question embedding)``; the embedding is reused by ``store``."""
+        text = normalize(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((bucket, text))
+            if entry is not None and self._live(entry, now, dataset_version):
+                return self._hit(entry, 'exact'), 'exact', entry.embedding
+            if not self.semantic or bucket not in self._buckets:
+                self.stats['misses'] += 1
+                return None, None, None
+        # Encode outside the lock; it is the slow part of a miss
+        vector = self._embed(text)
+        with self._lock:
+            candidates = [e for e in list(self._buckets.get(bucket, {}).values())
+                          if e.embedding is not None and self._live(e, now, dataset_version)]
+            if candidates:
+                similarities = np.stack([e.embedding for e in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    return self._hit(candidates[best], 'semantic'), 'semantic', vector
+            self.stats['misses'] += 1
+        return None, None, vector
+
+    def lookup(self, question: str, model: str, template: str, context: str = '',
+               dataset_version: Optional[str] = None) -> Optional[str]:
+        """A cached answer for ``question`` in this model / template / context bucket, or None."""
+        return self._lookup(question, context_key(model, template, context, question), dataset_version)[0]
+
+    def store(self, question: str, response: str, model: str, template: str, context: str = '',
+              dataset_version: Optional[str] = None, generation_seconds: float = 0.0,
+              embedding: Optional[np.ndarray] = None) -> bool:
+        """Cache ``response``; error strings and empty answers are refused (returns False)."""
+        if not is_cacheable(response):
+            return False
+        bucket = context_key(model, template, context, question)
+        text = normalize(question)
+        if embedding is None and self.semantic:
+            embedding = self._embed(text)
+        entry = CachedResponse(bucket, text, embedding, response, dataset_version, self.ttl_seconds,
+                               generation_seconds)
+        with self._lock:
+            previous = self._entries.get((bucket, text))
+            if previous is not None:
+                self._discard(previous)
+            self._entries[(bucket, text)] = entry
+            self._buckets.setdefault(bucket, {})[text] = entry
+            self.stats['stored'] += 1
+            while len(self._entries) > self.max_entries:
+                _, oldest = self._entries.popitem(last=False)
+                self._discard(oldest)
+                self.stats['evicted'] += 1
+        return True
+
+    def get_or_generate(self, question: str, generate: Callable[[], str], model: str, template: str,
+                        context: str = '', dataset_version: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """``(answer, match)``: the cached answer and 'exact' / 'semantic', or ``generate()`` and None."""
+        bucket = context_key(model, template, context, question)
+        response, match, embedding = self._lookup(question, bucket, dataset_version)
+        if response is not None:
+            return response, match
+        started = time.time()
+        response = generate()
+        self.store(question, response, model, template, context, dataset_version,
+                   generation_seconds=time.time() - started, embedding=embedding)
+        return response, None
+
+    def get_or_stream(self, question: str, stream: Callable[[], Iterable[str]], model: str, template: str,
+                      context: str = '', dataset_version: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+        """``(piece, match)`` pairs: the cached answer in one piece, or ``stream()``'s pieces with match None."""
+        bucket = context_key(model, template, context, question)
+        response, match, embedding = self._lookup(question, bucket, dataset_version)
+        if response is not None:
+            yield response, match
+            return
+        started = time.time()
+        pieces = []
+        source = iter(stream())
+        try:
+            for piece in source:
+                pieces.append(piece)
+                yield piece, None
+        finally:
+            # Closing early (the client went away) closes the upstream stream too
+            if hasattr(source, 'close'):
+                source.close()
+        # Only reached when the consumer read to the end
+        self.store(question, ''.join(pieces).strip(), model, template, context, dataset_version,
+                   generation_seconds=time.time() - started, embedding=embedding)
+
+    # --- maintenance ---
+
+    def invalidate(self, dataset_version: Optional[str] = None) -> int:
+        """Drop every entry generated against another dataset version (all entries when None)."""
+        with self._lock:
+            stale = [e for e in self._entries.values()
+                     if dataset_version is None or e.dataset_version != dataset_version]
+            for entry in stale:
+                self._discard(entry)
+            self.stats['invalidated'] += len(stale)
+        return len(stale)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [e for e in self._entries.values() if e.expires_at <= now]
+            for entry in expired:
+                self._discard(entry)
+            self.stats['expired'] += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats['exact_hits'] + self.stats['semantic_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'similarity_threshold': self.similarity_threshold,
+                **self.stats,
+                'saved_seconds': round(self.stats['saved_seconds'], 2),
+                'hit_rate': round(hits / lookups, 4) if lookups else None,
+            }
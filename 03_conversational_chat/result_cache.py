@@ -0,0 +1,149 @@
+"""
+IntelliPart Result-Set Cursors
+Self-contained, signed cursors over ranked result sets (part ids and scores only)
+
+A cursor carries the whole ranked list it pages through, the catalog version
+it was ranked against, its expiry and an HMAC over all of it. Any worker that
+shares the secret can serve the next page without a server-side lookup, so
+paging keeps working across gunicorn workers, restarts and recycled processes.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_TTL_SECONDS = float(os.environ.get('INTELLIPART_RESULT_CACHE_TTL', '600'))
+# Must be identical on every worker that serves cursors; without it each process signs with a random key
+DEFAULT_SECRET = os.environ.get('INTELLIPART_CURSOR_SECRET')
+SIGNATURE_BYTES = 16
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed, tampered with, expired or belongs to another catalog version."""
+
+
+class ResultSet:
+    """A ranked list of hits as computed once for a query, plus whatever the caller needs to page it."""
+
+    __slots__ = ('hits', 'version', 'meta', 'created_at', 'expires_at')
+
+    def __init__(self, hits: Sequence[Tuple], version: Optional[str], meta: Dict[str, Any],
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, created_at: Optional[float] = None):
+        self.hits = tuple(tuple(hit) for hit in hits)
+        self.version = version
+        self.meta = meta
+        self.created_at = time.time() if created_at is None else created_at
+        self.expires_at = self.created_at + ttl_seconds
+
+    def page(self, offset: int, size: int) -> List[Tuple]:
+        return list(self.hits[offset:offset + size])
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode((text + '=' * (-len(text) % 4)).encode())
+
+
+def _compact_hit(hit: Tuple) -> List[Any]:
+    # Scores only need to order and display; six decimals keep cursors short
+    return [round(v, 6) if isinstance(v, float) else v for v in hit]
+
+
+def _valid_position(hit: Tuple, size: int) -> bool:
+    idx = hit[0] if hit else None
+    return isinstance(idx, int) and not isinstance(idx, bool) and 0 <= idx < size
+
+
+class ResultSetCursors:
+    """Signs result sets into cursors and verifies them back.
+
+    Hits are ``(part index, score, ...)`` tuples rather than records, so a
+    cursor over 20 hits stays a few hundred bytes. Each cursor remembers the
+    catalog version (content fingerprint) it was ranked against; once the
+    catalog changes it stops resolving instead of pointing at the wrong parts.
+    """
+
+    def __init__(self, secret: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        secret = secret or DEFAULT_SECRET
+        if not secret:
+            # A random key only verifies in this process and processes forked from it
+            # (preloaded gunicorn workers), never after a restart or on another host
+            print("⚠️ INTELLIPART_CURSOR_SECRET is not set; signing cursors with a random per-process key")
+        self._key = secret.encode() if secret else secrets.token_bytes(32)
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self.stats = {'issued': 0, 'resolved': 0, 'rejected': 0, 'expired': 0, 'stale': 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _sign(self, body: bytes) -> bytes:
+        return hmac.new(self._key, body, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+    def put(self, hits: Sequence[Tuple], version: Optional[str] = None, **meta: Any) -> ResultSet:
+        """Wrap a ranked result set so cursors can be cut from it."""
+        return ResultSet(hits, version, meta, self.ttl_seconds)
+
+    def encode(self, result_set: ResultSet, offset: int) -> str:
+        """Signed cursor for the page of ``result_set`` starting at ``offset``."""
+        payload = {
+            'h': [_compact_hit(hit) for hit in result_set.hits],
+            'v': result_set.version,
+            'm': result_set.meta,
+            't': round(result_set.created_at, 3),
+            'o': offset,
+        }
+        body = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+        self._count('issued')
+        return f"{_b64encode(body)}.{_b64encode(self._sign(body))}"
+
+    def cursor(self, result_set: ResultSet, offset: int) -> Optional[str]:
+        """Cursor for the page starting at ``offset``, or None past the end of the set."""
+        return self.encode(result_set, offset) if offset < len(result_set.hits) else None
+
+    def resolve(self, cursor: str, version: Optional[str] = None, size: Optional[int] = None) -> Tuple[int, ResultSet]:
+        """Verify ``cursor`` and return ``(offset, result set)``; raises InvalidCursor.
+
+        With ``size`` (parts in the catalog), every hit must be a position ``0 <= idx < size``.
+        """
+        try:
+            body_text, _, signature = cursor.partition('.')
+            body, signature = _b64decode(body_text), _b64decode(signature)
+        except (ValueError, AttributeError):
+            body, signature = b'', b''
+        if not body or not hmac.compare_digest(signature, self._sign(body)):
+            self._count('rejected')
+            raise InvalidCursor('Malformed cursor')
+        try:
+            payload = json.loads(zlib.decompress(body))
+            result_set = ResultSet(payload['h'], payload['v'], payload['m'], self.ttl_seconds, payload['t'])
+            offset = int(payload['o'])
+        except (ValueError, KeyError, TypeError, zlib.error):
+            self._count('rejected')
+            raise InvalidCursor('Malformed cursor')
+        if offset < 0 or (size is not None and not all(_valid_position(hit, size) for hit in result_set.hits)):
+            self._count('rejected')
+            raise InvalidCursor('Malformed cursor')
+        if result_set.expires_at <= time.time():
+            self._count('expired')
+            raise InvalidCursor('Cursor expired; run the search again')
+        if version is not None and result_set.version is not None and result_set.version != version:
+            self._count('stale')
+            raise InvalidCursor('The catalog changed since this search; run it again')
+        self._count('resolved')
+        return offset, result_set
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'ttl_seconds': self.ttl_seconds, **self.stats}
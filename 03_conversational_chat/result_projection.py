@@ -0,0 +1,86 @@
+"""
+IntelliPart Result Projection
+Engines rank (part index, score) pairs; records are materialized only at serialization time,
+and only with the fields the client asked for
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+Hit = Tuple[int, float]
+
+# Fields returned when the request does not pass ``fields``. Dotted paths
+# select inside nested blocks (``technical_specs.material``).
+DEFAULT_RESULT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'search': (
+        'part_id', 'name', 'part_name', 'part_number', 'Part Number', 'Part Description',
+        'category', 'subcategory', 'system_name', 'System Name', 'Sub System Name', 'manufacturer',
+        'oem_part_number', 'material', 'technical_specs.material', 'cost', 'cost_price',
+        'retail_price', 'stock', 'supply_chain.current_stock', 'vehicle_model',
+    ),
+    'semantic_search': (
+        'part_id', 'name', 'part_name', 'part_number', 'Part Number', 'Part Description',
+        'category', 'system_name', 'System Name', 'manufacturer', 'cost_price', 'cost',
+    ),
+    # Context handed to the LLM: enough to answer, without supply-chain or quality blocks
+    'rag': (
+        'part_id', 'name', 'part_name', 'part_number', 'Part Number', 'Part Description',
+        'category', 'subcategory', 'system_name', 'System Name', 'Sub System Name', 'manufacturer',
+        'oem_part_number', 'material', 'technical_specs', 'compatibility.vehicle_models',
+        'compatibility.year_range', 'cost', 'cost_price', 'retail_price', 'stock', 'vehicle_model',
+    ),
+    'intelligent_search': (
+        'part_id', 'name', 'part_name', 'part_number', 'Part Number', 'category', 'system_name',
+        'manufacturer', 'material', 'condition', 'cost', 'cost_price', 'stock',
+        'supply_chain.current_stock', 'quality',
+    ),
+}
+
+ALL_FIELDS = '*'
+
+
+def resolve_fields(requested: Union[None, str, Sequence[str]], endpoint: str) -> Optional[Tuple[str, ...]]:
+    """Field paths for a request: the client's list, the endpoint default, or None for every field.
+
+    ``requested`` may be a list or a comma separated string; ``*`` selects
+    the whole record.
+    """
+    if requested is None or requested == '' or requested == []:
+        return DEFAULT_RESULT_FIELDS.get(endpoint)
+    if isinstance(requested, str):
+        requested = [f.strip() for f in requested.split(',')]
+    fields = tuple(f for f in requested if f)
+    if ALL_FIELDS in fields:
+        return None
+    return fields
+
+
+def project(part: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """New dict with only ``fields`` of ``part`` (all top-level fields when ``fields`` is None)."""
+    if fields is None:
+        return dict(part)
+    out: Dict[str, Any] = {}
+    for path in fields:
+        if '.' not in path:
+            if path in part:
+                out[path] = part[path]
+            continue
+        head, _, rest = path.partition('.')
+        block = part.get(head)
+        if not isinstance(block, dict) or rest not in block:
+            continue
+        target = out.setdefault(head, {})
+        if isinstance(target, dict):
+            target[rest] = block[rest]
+    return out
+
+
+def materialize(parts: Sequence[Dict[str, Any]], hits: Sequence[Hit], fields: Optional[Sequence[str]],
+                score_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Turn ranked hits into response records, reading each part once from ``parts``."""
+    results = []
+    for idx, score in hits:
+        record = project(parts[idx], fields)
+        if score_key:
+            record[score_key] = round(float(score), 4)
+        results.append(record)
+    return results
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+IntelliPart Search Benchmark
+Replays a query set against every search engine at several catalog sizes and records latency,
+throughput, memory, build time and recall@k in a JSON report that can be diffed between runs
+
+Each (engine, catalog size) pair runs in its own subprocess so peak RSS and
+build time belong to that engine alone. Catalogs come from the production
+dataset generator with a fixed seed and are cached under
+``.search_cache/benchmarks``; the reference ranking is an exhaustive cosine
+scan over every part with the same encoder the semantic engine uses.
+
+Usage:
+    python search_benchmark.py run --sizes 1000 10000 --output bench_report.json
+    python search_benchmark.py run --sizes 200000 --engines semantic keyword --encoder sentence-transformers
+    python search_benchmark.py compare old_report.json new_report.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+
+from build_embeddings import load_parts
+
+ROOT = Path(__file__).resolve().parent.parent
+QUERY_SEED_FILE = ROOT / "Archive_OLD_FILES" / "dataset_queries.json"
+GENERATOR_DIR = ROOT / "01_dataset_expansion"
+NEW_FEATURES_DIR = ROOT / "05_new_features"  # PerformanceOptimizer
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".search_cache" / "benchmarks"
+DEFAULT_SIZES = (1000, 10000, 200000, 1000000)
+REFERENCE = 'brute_force'
+
+sys.path.append(str(NEW_FEATURES_DIR))
+
+
+# --- Catalogs and queries ---
+
+def generate_catalog(size: int, cache_dir: Path, seed: int = 42) -> Path:
+    """JSONL catalog of ``size`` generator parts, written once per (size, seed) and reused."""
+    path = cache_dir / f"catalog_{size}_seed{seed}.jsonl"
+    if path.is_file():
+        return path
+    sys.path.insert(0, str(GENERATOR_DIR))
+    cwd = os.getcwd()
+    os.chdir(cache_dir)  # the generator writes its log file and output folders into the cwd
+    try:
+        from production_dataset_generator import ProductionDatasetGenerator
+        generator = ProductionDatasetGenerator(output_dir=str(cache_dir / "generator"))
+    finally:
+        os.chdir(cwd)
+    random.seed(seed)
+    print(f"🏭 Generating {size} parts -> {path}")
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for _ in range(size):
+            f.write(json.dumps(asdict(generator.generate_single_part()), ensure_ascii=False) + '\n')
+    os.replace(tmp, path)
+    return path
+
+
+def load_queries(path: Path = QUERY_SEED_FILE, extra: Optional[List[str]] = None) -> List[str]:
+    """Seed queries from dataset_queries.json (a list or ``{"queries": [...]}``) plus any extras."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    queries = data.get('queries', []) if isinstance(data, dict) else data
+    return [q for q in queries if isinstance(q, str) and q.strip()] + list(extra or [])
+
+
+# --- Engines ---
+# Each adapter builds an engine over ``parts`` and answers a query with the
+# catalog positions of its top-k results, best first.
+
+def _part_positions(parts) -> Dict[str, int]:
+    return {str(p.get('part_id')): i for i, p in enumerate(parts)}
+
+
+def _build_semantic(parts, args):
+    from conversational_web_app import SemanticSearchEngineHF
+    engine = SemanticSearchEngineHF(parts, encoder_backend=args.encoder, embedding_mode=args.embedding_mode)
+    return lambda q, k: [i for i, _ in engine.search_ids(q, top_k=k, min_similarity=0.0)]
+
+
+def _build_keyword(parts, args):
+    from conversational_web_app import SimpleKeywordSearchEngine
+    engine = SimpleKeywordSearchEngine(parts)
+    return lambda q, k: [i for i, _ in engine.search_ids(q, top_k=k)]
+
+
+def _build_conversational(parts, args):
+    from conversational_search import ConversationalPartsSearch
+    engine = ConversationalPartsSearch(parts)
+    positions = _part_positions(parts)
+    return lambda q, k: [positions[str(r.get('part_id'))] for r in engine.search(q, limit=k, fields=('part_id',))['results']
+                         if str(r.get('part_id')) in positions]
+
+
+def _build_fast_search(parts, args):
+    from performance_optimizer import PerformanceOptimizer
+    cache_dir = tempfile.mkdtemp(prefix='intellipart_bench_')
+    optimizer = PerformanceOptimizer(jsonl_path=args.catalog, cache_dir=cache_dir)
+    optimizer.index_parts_data(parts)
+    positions = _part_positions(parts)
+    return lambda q, k: [positions[str(r.get('part_id'))] for r in optimizer.fast_search(query=q, limit=k)
+                         if str(r.get('part_id')) in positions]
+
+
+def _build_brute_force(parts, args):
+    from text_encoders import create_encoder, part_to_embedding_text
+    encoder = create_encoder(args.encoder)
+    embeddings = encoder.encode([part_to_embedding_text(p) for p in parts])
+
+    def query(q, k):
+        scores = embeddings @ encoder.encode([q])[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [int(i) for i in top[np.argsort(-scores[top])]]
+    return query
+
+
+ENGINES: Dict[str, Callable] = {
+    'semantic': _build_semantic,
+    'keyword': _build_keyword,
+    'conversational': _build_conversational,
+    'fast_search': _build_fast_search,
+    REFERENCE: _build_brute_force,
+}
+
+# Imported before the catalog is loaded so library memory is not counted as index memory
+ENGINE_MODULES = {
+    'semantic': 'conversational_web_app',
+    'keyword': 'conversational_web_app',
+    'conversational': 'conversational_search',
+    'fast_search': 'performance_optimizer',
+    REFERENCE: 'text_encoders',
+}
+
+
+# --- Measurement (runs inside the per-engine subprocess) ---
+
+def _rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def run_engine(engine: str, args) -> Dict[str, Any]:
+    """Build one engine over the catalog, replay the queries and return its measurements."""
+    importlib.import_module(ENGINE_MODULES[engine])
+    rss_imported = _rss_mb()
+    parts = load_parts([args.catalog])
+    queries = load_queries(Path(args.queries))
+    rss_loaded = _rss_mb()
+
+    started = time.perf_counter()
+    query = ENGINES[engine](parts, args)
+    build_seconds = time.perf_counter() - started
+    rss_built = _rss_mb()
+
+    for q in queries[:args.warmup]:
+        query(q, args.k)
+
+    latencies, rankings, errors = [], {}, 0
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            try:
+                ranked = query(q, args.k)
+            except Exception as e:
+                errors += 1
+                ranked = []
+                print(f"⚠️ {engine} failed on '{q}': {e}", file=sys.stderr)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            rankings[q] = ranked[:args.k]
+    wall = time.perf_counter() - started
+
+    return {
+        'engine': engine,
+        'parts': len(parts),
+        'queries': len(latencies),
+        'build_seconds': round(build_seconds, 3),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(float(np.mean(latencies)) if latencies else 0.0, 3),
+        },
+        'throughput_qps': round(len(latencies) / wall, 2) if wall > 0 else None,
+        'memory_mb': {
+            'after_import': round(rss_imported, 1),
+            'after_load': round(rss_loaded, 1),
+            'after_build': round(rss_built, 1),
+            'index': round(rss_built - rss_loaded, 1),
+            'peak': round(_peak_rss_mb(), 1),
+        },
+        'mean_results': round(float(np.mean([len(r) for r in rankings.values()])) if rankings else 0.0, 2),
+        'errors': errors,
+        'rankings': rankings,
+    }
+
+
+def _spawn(engine: str, catalog: Path, queries_path: Path, args) -> Dict[str, Any]:
+    """Run one engine in a fresh interpreter and read back its measurements."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+        out = tmp.name
+    cmd = [sys.executable, str(Path(__file__).resolve()), '_worker', '--engine', engine,
+           '--catalog', str(catalog), '--queries', str(queries_path), '--k', str(args.k),
+           '--repeat', str(args.repeat), '--warmup', str(args.warmup), '--encoder', args.encoder,
+           '--embedding-mode', args.embedding_mode, '--output', out]
+    env = dict(os.environ, INTELLIPART_CATALOG_AUTOLOAD='0', INTELLIPART_ENCODER=args.encoder)
+    try:
+        proc = subprocess.run(cmd, cwd=str(Path(__file__).parent), env=env, timeout=args.timeout,
+                              stdout=subprocess.DEVNULL if not args.verbose else None,
+                              stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            return {'engine': engine, 'error': (proc.stderr or '').strip().splitlines()[-1:] or ['failed']}
+        with open(out, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return {'engine': engine, 'error': [f'timed out after {args.timeout}s']}
+    finally:
+        if os.path.exists(out):
+            os.remove(out)
+
+
+def recall_at_k(ranked: List[int], reference: List[int], k: int) -> float:
+    expected = set(reference[:k])
+    return len(expected & set(ranked[:k])) / len(expected) if expected else 0.0
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT), capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    cache_dir = Path(args.cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    queries = load_queries(Path(args.queries), args.extra_queries)
+    queries_path = cache_dir / "queries.json"
+    with open(queries_path, 'w', encoding='utf-8') as f:
+        json.dump({'queries': queries}, f, ensure_ascii=False)
+
+    results = []
+    for size in args.sizes:
+        catalog = generate_catalog(size, cache_dir, args.seed)
+        reference = _spawn(REFERENCE, catalog, queries_path, args)
+        reference_rankings = reference.get('rankings', {})
+        for engine in args.engines:
+            print(f"⏱️  {engine} @ {size} parts")
+            result = _spawn(engine, catalog, queries_path, args)
+            result.setdefault('parts', size)
+            rankings = result.pop('rankings', {})
+            if reference_rankings and 'error' not in result:
+                recalls = [recall_at_k(rankings.get(q, []), reference_rankings[q], args.k)
+                           for q in queries if q in reference_rankings]
+                result[f'recall_at_{args.k}'] = round(float(np.mean(recalls)), 4) if recalls else None
+            results.append(result)
+        reference.pop('rankings', None)
+        results.append(reference)
+
+    return {
+        'benchmark': 'intellipart_search',
+        'created_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'config': {'sizes': list(args.sizes), 'engines': list(args.engines), 'k': args.k, 'repeat': args.repeat,
+                   'warmup': args.warmup, 'encoder': args.encoder, 'embedding_mode': args.embedding_mode,
+                   'seed': args.seed, 'query_count': len(queries), 'reference': REFERENCE},
+        'results': results,
+    }
+
+
+# --- Comparing reports ---
+
+COMPARED_METRICS = (
+    ('build_seconds', ('build_seconds',)),
+    ('p50_ms', ('latency_ms', 'p50')),
+    ('p95_ms', ('latency_ms', 'p95')),
+    ('p99_ms', ('latency_ms', 'p99')),
+    ('throughput_qps', ('throughput_qps',)),
+    ('peak_rss_mb', ('memory_mb', 'peak')),
+)
+
+
+def _metric(result: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    value: Any = result
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per (engine, size) change of every metric between two reports (``new - old`` and percent)."""
+    k = new.get('config', {}).get('k')
+    metrics = COMPARED_METRICS + ((f'recall_at_{k}', (f'recall_at_{k}',)),)
+    baseline = {(r['engine'], r.get('parts')): r for r in old.get('results', [])}
+    rows = []
+    for result in new.get('results', []):
+        before = baseline.get((result['engine'], result.get('parts')))
+        if before is None:
+            continue
+        row = {'engine': result['engine'], 'parts': result.get('parts')}
+        for name, path in metrics:
+            a, b = _metric(before, path), _metric(result, path)
+            if a is None or b is None:
+                continue
+            row[name] = {'old': a, 'new': b, 'delta': round(b - a, 4),
+                         'change_pct': round((b - a) * 100 / a, 1) if a else None}
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IntelliPart search engines")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Benchmark engines at one or more catalog sizes")
+    run.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES[:2]),
+                     help=f"Catalog sizes (the full matrix is {' '.join(map(str, DEFAULT_SIZES))})")
+    run.add_argument('--engines', nargs='+', default=[e for e in ENGINES if e != REFERENCE], choices=list(ENGINES))
+    run.add_argument('--queries', default=str(QUERY_SEED_FILE))
+    run.add_argument('--extra-queries', nargs='*', default=[])
+    run.add_argument('--k', type=int, default=10)
+    run.add_argument('--repeat', type=int, default=3, help="Replays of the query set per engine")
+    run.add_argument('--warmup', type=int, default=5, help="Unmeasured queries before timing")
+    run.add_argument('--encoder', default=os.environ.get('INTELLIPART_ENCODER', 'hashing'))
+    run.add_argument('--embedding-mode', default='single', choices=['single', 'multi_field'])
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    run.add_argument('--timeout', type=int, default=3600, help="Seconds allowed per engine run")
+    run.add_argument('--output', default=None, help="Report path (default: stdout)")
+    run.add_argument('--verbose', action='store_true', help="Show engine build output")
+
+    compare = sub.add_parser('compare', help="Diff two reports")
+    compare.add_argument('old')
+    compare.add_argument('new')
+
+    worker = sub.add_parser('_worker')
+    worker.add_argument('--engine', required=True, choices=list(ENGINES))
+    worker.add_argument('--catalog', required=True)
+    worker.add_argument('--queries', required=True)
+    worker.add_argument('--k', type=int, default=10)
+    worker.add_argument('--repeat', type=int, default=3)
+    worker.add_argument('--warmup', type=int, default=5)
+    worker.add_argument('--encoder', default='hashing')
+    worker.add_argument('--embedding-mode', default='single')
+    worker.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    if args.command == '_worker':
+        result = run_engine(args.engine, args)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+    elif args.command == 'compare':
+        with open(args.old, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.new, 'r', encoding='utf-8') as f:
+            new = json.load(f)
+        print(json.dumps(compare_reports(old, new), indent=2))
+    else:
+        report = run_benchmark(args)
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"📊 Report written to {args.output}")
+        else:
+            print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""
+IntelliPart Sharded Search
+Scatter-gather search over catalog partitions held by separate shard processes
+
+The catalog is partitioned by part id hash or by category into N shards.
+Each shard owns keyword (TF-IDF), vector and facet indexes for its slice and
+answers over local IPC (a multiprocessing pipe) or HTTP. The coordinator fans
+a query out to every relevant shard with a per-shard timeout and merges the
+top-k lists. Keyword scores stay comparable across shards because IDF is
+computed from document frequencies summed over all shards, not per shard.
+
+Local shards belong to the process that started them. A process forked
+afterwards (a gunicorn worker under preload_app) never talks to the parent's
+shard pipes; it starts its own shard processes on first use, or at once
+through ``ShardCoordinator.start_after_fork``, and replays the global IDF.
+
+Usage:
+    # one shard per host (or per port) over HTTP
+    python sharded_search.py serve --shard-id 0 --num-shards 4 --port 5101
+    # local processes, for development and tests
+    python sharded_search.py demo --num-shards 4 --limit 20000
+"""
+
+import argparse
+import heapq
+import itertools
+import multiprocessing.process
+import os
+import threading
+import time
+import weakref
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from multiprocessing import Pipe, Process
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import requests
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from sparse_similarity import create_part_text
+from text_normalization import normalize
+from text_encoders import create_encoder, part_to_embedding_text
+from result_projection import materialize
+
+PARTITION_STRATEGIES = ('hash', 'category')
+SHARD_FACET_FIELDS = ('category', 'subcategory', 'manufacturer', 'System Name')
+HASH_FEATURES = 2 ** 20
+DEFAULT_SHARD_TIMEOUT = 2.0
+# Weight of the vector score in the hybrid score; the rest goes to TF-IDF
+DEFAULT_VECTOR_WEIGHT = 0.6
+
+
+def part_key(part: Dict[str, Any], fallback: int = 0) -> str:
+    return str(part.get('part_id') or part.get('part_number') or part.get('Part Number') or fallback)
+
+
+def facet_key(value: Any) -> str:
+    """Canonical form of a category / facet value: 'Brake-System' and 'brake system' are one key."""
+    return normalize(value)
+
+
+def shard_for(part: Dict[str, Any], num_shards: int, strategy: str = 'hash', fallback: int = 0) -> int:
+    """Stable shard assignment (crc32, so it agrees across processes and hosts)."""
+    if strategy == 'category':
+        key = facet_key(part.get('category') or part.get('System Name') or '')
+    else:
+        key = part_key(part, fallback)
+    return zlib.crc32(key.encode('utf-8')) % num_shards
+
+
+def partition_parts(parts: List[Dict[str, Any]], num_shards: int,
+                    strategy: str = 'hash') -> List[Tuple[List[int], List[Dict[str, Any]]]]:
+    """Split ``parts`` into (catalog positions, parts) per shard."""
+    if strategy not in PARTITION_STRATEGIES:
+        raise ValueError(f"Unknown partition strategy '{strategy}'; choose from {PARTITION_STRATEGIES}")
+    shards = [([], []) for _ in range(num_shards)]
+    for i, part in enumerate(parts):
+        positions, members = shards[shard_for(part, num_shards, strategy, i)]
+        positions.append(i)
+        members.append(part)
+    return shards
+
+
+def _make_hasher() -> HashingVectorizer:
+    return HashingVectorizer(n_features=HASH_FEATURES, ngram_range=(1, 2), alternate_sign=False, norm=None,
+                             token_pattern=r'(?u)\b\w[\w.]*\b', dtype=np.float32)
+
+
+class SearchShard:
+    """Indexes for one partition. Keyword scores need ``set_idf`` with global statistics first."""
+
+    def __init__(self, shard_id: int, parts: List[Dict[str, Any]], encoder_backend: str = 'hashing',
+                 encoder_model: Optional[str] = None, vector_weight: float = DEFAULT_VECTOR_WEIGHT,
+                 positions: Optional[List[int]] = None):
+        started = time.time()
+        self.shard_id = shard_id
+        self.parts = parts
+        # Position of each local part in the full catalog, so hits can be returned as ids
+        self.positions = positions if positions is not None else list(range(len(parts)))
+        self._position_array = np.asarray(self.positions, dtype=np.int64)
+        self.vector_weight = vector_weight
+        self.hasher = _make_hasher()
+        counts = self.hasher.transform([create_part_text(p) for p in parts]).tocsr()
+        counts.data = np.log1p(counts.data)  # sublinear tf
+        self._counts = counts
+        self.tfidf: Optional[sparse.csr_matrix] = None
+        self.idf: Optional[np.ndarray] = None
+
+        self.encoder = create_encoder(encoder_backend, encoder_model)
+        self.embeddings = self.encoder.encode([part_to_embedding_text(p) for p in parts])
+
+        self.facets: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in SHARD_FACET_FIELDS:
+            values = defaultdict(list)
+            for i, part in enumerate(parts):
+                value = part.get(field)
+                if isinstance(value, str) and value:
+                    values[facet_key(value)].append(i)
+            self.facets[field] = {v: np.array(ids, dtype=np.int32) for v, ids in values.items()}
+        self.build_seconds = time.time() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Document count and sparse document frequencies for the global IDF."""
+        df = np.bincount(self._counts.indices, minlength=HASH_FEATURES)
+        nonzero = np.flatnonzero(df)
+        return {'shard_id': self.shard_id, 'documents': len(self.parts),
+                'df_indices': nonzero.tolist(), 'df_counts': df[nonzero].tolist(),
+                'build_seconds': round(self.build_seconds, 2)}
+
+    def set_idf(self, idf: np.ndarray) -> None:
+        self.idf = np.asarray(idf, dtype=np.float32)
+        tfidf = self._counts.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        self.tfidf = sparse.diags(1.0 / norms).dot(tfidf).tocsr().astype(np.float32)
+
+    def _keyword_scores(self, query: str) -> np.ndarray:
+        if self.tfidf is None:
+            return np.zeros(len(self.parts), dtype=np.float32)
+        q = self.hasher.transform([normalize(query)])
+        q.data = np.log1p(q.data)
+        q = q.multiply(self.idf).tocsr()
+        norm = np.sqrt(q.multiply(q).sum())
+        if norm == 0:
+            return np.zeros(len(self.parts), dtype=np.float32)
+        return np.asarray((self.tfidf @ (q / norm).T).todense()).ravel()
+
+    def _facet_mask(self, filters: Optional[Dict[str, str]]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self.parts), dtype=bool)
+        for field, value in filters.items():
+            if field not in self.facets:
+                continue
+            ids = self.facets[field].get(facet_key(value))
+            field_mask = np.zeros(len(self.parts), dtype=bool)
+            if ids is not None:
+                field_mask[ids] = True
+            mask &= field_mask
+        return mask
+
+    def _candidate_mask(self, candidates: Optional[List[int]]) -> Optional[np.ndarray]:
+        """Local parts whose catalog position is in ``candidates`` (e.g. a resolved spec range)."""
+        if candidates is None:
+            return None
+        return np.isin(self._position_array, np.asarray(candidates, dtype=np.int64), assume_unique=True)
+
+    def search(self, query: str, k: int = 10, filters: Optional[Dict[str, str]] = None,
+               vector_weight: Optional[float] = None, include_parts: bool = True,
+               candidates: Optional[List[int]] = None) -> Dict[str, Any]:
+        started = time.time()
+        w = self.vector_weight if vector_weight is None else vector_weight
+        if not self.parts:
+            return {'shard_id': self.shard_id, 'results': [], 'elapsed_ms': 0.0}
+        keyword = self._keyword_scores(query)
+        vector = self.embeddings @ self.encoder.encode([query])[0]
+        scores = w * vector + (1 - w) * keyword
+        mask = self._facet_mask(filters)
+        allowed = self._candidate_mask(candidates)
+        if allowed is not None:
+            mask = allowed if mask is None else mask & allowed
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            if not np.isfinite(scores[i]):
+                continue
+            hit = {
+                'position': self.positions[i],
+                'part_id': part_key(self.parts[i], i),
+                'score': float(scores[i]),
+                'keyword_score': float(keyword[i]),
+                'vector_score': float(vector[i]),
+            }
+            if include_parts:
+                hit['part'] = self.parts[i]
+            results.append(hit)
+        return {'shard_id': self.shard_id, 'results': results,
+                'elapsed_ms': round((time.time() - started) * 1000, 2)}
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch one request; shared by the pipe loop and the HTTP endpoint."""
+        op = message.get('op')
+        if op == 'search':
+            return self.search(message['query'], message.get('k', 10), message.get('filters'),
+                               message.get('vector_weight'), message.get('include_parts', True),
+                               message.get('candidates'))
+        if op == 'stats':
+            return self.stats()
+        if op == 'set_idf':
+            idf = np.ones(HASH_FEATURES, dtype=np.float32) * message['default_idf']
+            idf[message['indices']] = message['values']
+            self.set_idf(idf)
+            return {'ok': True}
+        if op == 'ping':
+            return {'ok': True, 'shard_id': self.shard_id, 'documents': len(self.parts)}
+        return {'error': f"unknown op '{op}'"}
+
+
+# --- Transports ---
+
+def _reset_after_fork(obj: Any) -> None:
+    """Call ``obj._after_fork()`` in every process forked from this one while ``obj`` is alive."""
+    ref = weakref.ref(obj)
+
+    def after_in_child():
+        target = ref()
+        if target is not None:
+            target._after_fork()
+
+    os.register_at_fork(after_in_child=after_in_child)
+
+
+def _run_local_shard(conn, shard_id: int, parts: List[Dict[str, Any]], positions: List[int],
+                     encoder_backend: str, encoder_model: Optional[str]) -> None:
+    shard = SearchShard(shard_id, parts, encoder_backend, encoder_model, positions=positions)
+    conn.send({'id': 0, 'response': {'ready': True}})
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message.get('op') == 'stop':
+            break
+        try:
+            response = shard.handle(message)
+        except Exception as e:
+            response = {'error': str(e)}
+        conn.send({'id': message['id'], 'response': response})
+
+
+class LocalShardClient:
+    """Shard running in a child process, reached over a duplex pipe."""
+
+    def __init__(self, shard_id: int, parts: List[Dict[str, Any]], encoder_backend: str = 'hashing',
+                 encoder_model: Optional[str] = None, positions: Optional[List[int]] = None):
+        self.shard_id = shard_id
+        positions = positions if positions is not None else list(range(len(parts)))
+        self._args = (shard_id, parts, positions, encoder_backend, encoder_model)
+        # State-setting messages (the global IDF), replayed to a shard started after a fork
+        self._replay: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._conn = self._process = None
+        self._start()
+        _reset_after_fork(self)
+
+    def _start(self) -> None:
+        self._conn, child_conn = Pipe()
+        self._process = Process(target=_run_local_shard, name=f"shard-{self.shard_id}",
+                                args=(child_conn, *self._args), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._ids = itertools.count(1)
+        self._ready = False
+        self._replayed = not self._replay
+
+    def _after_fork(self) -> None:
+        # The pipe and shard process belong to the parent: a forked child sharing them reads
+        # replies meant for other processes. Forget both (without stopping the shard) and
+        # start this process's own shard on first use
+        if self._process is not None:
+            # Otherwise multiprocessing terminates the parent's daemon shard when this process exits
+            multiprocessing.process._children.discard(self._process)
+        self._lock = threading.Lock()
+        self._conn = self._process = None
+
+    def _ensure_started(self) -> None:
+        if self._conn is None:
+            print(f"🧩 Starting shard {self.shard_id} for process {os.getpid()}")
+            self._start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> None:
+        if not self._ready:
+            if not self._conn.poll(timeout):
+                raise TimeoutError(f"shard {self.shard_id} did not start in time")
+            self._conn.recv()
+            self._ready = True
+        if not self._replayed:
+            for message in self._replay:
+                self._call(message, timeout if timeout is not None else 600.0)
+            self._replayed = True
+
+    def start_after_fork(self) -> None:
+        """Start this process's own shard if it was forked from the one that built the client."""
+        with self._lock:
+            self._ensure_started()
+
+    def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_started()
+            if message.get('op') == 'set_idf':
+                self._replay = [message]
+            self.wait_ready(timeout)
+            return self._call(message, timeout)
+
+    def _call(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one message and wait for its reply; the caller holds the lock."""
+        deadline = time.time() + timeout
+        request_id = next(self._ids)
+        self._conn.send(dict(message, id=request_id))
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self._conn.poll(remaining):
+                raise TimeoutError(f"shard {self.shard_id} timed out")
+            reply = self._conn.recv()
+            # Replies to requests that already timed out are dropped here
+            if reply['id'] == request_id:
+                return reply['response']
+
+    def close(self) -> None:
+        if self._conn is None:
+            # Forked and never used here: the shard is the parent's to stop
+            return
+        try:
+            self._conn.send({'op': 'stop', 'id': -1})
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+class HttpShardClient:
+    """Shard served by ``create_shard_app`` on another process or host."""
+
+    def __init__(self, shard_id: int, url: str):
+        self.shard_id = shard_id
+        self.url = url.rstrip('/') + '/rpc'
+        self.session = requests.Session()
+
+    def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        try:
+            response = self.session.post(self.url, json=message, timeout=timeout)
+        except requests.Timeout as e:
+            raise TimeoutError(f"shard {self.shard_id} timed out") from e
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def create_shard_app(shard: SearchShard):
+    from flask import Flask, request, jsonify
+
+    app = Flask(f"intellipart-shard-{shard.shard_id}")
+
+    @app.route('/rpc', methods=['POST'])
+    def rpc():
+        return jsonify(shard.handle(request.get_json() or {}))
+
+    return app
+
+
+# --- Coordinator ---
+
+class ShardCoordinator:
+    """Fans queries out to shards, applies per-shard timeouts and merges top-k by score.
+
+    Exposes the same ``search``/``direct_or_semantic_search``/``suggest``
+    interface as the single-process engines so the web app can use it as
+    its search engine.
+    """
+
+    def __init__(self, clients: List[Any], strategy: str = 'hash', timeout: float = DEFAULT_SHARD_TIMEOUT,
+                 parts: Optional[List[Dict[str, Any]]] = None):
+        self.clients = clients
+        self.strategy = strategy
+        self.timeout = timeout
+        self.parts = parts
+        self._pool = ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix='shard-fanout')
+        self.documents = 0
+        _reset_after_fork(self)
+
+    def _after_fork(self) -> None:
+        # The parent's fan-out threads do not exist in a forked child
+        self._pool = ThreadPoolExecutor(max_workers=len(self.clients), thread_name_prefix='shard-fanout')
+
+    def start_after_fork(self, startup_timeout: float = 600.0) -> None:
+        """In a forked process, start its own local shards now instead of on the first search."""
+        local = [client for client in self.clients if hasattr(client, 'start_after_fork')]
+        for client in local:
+            client.start_after_fork()
+        for client in local:
+            client.request({'op': 'ping'}, startup_timeout)
+
+    def initialize(self, startup_timeout: float = 600.0) -> None:
+        """Collect document frequencies from every shard and broadcast the global IDF."""
+        stats = [client.request({'op': 'stats'}, startup_timeout) for client in self.clients]
+        n = sum(s['documents'] for s in stats)
+        df = np.zeros(HASH_FEATURES, dtype=np.int64)
+        for s in stats:
+            np.add.at(df, np.asarray(s['df_indices'], dtype=np.int64), np.asarray(s['df_counts'], dtype=np.int64))
+        nonzero = np.flatnonzero(df)
+        # Smoothed idf as in scikit-learn: log((1 + n) / (1 + df)) + 1
+        values = np.log((1 + n) / (1 + df[nonzero])) + 1
+        message = {'op': 'set_idf', 'indices': nonzero.tolist(), 'values': values.tolist(),
+                   'default_idf': float(np.log(1 + n) + 1)}
+        for client in self.clients:
+            client.request(message, startup_timeout)
+        self.documents = n
+        print(f"🧩 {len(self.clients)} shards ready with {n} parts (global IDF over {len(nonzero)} terms)")
+
+    def _targets(self, filters: Optional[Dict[str, str]]) -> List[Any]:
+        if self.strategy == 'category' and filters and filters.get('category'):
+            # Category partitioning: only the shard that owns the category can match
+            # (shard_for normalizes it, so the filter's spelling and case do not matter)
+            owner = shard_for({'category': filters['category']}, len(self.clients), 'category')
+            return [self.clients[owner]]
+        return self.clients
+
+    def search_detailed(self, query: str, top_k: int = 10, filters: Optional[Dict[str, str]] = None,
+                        vector_weight: Optional[float] = None, timeout: Optional[float] = None,
+                        include_parts: bool = True, candidate_ids=None) -> Dict[str, Any]:
+        started = time.time()
+        timeout = timeout or self.timeout
+        targets = self._targets(filters)
+        message = {'op': 'search', 'query': query, 'k': top_k, 'filters': filters,
+                   'vector_weight': vector_weight, 'include_parts': include_parts}
+        if candidate_ids is not None:
+            # Catalog positions allowed by the caller (a resolved spec range); every shard masks its own
+            message['candidates'] = [int(i) for i in candidate_ids]
+        futures = {self._pool.submit(client.request, message, timeout): client for client in targets}
+        done, not_done = wait(futures, timeout=timeout + 0.5)
+        shard_status: Dict[int, str] = {}
+        ranked: List[Tuple[float, Dict[str, Any]]] = []
+        for future, client in futures.items():
+            if future in not_done:
+                shard_status[client.shard_id] = 'timeout'
+                continue
+            try:
+                response = future.result()
+            except TimeoutError:
+                shard_status[client.shard_id] = 'timeout'
+                continue
+            except Exception as e:
+                shard_status[client.shard_id] = f'error: {e}'
+                continue
+            if 'error' in response:
+                shard_status[client.shard_id] = f"error: {response['error']}"
+                continue
+            shard_status[client.shard_id] = 'ok'
+            for hit in response['results']:
+                hit['shard_id'] = response['shard_id']
+                ranked.append((hit['score'], hit))
+        merged = [hit for _, hit in heapq.nlargest(top_k, ranked, key=lambda item: item[0])]
+        return {
+            'query': query,
+            'results': merged,
+            'shards': shard_status,
+            'partial': any(status != 'ok' for status in shard_status.values()),
+            'search_time_ms': round((time.time() - started) * 1000, 2),
+        }
+
+    def search_ids(self, query: str, top_k: int = 5, min_similarity: float = 0.0,
+                   field_weights: Optional[Dict[str, float]] = None,
+                   filters: Optional[Dict[str, str]] = None, candidate_ids=None) -> List[Tuple[int, float]]:
+        """(catalog position, score) pairs; shards send no record bodies."""
+        hits = self.search_detailed(query, top_k, filters, include_parts=False, candidate_ids=candidate_ids)['results']
+        return [(hit['position'], hit['score']) for hit in hits if hit['score'] >= min_similarity]
+
+    def search(self, query: str, top_k: int = 5, min_similarity: float = 0.0,
+               field_weights: Optional[Dict[str, float]] = None,
+               filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        if self.parts is not None:
+            return materialize(self.parts, self.search_ids(query, top_k, min_similarity, filters=filters),
+                               None, 'similarity')
+        results = []
+        for hit in self.search_detailed(query, top_k, filters)['results']:
+            if hit['score'] < min_similarity:
+                continue
+            part = dict(hit['part'])
+            part['similarity'] = hit['score']
+            results.append(part)
+        return results
+
+    def direct_or_semantic_search_ids(self, query: str, top_k: int = 5, min_similarity: float = 0.0,
+                                      field_weights: Optional[Dict[str, float]] = None,
+                                      candidate_ids=None) -> List[Tuple[int, float]]:
+        return self.search_ids(query, top_k, min_similarity, candidate_ids=candidate_ids)
+
+    def direct_or_semantic_search(self, query: str, top_k: int = 5, min_similarity: float = 0.0,
+                                  field_weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        return self.search(query, top_k, min_similarity)
+
+    def suggest(self, query: str, limit: int = 5) -> List[str]:
+        return []
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+        self._pool.shutdown(wait=False)
+
+
+def start_local_shards(parts: List[Dict[str, Any]], num_shards: int, strategy: str = 'hash',
+                       encoder_backend: str = 'hashing', encoder_model: Optional[str] = None,
+                       timeout: float = DEFAULT_SHARD_TIMEOUT) -> ShardCoordinator:
+    """Partition ``parts`` and start one shard process per partition."""
+    partitions = partition_parts(parts, num_shards, strategy)
+    clients = [LocalShardClient(i, members, encoder_backend, encoder_model, positions)
+               for i, (positions, members) in enumerate(partitions)]
+    coordinator = ShardCoordinator(clients, strategy, timeout, parts)
+    coordinator.initialize()
+    return coordinator
+
+
+def connect_http_shards(urls: List[str], strategy: str = 'hash', timeout: float = DEFAULT_SHARD_TIMEOUT) -> ShardCoordinator:
+    """Coordinator for shards started with ``sharded_search.py serve`` (listed in shard-id order).
+
+    Hit positions refer to the order of the dataset each shard loaded; set
+    ``coordinator.parts`` only to a catalog loaded from the same files.
+    """
+    coordinator = ShardCoordinator([HttpShardClient(i, url) for i, url in enumerate(urls)], strategy, timeout)
+    coordinator.initialize()
+    return coordinator
+
+
+def coordinator_from_config(spec: str, parts: List[Dict[str, Any]], encoder_backend: str) -> ShardCoordinator:
+    """Build a coordinator from ``INTELLIPART_SHARDS``.
+
+    ``local:4`` or ``local:4:category`` starts local shard processes;
+    a comma-separated list of URLs connects to HTTP shards.
+    """
+    strategy = 'hash'
+    if spec.startswith('local:'):
+        fields = spec.split(':')
+        if len(fields) > 2:
+            strategy = fields[2]
+        return start_local_shards(parts, int(fields[1]), strategy, encoder_backend)
+    if ';' in spec:
+        spec, strategy = spec.split(';', 1)
+    coordinator = connect_http_shards([u.strip() for u in spec.split(',') if u.strip()], strategy)
+    coordinator.parts = parts
+    return coordinator
+
+
+def main():
+    from build_embeddings import load_parts, DEFAULT_DATASET
+
+    parser = argparse.ArgumentParser(description="Sharded scatter-gather search")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help="Serve one shard over HTTP")
+    serve.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)])
+    serve.add_argument('--shard-id', type=int, required=True)
+    serve.add_argument('--num-shards', type=int, required=True)
+    serve.add_argument('--strategy', choices=PARTITION_STRATEGIES, default='hash')
+    serve.add_argument('--backend', default='hashing')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=5101)
+    demo = sub.add_parser('demo', help="Start local shard processes and run sample queries")
+    demo.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)])
+    demo.add_argument('--num-shards', type=int, default=4)
+    demo.add_argument('--strategy', choices=PARTITION_STRATEGIES, default='hash')
+    demo.add_argument('--backend', default='hashing')
+    demo.add_argument('--limit', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        members = [(i, p) for i, p in enumerate(load_parts(args.dataset))
+                   if shard_for(p, args.num_shards, args.strategy, i) == args.shard_id]
+        parts = [p for _, p in members]
+        shard = SearchShard(args.shard_id, parts, args.backend, positions=[i for i, _ in members])
+        print(f"🧩 Shard {args.shard_id}/{args.num_shards} serving {len(parts)} parts on {args.host}:{args.port}")
+        create_shard_app(shard).run(host=args.host, port=args.port, threaded=False)
+        return
+
+    parts = load_parts(args.dataset)[:args.limit]
+    coordinator = start_local_shards(parts, args.num_shards, args.strategy, args.backend)
+    try:
+        for query in ["ceramic brake pads", "radiator", "clutch disc", "12V battery"]:
+            result = coordinator.search_detailed(query, top_k=5)
+            names = [(hit['part'].get('name'), hit['shard_id'], round(hit['score'], 3)) for hit in result['results']]
+            print(f"🔍 {query!r} {result['search_time_ms']}ms shards={result['shards']}\n   {names}")
+    finally:
+        coordinator.close()
+
+
+if __name__ == "__main__":
+    main()
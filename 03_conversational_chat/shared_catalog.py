@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+IntelliPart Shared Catalog
+Read-only catalog artifacts opened with mmap so every worker process shares one physical copy
+
+The exporter writes the raw records plus a byte-offset table, compact numeric
+columns, packed facet bitmaps and token posting lists as plain ``.npy`` files.
+Workers memory-map them: pages come from the OS page cache and are never
+copied into the Python heap, so reference counting cannot dirty them the way
+it dirties a forked list of dicts.
+
+Usage:
+    python shared_catalog.py export --output .search_cache/catalog
+    python shared_catalog.py measure --catalog .search_cache/catalog --workers 4
+"""
+
+import argparse
+import bisect
+import gc
+import json
+import mmap
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Sequence
+
+import numpy as np
+
+from catalog_artifacts import catalog_fingerprint, write_json_atomic, EMBEDDINGS_FILE
+from sparse_similarity import create_part_text
+
+# Shared modules (text_normalization) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_normalization import MAX_TERM_LENGTH, NORMALIZATION_VERSION, tokenize
+
+CATALOG_MANIFEST = 'catalog_manifest.json'
+RECORDS_FILE = 'records.jsonl'
+OFFSETS_FILE = 'offsets.npy'
+TERMS_FILE = 'terms.npy'
+POSTINGS_INDPTR_FILE = 'postings_indptr.npy'
+POSTINGS_IDS_FILE = 'postings_ids.npy'
+DEFAULT_CATALOG_DIR = Path(__file__).parent / ".search_cache" / "catalog"
+
+# column name -> candidate source paths (first present value wins)
+NUMERIC_COLUMNS = {
+    'cost_price': (('cost_price',), ('cost',)),
+    'retail_price': (('retail_price',),),
+    'current_stock': (('supply_chain', 'current_stock'), ('stock',)),
+    'quality_score': (('quality', 'quality_score'),),
+}
+FACET_FIELDS = ('category', 'subcategory', 'manufacturer', 'System Name', 'Sub System Name')
+
+
+def _lookup(part: Dict[str, Any], path) -> Any:
+    value = part
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _numeric(part: Dict[str, Any], sources) -> float:
+    for path in sources:
+        value = _lookup(part, path)
+        if value not in (None, ''):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                pass
+    return np.nan
+
+
+def export_shared_catalog(parts: List[Dict[str, Any]], output_dir: str) -> Dict[str, Any]:
+    """Write ``parts`` as memory-mappable artifacts into ``output_dir``."""
+    started = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    n = len(parts)
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    with open(os.path.join(output_dir, RECORDS_FILE), 'wb') as f:
+        for i, part in enumerate(parts):
+            line = json.dumps(part, ensure_ascii=False).encode('utf-8') + b'\n'
+            f.write(line)
+            offsets[i + 1] = offsets[i] + len(line)
+    np.save(os.path.join(output_dir, OFFSETS_FILE), offsets)
+
+    for name, sources in NUMERIC_COLUMNS.items():
+        column = np.fromiter((_numeric(p, sources) for p in parts), dtype=np.float32, count=n)
+        np.save(os.path.join(output_dir, f"col_{name}.npy"), column)
+
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = defaultdict(list)
+        for i, part in enumerate(parts):
+            value = part.get(field)
+            if isinstance(value, str) and value:
+                rows[value].append(i)
+        if not rows:
+            continue
+        values = sorted(rows)
+        bits = np.zeros((len(values), n), dtype=bool)
+        for row, value in enumerate(values):
+            bits[row, rows[value]] = True
+        np.save(os.path.join(output_dir, f"facet_{field.replace(' ', '_')}.npy"), np.packbits(bits, axis=1))
+        facets[field] = values
+
+    postings = defaultdict(set)
+    for i, part in enumerate(parts):
+        for term in tokenize(create_part_text(part)):
+            postings[term].add(i)
+    terms = sorted(postings)
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    for t, term in enumerate(terms):
+        indptr[t + 1] = indptr[t] + len(postings[term])
+    ids = np.empty(indptr[-1], dtype=np.int32)
+    for t, term in enumerate(terms):
+        ids[indptr[t]:indptr[t + 1]] = sorted(postings[term])
+    np.save(os.path.join(output_dir, TERMS_FILE), np.array(terms, dtype=f'<U{MAX_TERM_LENGTH}'))
+    np.save(os.path.join(output_dir, POSTINGS_INDPTR_FILE), indptr)
+    np.save(os.path.join(output_dir, POSTINGS_IDS_FILE), ids)
+
+    manifest = {
+        'fingerprint': catalog_fingerprint(parts),
+        'count': n,
+        'columns': list(NUMERIC_COLUMNS),
+        'facets': facets,
+        'terms': len(terms),
+        'normalization': NORMALIZATION_VERSION,
+        'complete': True,
+        'build_seconds': round(time.time() - started, 2),
+    }
+    write_json_atomic(os.path.join(output_dir, CATALOG_MANIFEST), manifest)
+    print(f"📦 Shared catalog: {n} parts, {len(terms)} terms, {len(facets)} facets "
+          f"in {manifest['build_seconds']}s -> {output_dir}")
+    return manifest
+
+
+class SharedPartStore(Sequence):
+    """List-like view of the records file; each access decodes one JSON line from the mapping."""
+
+    def __init__(self, records_path: str, offsets: np.ndarray):
+        self._file = open(records_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return json.loads(self._map[start:end])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class SharedCatalog:
+    """Memory-mapped catalog: part records, numeric columns, facet bitmaps and postings."""
+
+    def __init__(self, catalog_dir: str, manifest: Dict[str, Any]):
+        self.catalog_dir = catalog_dir
+        self.manifest = manifest
+        self.count = manifest['count']
+        load = lambda name: np.load(os.path.join(catalog_dir, name), mmap_mode='r')
+        self.parts = SharedPartStore(os.path.join(catalog_dir, RECORDS_FILE), load(OFFSETS_FILE))
+        self.columns = {name: load(f"col_{name}.npy") for name in manifest['columns']}
+        self.facet_values = manifest['facets']
+        self._facets = {field: load(f"facet_{field.replace(' ', '_')}.npy") for field in self.facet_values}
+        self.terms = load(TERMS_FILE)
+        self._indptr = load(POSTINGS_INDPTR_FILE)
+        self._ids = load(POSTINGS_IDS_FILE)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def facet_ids(self, field: str, value: str) -> np.ndarray:
+        """Part positions whose ``field`` equals ``value``."""
+        values = self.facet_values.get(field, [])
+        row = bisect.bisect_left(values, value)
+        if row >= len(values) or values[row] != value:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.unpackbits(self._facets[field][row], count=self.count))
+
+    def term_ids(self, term: str) -> np.ndarray:
+        t = int(np.searchsorted(self.terms, term))
+        if t >= len(self.terms) or self.terms[t] != term:
+            return np.empty(0, dtype=np.int32)
+        return self._ids[self._indptr[t]:self._indptr[t + 1]]
+
+    def term_counts(self) -> Dict[str, int]:
+        """Number of parts containing each exported term."""
+        lengths = np.diff(self._indptr)
+        return {str(term): int(n) for term, n in zip(self.terms, lengths)}
+
+    def prefix_ids(self, prefix: str) -> np.ndarray:
+        lo = int(np.searchsorted(self.terms, prefix))
+        hi = int(np.searchsorted(self.terms, prefix + '￿'))
+        if lo >= hi:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(self._ids[self._indptr[lo]:self._indptr[hi]])
+
+    def candidates(self, query: str, match_all: bool = True) -> Optional[np.ndarray]:
+        """Parts containing every query token (the last one as a prefix), or None for token-less queries.
+
+        A superset of token-aligned substring matches, used to avoid
+        decoding every record when engines scan for literal hits. With
+        ``match_all=False`` any token (as a prefix) is enough.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        if not match_all:
+            return np.unique(np.concatenate([self.prefix_ids(t) for t in tokens]))
+        result = self.prefix_ids(tokens[-1])
+        for token in tokens[:-1]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, self.term_ids(token), assume_unique=True)
+        return result
+
+    def close(self) -> None:
+        self.parts.close()
+
+
+def open_shared_catalog(catalog_dir: Optional[str]) -> Optional[SharedCatalog]:
+    """Open a finished export, or return None when the directory is missing or incomplete."""
+    if not catalog_dir:
+        return None
+    manifest_path = os.path.join(catalog_dir, CATALOG_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not manifest.get('complete'):
+        return None
+    if manifest.get('normalization') != NORMALIZATION_VERSION:
+        # Posting lists were tokenized differently from today's queries
+        print(f"⚠️ Shared catalog in {catalog_dir} predates the current text normalization; re-export it")
+        return None
+    return SharedCatalog(catalog_dir, manifest)
+
+
+# --- Memory measurement ---
+
+def _memory_kb() -> Dict[str, int]:
+    """Rss, Pss and Private_Dirty of this process from /proc (Linux only)."""
+    stats = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Dirty', 'Shared_Clean'):
+                stats[key] = int(rest.split()[0])
+    return stats
+
+
+def _serve_queries(parts, embeddings: np.ndarray, queries: List[str], catalog: Optional[SharedCatalog]) -> int:
+    """Approximate a worker's steady-state access pattern: literal scans, a column
+    aggregate and a full embedding product per query."""
+    hits = 0
+    for query in queries:
+        q = query.lower()
+        if catalog is not None:
+            ids = catalog.candidates(q)
+            scanned = (parts[int(i)] for i in (ids if ids is not None else range(len(parts))))
+            float(np.nansum(catalog.column('cost_price')))
+        else:
+            scanned = parts
+            sum(float(p.get('cost_price') or 0) for p in parts)
+        hits += sum(1 for p in scanned if any(isinstance(v, str) and q in v.lower() for v in p.values()))
+        int(np.argmax(embeddings @ embeddings[0]))
+    return hits
+
+
+def _worker(mode: str, catalog_dir: str, dataset: List[str], embeddings_path: str, queries: List[str],
+            preloaded, write_fd: int, go_fd: int) -> None:
+    if mode == 'per_worker_load':
+        from build_embeddings import load_parts
+        parts = load_parts(dataset)
+        embeddings = np.load(embeddings_path)
+        catalog = None
+    elif mode == 'preload_fork':
+        parts, embeddings = preloaded
+        catalog = None
+    else:
+        catalog = open_shared_catalog(catalog_dir)
+        parts, embeddings = catalog.parts, np.load(embeddings_path, mmap_mode='r')
+    _serve_queries(parts, embeddings, queries, catalog)
+    # Measure only once every worker is alive so Pss splits shared pages between them
+    os.write(write_fd, b'R')
+    os.read(go_fd, 1)
+    os.write(write_fd, json.dumps(_memory_kb()).encode())
+    os._exit(0)
+
+
+def measure_worker_memory(catalog_dir: str, dataset: List[str], embeddings_dir: str,
+                          workers: int = 4, queries: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Fork ``workers`` processes per mode and report their mean memory after serving queries.
+
+    Modes: ``per_worker_load`` (every worker parses the dataset itself),
+    ``preload_fork`` (parent parses once, gc.freeze(), then forks) and
+    ``shared_mmap`` (workers map the exported artifacts).
+    """
+    from build_embeddings import load_parts
+    queries = queries or ["brake pads", "radiator", "clutch disc", "fuel pump", "battery"]
+    embeddings_path = os.path.join(embeddings_dir, EMBEDDINGS_FILE)
+    report = {'workers': workers, 'modes': {}}
+    for mode in ('per_worker_load', 'preload_fork', 'shared_mmap'):
+        preloaded = None
+        if mode == 'preload_fork':
+            preloaded = (load_parts(dataset), np.load(embeddings_path))
+            gc.collect()
+            gc.freeze()
+        go_r, go_w = os.pipe()
+        children = []
+        for _ in range(workers):
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                _worker(mode, catalog_dir, dataset, embeddings_path, queries, preloaded, write_fd, go_r)
+            os.close(write_fd)
+            children.append((pid, read_fd))
+        for _, read_fd in children:
+            os.read(read_fd, 1)
+        os.write(go_w, b'G' * workers)
+        samples = []
+        for pid, read_fd in children:
+            samples.append(json.loads(os.read(read_fd, 4096)))
+            os.close(read_fd)
+            os.waitpid(pid, 0)
+        os.close(go_r)
+        os.close(go_w)
+        if preloaded is not None:
+            gc.unfreeze()
+            del preloaded
+            gc.collect()
+        report['modes'][mode] = {key: round(sum(s[key] for s in samples) / len(samples) / 1024, 1)
+                                 for key in samples[0]}
+        print(f"📏 {mode}: " + ', '.join(f"{k} {v} MB" for k, v in report['modes'][mode].items()))
+    return report
+
+
+def main():
+    from build_embeddings import load_parts, DEFAULT_DATASET, DEFAULT_OUTPUT
+
+    parser = argparse.ArgumentParser(description="Export or measure the shared memory-mapped catalog")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help="Write memory-mappable catalog artifacts")
+    export.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)])
+    export.add_argument('--output', default=str(DEFAULT_CATALOG_DIR))
+    measure = sub.add_parser('measure', help="Compare per-worker memory across loading modes")
+    measure.add_argument('--dataset', nargs='+', default=[str(DEFAULT_DATASET)])
+    measure.add_argument('--catalog', default=str(DEFAULT_CATALOG_DIR))
+    measure.add_argument('--embeddings', default=str(DEFAULT_OUTPUT))
+    measure.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_shared_catalog(load_parts(args.dataset), args.output)
+    else:
+        print(json.dumps(measure_worker_memory(args.catalog, args.dataset, args.embeddings, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
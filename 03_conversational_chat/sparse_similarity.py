@@ -0,0 +1,151 @@
+"""
+IntelliPart Sparse Similarity Search
+Offline TF-IDF engine on sparse matrices with top-k selection and a persisted artifact
+"""
+
+import glob
+import os
+import pickle
+import sys
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from catalog_artifacts import catalog_fingerprint
+
+# Shared modules (text_normalization) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_normalization import NORMALIZATION_VERSION, normalize, part_search_text
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.search_cache')
+
+
+def create_part_text(part: Dict[str, Any]) -> str:
+    """Flatten the text-bearing attributes of a part into one normalized string."""
+    return part_search_text(part)
+
+
+class SparseTfidfSearch:
+    """TF-IDF similarity over a CSR matrix.
+
+    Rows are L2 normalized by the vectorizer, so a sparse matrix-vector product
+    gives cosine similarity directly. Only the non-zero scores are considered
+    and the top k are picked with ``argpartition`` rather than a full sort.
+    The fitted vectorizer and matrix are persisted under the catalog
+    fingerprint (a digest of every record) and reused while it matches;
+    saving one removes the pairs left behind by earlier catalogs.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]], analyzer: str = 'word',
+                 artifact_dir: Optional[str] = DEFAULT_ARTIFACT_DIR):
+        self.parts = parts
+        self.analyzer = analyzer
+        self.artifact_dir = artifact_dir
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.matrix: Optional[sparse.csr_matrix] = None
+        self.fingerprint = catalog_fingerprint(parts)
+
+        if not self._load_artifact():
+            self._build()
+            self._save_artifact()
+        print(f"🧮 Sparse TF-IDF search ready: {self.matrix.shape[0]} parts x {self.matrix.shape[1]} terms")
+
+    def _make_vectorizer(self) -> TfidfVectorizer:
+        if self.analyzer == 'char':
+            return TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 4), min_df=2,
+                                   sublinear_tf=True, dtype=np.float32)
+        return TfidfVectorizer(analyzer='word', ngram_range=(1, 2), min_df=1, max_df=0.95,
+                               token_pattern=r'(?u)\b\w[\w.]*\b', sublinear_tf=True, dtype=np.float32)
+
+    def _build(self) -> None:
+        start_time = time.time()
+        texts = [create_part_text(p) for p in self.parts]
+        self.vectorizer = self._make_vectorizer()
+        self.matrix = self.vectorizer.fit_transform(texts).tocsr()
+        print(f"🔄 TF-IDF matrix built in {time.time() - start_time:.2f}s")
+
+    def _artifact_paths(self) -> Tuple[str, str]:
+        # One pair of files per catalog and analyzer, named so stale catalogs' pairs can be found
+        base = os.path.join(self.artifact_dir, f"tfidf_{self.analyzer}_{self.fingerprint[:16]}")
+        return base + '_vectorizer.pkl', base + '_matrix.npz'
+
+    def _load_artifact(self) -> bool:
+        if not self.artifact_dir:
+            return False
+        vec_path, matrix_path = self._artifact_paths()
+        if not (os.path.exists(vec_path) and os.path.exists(matrix_path)):
+            return False
+        try:
+            with open(vec_path, 'rb') as f:
+                saved = pickle.load(f)
+            if (saved.get('fingerprint') != self.fingerprint
+                    or saved.get('normalization') != NORMALIZATION_VERSION):
+                return False
+            self.vectorizer = saved['vectorizer']
+            self.matrix = sparse.load_npz(matrix_path).tocsr()
+            return True
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable TF-IDF artifact: {e}")
+            return False
+
+    def _save_artifact(self) -> None:
+        if not self.artifact_dir:
+            return
+        try:
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            vec_path, matrix_path = self._artifact_paths()
+            with open(vec_path, 'wb') as f:
+                pickle.dump({'fingerprint': self.fingerprint, 'normalization': NORMALIZATION_VERSION,
+                             'vectorizer': self.vectorizer}, f)
+            sparse.save_npz(matrix_path, self.matrix)
+        except OSError as e:
+            print(f"⚠️ Could not persist TF-IDF artifact: {e}")
+            return
+        self._remove_stale_artifacts()
+
+    def _remove_stale_artifacts(self) -> None:
+        """Delete artifacts of other catalog fingerprints, so the cache does not grow with every dataset change."""
+        current = f"_{self.fingerprint[:16]}_"
+        removed = 0
+        for path in glob.glob(os.path.join(self.artifact_dir, 'tfidf_*')):
+            if current in os.path.basename(path):
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"🧹 Removed {removed} stale TF-IDF artifact file(s)")
+
+    def top_k(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Return ``(part_index, cosine)`` pairs for the k best non-zero matches."""
+        query_vec = self.vectorizer.transform([normalize(query)])
+        if query_vec.nnz == 0:
+            return []
+        scores = (self.matrix @ query_vec.T).tocoo()
+        if scores.nnz == 0:
+            return []
+        rows, values = scores.row, scores.data
+        if len(values) > k:
+            top = np.argpartition(-values, k - 1)[:k]
+            rows, values = rows[top], values[top]
+        order = np.argsort(-values)
+        return [(int(rows[i]), float(values[i])) for i in order]
+
+    def search(self, query: str, limit: int = 10) -> Dict[str, Any]:
+        """Search interface compatible with the archived LightweightAISearch."""
+        start_time = time.time()
+        results = []
+        for idx, score in self.top_k(query, limit):
+            part = dict(self.parts[idx])
+            part['similarity_score'] = round(score, 4)
+            results.append(part)
+        return {
+            'query': query,
+            'results': results,
+            'search_time_ms': round((time.time() - start_time) * 1000, 2)
+        }
@@ -0,0 +1,319 @@
+"""
+IntelliPart Technical Spec Index
+Sorted numeric columns over ``technical_specs`` and a parser for range expressions such as "weight under 5 kg"
+"""
+
+import math
+import re
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
+
+# column -> (dimension, candidate source paths, names users call it); values are stored in the
+# column's base unit (mm, kg, degC, bar, V, A, BTU/h)
+SPEC_COLUMNS = {
+    'length_mm': ('length', (('technical_specs', 'length_mm'), ('length_mm',)), ('length',)),
+    'width_mm': ('length', (('technical_specs', 'width_mm'), ('width_mm',)), ('width',)),
+    'height_mm': ('length', (('technical_specs', 'height_mm'), ('height_mm',)), ('height',)),
+    'weight_kg': ('mass', (('technical_specs', 'weight_kg'), ('weight_kg',), ('weight',)),
+                  ('weight', 'weighs', 'weighing', 'mass')),
+    'operating_temp_min': ('temperature', (('technical_specs', 'operating_temp_min'),),
+                           ('minimum operating temperature', 'min operating temperature', 'min temp',
+                            'minimum temperature', 'min temperature')),
+    'operating_temp_max': ('temperature', (('technical_specs', 'operating_temp_max'),),
+                           ('operating temperature', 'maximum operating temperature', 'max operating temperature',
+                            'max temp', 'maximum temperature', 'max temperature', 'temperature', 'temp')),
+    'pressure_rating_bar': ('pressure', (('technical_specs', 'pressure_rating_bar'), ('pressure_rating',)),
+                            ('pressure rating', 'pressure')),
+    'voltage_rating': ('voltage', (('technical_specs', 'voltage_rating'), ('voltage',)),
+                       ('voltage rating', 'voltage', 'volts')),
+    'current_rating_amp': ('current', (('technical_specs', 'current_rating_amp'), ('current_rating',)),
+                           ('current rating', 'current', 'amperage')),
+    'friction_coefficient': ('ratio', (('technical_specs', 'friction_coefficient'), ('friction_coefficient',)),
+                             ('friction coefficient', 'coefficient of friction', 'friction')),
+    'cooling_capacity_btu': ('heat', (('technical_specs', 'cooling_capacity_btu'), ('cooling_capacity_btu',),
+                                      ('cooling_capacity',)),
+                             ('cooling capacity', 'capacity')),
+}
+
+# unit spelling -> (dimension, factor to base unit, offset); base = value * factor + offset
+UNITS = {
+    'mm': ('length', 1.0, 0.0), 'millimeter': ('length', 1.0, 0.0), 'millimeters': ('length', 1.0, 0.0),
+    'cm': ('length', 10.0, 0.0), 'm': ('length', 1000.0, 0.0), 'meter': ('length', 1000.0, 0.0),
+    'meters': ('length', 1000.0, 0.0), 'in': ('length', 25.4, 0.0), 'inch': ('length', 25.4, 0.0),
+    'inches': ('length', 25.4, 0.0),
+    'kg': ('mass', 1.0, 0.0), 'kgs': ('mass', 1.0, 0.0), 'kilo': ('mass', 1.0, 0.0), 'kilos': ('mass', 1.0, 0.0),
+    'kilogram': ('mass', 1.0, 0.0), 'kilograms': ('mass', 1.0, 0.0), 'g': ('mass', 0.001, 0.0),
+    'gram': ('mass', 0.001, 0.0), 'grams': ('mass', 0.001, 0.0), 'lb': ('mass', 0.45359237, 0.0),
+    'lbs': ('mass', 0.45359237, 0.0), 'pound': ('mass', 0.45359237, 0.0), 'pounds': ('mass', 0.45359237, 0.0),
+    '°c': ('temperature', 1.0, 0.0), 'c': ('temperature', 1.0, 0.0), 'deg c': ('temperature', 1.0, 0.0),
+    'celsius': ('temperature', 1.0, 0.0), 'degrees': ('temperature', 1.0, 0.0),
+    '°f': ('temperature', 5.0 / 9.0, -160.0 / 9.0), 'f': ('temperature', 5.0 / 9.0, -160.0 / 9.0),
+    'fahrenheit': ('temperature', 5.0 / 9.0, -160.0 / 9.0),
+    'bar': ('pressure', 1.0, 0.0), 'psi': ('pressure', 0.0689476, 0.0), 'kpa': ('pressure', 0.01, 0.0),
+    'mpa': ('pressure', 10.0, 0.0),
+    'v': ('voltage', 1.0, 0.0), 'volt': ('voltage', 1.0, 0.0), 'volts': ('voltage', 1.0, 0.0),
+    'a': ('current', 1.0, 0.0), 'amp': ('current', 1.0, 0.0), 'amps': ('current', 1.0, 0.0),
+    'ampere': ('current', 1.0, 0.0), 'amperes': ('current', 1.0, 0.0),
+    'btu': ('heat', 1.0, 0.0), 'btu/h': ('heat', 1.0, 0.0), 'btu/hr': ('heat', 1.0, 0.0),
+}
+
+# A bare unit identifies the column when the query names no attribute ("under 5 kg")
+UNIT_DEFAULT_COLUMNS = {
+    'mass': 'weight_kg', 'temperature': 'operating_temp_max', 'pressure': 'pressure_rating_bar',
+    'voltage': 'voltage_rating', 'current': 'current_rating_amp', 'heat': 'cooling_capacity_btu',
+}
+
+# comparator phrase -> operator
+COMPARATORS = {
+    'greater than or equal to': '>=', 'more than or equal to': '>=', 'at least': '>=', 'no less than': '>=',
+    'minimum': '>=', 'min': '>=', 'from': '>=', '>=': '>=', '=>': '>=',
+    'less than or equal to': '<=', 'at most': '<=', 'no more than': '<=', 'up to': '<=', 'upto': '<=',
+    'maximum': '<=', 'max': '<=', 'within': '<=', '<=': '<=', '=<': '<=',
+    'greater than': '>', 'more than': '>', 'higher than': '>', 'over': '>', 'above': '>', 'exceeding': '>',
+    '>': '>',
+    'less than': '<', 'lower than': '<', 'under': '<', 'below': '<', '<': '<',
+    'around': '~', 'about': '~', 'approximately': '~', 'approx': '~', 'roughly': '~', '~': '~',
+    'between': 'between', 'of': '=', 'exactly': '=', 'is': '=', '=': '=', ':': '=',
+}
+APPROXIMATE_TOLERANCE = 0.1
+
+
+def _alternation(phrases: Iterable[str]) -> str:
+    # Longest first so 'max temp' wins over 'max' and 'kg' over 'g'
+    return '|'.join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True))
+
+
+_ALIASES = {alias: column for column, (_, _, aliases) in SPEC_COLUMNS.items() for alias in aliases}
+# '15,000' is fifteen thousand; decimals use a point
+_NUMBER = r'-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+# A unit ends the word: "2015 a4", "2 f150" and "3 v-belts" carry no unit. A hyphen
+# followed by a number still separates a range ("10kg-20kg")
+_UNIT_END = r'(?!\w|-[^\W\d])'
+_SPEC_EXPRESSION = re.compile(
+    r'(?:\b(?P<attr>' + _alternation(_ALIASES) + r')\b(?:\s+(?:rating|capacity|coefficient))?'
+    r'(?:\s+(?:is|of|should\s+be|must\s+be))?\s*)?'
+    r'(?P<cmp>(?<![\w])(?:' + _alternation(c for c in COMPARATORS if c[0].isalpha()) + r')\b|'
+    + _alternation(c for c in COMPARATORS if not c[0].isalpha()) + r')?\s*'
+    r'(?<![\w.$₹])(?P<low>' + _NUMBER + r')\s*(?P<unit>(?:' + _alternation(UNITS) + r')' + _UNIT_END + r')?'
+    r'(?:\s*(?:and|to|-|–)\s*(?P<high>' + _NUMBER + r')\s*(?P<unit2>(?:' + _alternation(UNITS) + r')' + _UNIT_END + r')?)?',
+    re.IGNORECASE)
+
+
+def _lookup(part: Dict[str, Any], path) -> Any:
+    value = part
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+_LEADING_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def spec_value(part: Dict[str, Any], column: str) -> float:
+    """Numeric value of ``column`` for one part ('12V' -> 12.0), NaN when absent."""
+    for path in SPEC_COLUMNS[column][1]:
+        value = _lookup(part, path)
+        if value is None or value == '':
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        match = _LEADING_NUMBER.search(str(value))
+        if match:
+            return float(match.group())
+    return math.nan
+
+
+class SpecPredicate:
+    """``low <= column <= high`` (each bound optional and inclusive or strict), in the column's base unit."""
+
+    __slots__ = ('column', 'low', 'high', 'include_low', 'include_high', 'text')
+
+    def __init__(self, column: str, low: float = -math.inf, high: float = math.inf,
+                 include_low: bool = True, include_high: bool = True, text: str = ''):
+        self.column = column
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+        self.text = text
+
+    def matches(self, value: float) -> bool:
+        if math.isnan(value):
+            return False
+        if value < self.low or (value == self.low and not self.include_low):
+            return False
+        if value > self.high or (value == self.high and not self.include_high):
+            return False
+        return True
+
+    def describe(self) -> str:
+        name = self.column.replace('_', ' ')
+        if self.low == -math.inf:
+            return f"{name} {'<=' if self.include_high else '<'} {self.high:g}"
+        if self.high == math.inf:
+            return f"{name} {'>=' if self.include_low else '>'} {self.low:g}"
+        return f"{name} {self.low:g}-{self.high:g}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'column': self.column,
+            'low': None if self.low == -math.inf else self.low,
+            'high': None if self.high == math.inf else self.high,
+            'include_low': self.include_low,
+            'include_high': self.include_high,
+            'text': self.text,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SpecPredicate':
+        low, high = data.get('low'), data.get('high')
+        return cls(data['column'], -math.inf if low is None else float(low), math.inf if high is None else float(high),
+                   data.get('include_low', True), data.get('include_high', True), data.get('text', ''))
+
+
+def _to_base(value: float, unit: Optional[str], dimension: str) -> Optional[float]:
+    if not unit:
+        return value
+    dim, factor, offset = UNITS[unit.lower()]
+    if dim != dimension:
+        return None
+    return value * factor + offset
+
+
+def _unit(match: 're.Match', group: str, number: str) -> Optional[str]:
+    """Unit captured in ``group``; a one-letter unit ("a", "v", "f") counts only when written
+    against its number ("12V") or after an attribute name ("voltage 12 v")."""
+    unit = match.group(group)
+    if unit and len(unit) == 1 and not match.group('attr') and match.start(group) != match.end(number):
+        return None
+    return unit
+
+
+def _number(text: str) -> float:
+    return float(text.replace(',', ''))
+
+
+def _decimals(number: str) -> int:
+    return len(number.partition('.')[2])
+
+
+def parse_spec_expressions(query: str) -> List[SpecPredicate]:
+    """Range predicates for every "<attribute> <comparator> <number> <unit>" phrase in ``query``.
+
+    A number becomes a predicate only when an attribute name or a unit says
+    which column it constrains, so prices, years and part numbers are left
+    alone. "between 10 and 20 kg" / "10-20 kg" are ranges; "of 5 kg" matches
+    at the precision given (4.5-5.5); "around" allows 10% either way. A range
+    whose bounds are in different dimensions ("10 kg to 20 mm") is skipped.
+    """
+    predicates = []
+    for match in _SPEC_EXPRESSION.finditer(query):
+        attr = match.group('attr')
+        unit1, unit2 = _unit(match, 'unit', 'low'), _unit(match, 'unit2', 'high')
+        unit = unit1 or unit2
+        if attr:
+            column = _ALIASES[attr.lower()]
+        elif unit:
+            column = UNIT_DEFAULT_COLUMNS.get(UNITS[unit.lower()][0])
+        else:
+            column = None
+        if column is None:
+            continue
+        dimension = SPEC_COLUMNS[column][0]
+        if unit and UNITS[unit.lower()][0] != dimension:
+            continue
+        low_text, high_text = match.group('low'), match.group('high')
+        low = _to_base(_number(low_text), unit, dimension)
+        if low is None:
+            continue
+        op = COMPARATORS.get((match.group('cmp') or '').lower(), '=' if not high_text else 'between')
+        text = match.group(0).strip()
+        if high_text:
+            high = _to_base(_number(high_text), unit2 or unit, dimension)
+            if high is None:
+                continue
+            low, high = min(low, high), max(low, high)
+            predicates.append(SpecPredicate(column, low, high, text=text))
+        elif op == '>':
+            predicates.append(SpecPredicate(column, low=low, include_low=False, text=text))
+        elif op == '>=':
+            predicates.append(SpecPredicate(column, low=low, text=text))
+        elif op == '<':
+            predicates.append(SpecPredicate(column, high=low, include_high=False, text=text))
+        elif op == '<=':
+            predicates.append(SpecPredicate(column, high=low, text=text))
+        elif op == '~':
+            margin = abs(low) * APPROXIMATE_TOLERANCE
+            predicates.append(SpecPredicate(column, low - margin, low + margin, text=text))
+        elif op == '=':
+            half_step = 0.5 * 10 ** -_decimals(low_text) * (UNITS[unit.lower()][1] if unit else 1.0)
+            predicates.append(SpecPredicate(column, low - half_step, low + half_step,
+                                            include_high=False, text=text))
+    return predicates
+
+
+class SpecRangeIndex:
+    """One sorted float32 column per spec plus the part positions in that order.
+
+    A range predicate is two ``searchsorted`` calls on the sorted values and
+    a slice of the position array, so "weight under 5 kg" over the whole
+    catalog costs O(log n + matches). Parts without a value (NaN) sort last
+    and are excluded from every range.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]], columns: Iterable[str] = SPEC_COLUMNS):
+        self.count = len(parts)
+        self.values: Dict[str, np.ndarray] = {}
+        self.order: Dict[str, np.ndarray] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        for column in columns:
+            values = np.fromiter((spec_value(p, column) for p in parts), dtype=np.float32, count=self.count)
+            present = int(np.count_nonzero(~np.isnan(values)))
+            if present == 0:
+                continue
+            order = np.argsort(values, kind='stable')[:present].astype(np.int32)
+            self.values[column] = values
+            self.order[column] = order
+            self.sorted_values[column] = values[order]
+
+    def range_ids(self, predicate: SpecPredicate) -> np.ndarray:
+        """Sorted part positions satisfying one predicate."""
+        sorted_values = self.sorted_values.get(predicate.column)
+        if sorted_values is None:
+            return np.empty(0, dtype=np.int32)
+        lo = 0 if predicate.low == -math.inf else int(np.searchsorted(
+            sorted_values, np.float32(predicate.low), 'left' if predicate.include_low else 'right'))
+        hi = len(sorted_values) if predicate.high == math.inf else int(np.searchsorted(
+            sorted_values, np.float32(predicate.high), 'right' if predicate.include_high else 'left'))
+        if lo >= hi:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(self.order[predicate.column][lo:hi])
+
+    def resolve(self, predicates: List[SpecPredicate]) -> Optional[np.ndarray]:
+        """Positions satisfying every predicate (sorted), or None when there are no predicates."""
+        if not predicates:
+            return None
+        id_sets = sorted((self.range_ids(p) for p in predicates), key=len)
+        result = id_sets[0]
+        for ids in id_sets[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, ids, assume_unique=True)
+        return result
+
+    def matches(self, idx: int, predicates: List[SpecPredicate]) -> bool:
+        """True if the part at ``idx`` satisfies every predicate."""
+        for predicate in predicates:
+            values = self.values.get(predicate.column)
+            if values is None or not predicate.matches(float(values[idx])):
+                return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {column: {'parts': len(self.order[column]),
+                         'min': round(float(self.sorted_values[column][0]), 4),
+                         'max': round(float(self.sorted_values[column][-1]), 4)}
+                for column in self.order}
@@ -0,0 +1,267 @@
+"""
+IntelliPart Spelling Correction
+Symmetric-delete (SymSpell) dictionary over the catalog vocabulary and hierarchy names
+"""
+
+import os
+import sys
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from query_matcher import INTENT_KEYWORDS, FILTER_KEYWORDS, DEFAULT_MATERIALS
+
+# Shared modules (text_normalization, hierarchy_index) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_normalization import STOP_WORDS, iter_token_spans, part_text_values, tokenize
+from hierarchy_index import load_hierarchy_rows
+
+try:
+    from rapidfuzz.distance import OSA
+except ImportError:
+    OSA = None
+
+MAX_EDIT_DISTANCE = 2
+# Tokens shorter than this only get single-typo corrections
+LONG_TOKEN_LENGTH = 8
+# The winning term must be this many times as frequent as any other term at the same distance
+CONFIDENCE_RATIO = 2.0
+PREFIX_LENGTH = 7
+LOOKUP_CACHE_SIZE = 16384
+
+# Bundled common-English list, plus the system dictionary and INTELLIPART_SPELLING_WORDLIST when present
+ENGLISH_WORDS_FILE = Path(__file__).parent / "english_words.txt"
+SYSTEM_WORDS_FILE = Path("/usr/share/dict/words")
+# Inflections checked against the word list ("looking" -> "look", "sellers" -> "seller")
+_SUFFIXES = (('ies', 'y'), ('ing', ''), ('ing', 'e'), ('ers', ''), ('es', ''), ('ed', ''), ('ed', 'e'),
+             ('er', ''), ('ly', ''), ('s', ''))
+
+# Words users type around part names; known words are never "corrected" into catalog terms
+QUERY_WORDS = (
+    'part', 'parts', 'all', 'any', 'show', 'find', 'search', 'list', 'compatible', 'fits', 'fit',
+    'under', 'over', 'below', 'above', 'less', 'more', 'than', 'between', 'and', 'or', 'not',
+    'cheapest', 'cheaper', 'expensive', 'lowest', 'highest', 'price', 'prices', 'cost', 'stock',
+    'material', 'made', 'what', 'which', 'where', 'how', 'many', 'much', 'is', 'are', 'my', 'car',
+    'vehicle', 'model', 'year', 'front', 'rear', 'left', 'right', 'new', 'used', 'details',
+)
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """Every string reachable from ``word`` by deleting up to ``max_distance`` characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - results
+        results |= frontier
+    return results
+
+
+def _osa_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once), capped at max_distance + 1."""
+    if OSA is not None:
+        return OSA.distance(a, b, score_cutoff=max_distance)
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def load_english_words(extra_path: Optional[str] = None) -> Set[str]:
+    """Lowercase alphabetic words from the bundled list, the system dictionary and ``extra_path``."""
+    words: Set[str] = set()
+    extra_path = extra_path or os.environ.get('INTELLIPART_SPELLING_WORDLIST')
+    for path in (ENGLISH_WORDS_FILE, SYSTEM_WORDS_FILE, extra_path):
+        if not path or not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            words.update(w for w in (line.strip().lower() for line in f) if w.isalpha())
+    return words
+
+
+def load_hierarchy_names(csv_path: Optional[str] = None) -> List[str]:
+    """System / sub system / sub sub system names from the hierarchy CSV (one entry per row and level)."""
+    return [name for levels in load_hierarchy_rows(csv_path) for _, name in levels]
+
+
+class Correction:
+    """A corrected query and the (original, corrected) token pairs that changed.
+
+    ``applied`` is set by callers that actually searched with it rather than
+    only offering it as a suggestion.
+    """
+
+    __slots__ = ('original', 'text', 'changes', 'applied')
+
+    def __init__(self, original: str, text: str, changes: List[Tuple[str, str]]):
+        self.original = original
+        self.text = text
+        self.changes = changes
+        self.applied = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'original': self.original, 'corrected': self.text, 'applied': self.applied,
+                'changes': [{'from': a, 'to': b} for a, b in self.changes]}
+
+
+class SpellingCorrector:
+    """Symmetric-delete spelling correction with term frequencies.
+
+    Every vocabulary term is indexed under all strings reachable by deleting
+    up to ``max_edit_distance`` characters from its first ``prefix_length``
+    characters. A misspelled token generates its own deletes and looks them
+    up, so candidates come from a handful of dict probes instead of a scan
+    over the catalog; only those candidates get an edit-distance check.
+
+    Corrections are conservative: ordinary English words (``known_words``)
+    are left alone, tokens under LONG_TOKEN_LENGTH characters tolerate one
+    typo, and the closest term must clearly out-count any other term at the
+    same distance ("bull" is not rewritten when "bulk" is as plausible).
+    """
+
+    def __init__(self, term_counts: Dict[str, int], max_edit_distance: int = MAX_EDIT_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH, known_words: Iterable[str] = ()):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        # Valid words that are never corrected but are not correction targets either
+        self.known_words = frozenset(known_words)
+        self.counts: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = defaultdict(list)
+        self._lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._lookup_uncached)
+        for term, count in term_counts.items():
+            self._index_term(term, count)
+
+    @classmethod
+    def from_catalog(cls, parts: Iterable[Dict[str, Any]], shared=None,
+                     hierarchy_csv: Optional[str] = None) -> 'SpellingCorrector':
+        """Vocabulary of the catalog's search text, the hierarchy CSV and common query words.
+
+        With a SharedCatalog the exported terms and posting-list lengths are
+        used directly instead of re-tokenizing every record.
+        """
+        counts: Counter = Counter()
+        if shared is not None:
+            counts.update(shared.term_counts())
+        else:
+            # Field values repeat across parts: count them first, tokenize each distinct value once
+            values = Counter(v if isinstance(v, str) else str(v) for part in parts for v in part_text_values(part))
+            for value, n in values.items():
+                for term in tokenize(value):
+                    counts[term] += n
+        for name in load_hierarchy_names(hierarchy_csv):
+            counts.update(tokenize(name))
+        query_words = set(QUERY_WORDS) | set(STOP_WORDS) | set(DEFAULT_MATERIALS)
+        for _, keywords in INTENT_KEYWORDS:
+            query_words.update(w for k in keywords for w in k.split())
+        for keywords in FILTER_KEYWORDS.values():
+            query_words.update(w for k in keywords for w in k.split())
+        for word in query_words:
+            counts[word] += 1
+        # Identifiers and numbers are resolved by the part-number index, never spell-corrected
+        return cls({t: n for t, n in counts.items() if not any(c.isdigit() for c in t)},
+                   known_words=load_english_words())
+
+    def _index_term(self, term: str, count: int) -> None:
+        if term in self.counts:
+            self.counts[term] += count
+            return
+        self.counts[term] = count
+        for delete in _deletes(term[:self.prefix_length], self.max_edit_distance):
+            self._deletes[delete].append(term)
+
+    def add_term(self, term: str, count: int = 1) -> None:
+        """Add (or count again) one normalized term; cached corrections are dropped."""
+        self._index_term(term, count)
+        self._lookup.cache_clear()
+
+    def _distance_for(self, token: str) -> int:
+        # Words of ordinary length have many real neighbours at distance 2
+        # ("blade" / "brake", "seller" / "filler"); only fix one typo there
+        if len(token) < 3:
+            return 0
+        return 1 if len(token) < LONG_TOKEN_LENGTH else self.max_edit_distance
+
+    def is_known(self, token: str) -> bool:
+        """True for catalog terms and English words, including regular inflections of listed words."""
+        if token in self.counts or token in self.known_words:
+            return True
+        return any(token.endswith(suffix) and len(token) - len(suffix) >= 3
+                   and token[:len(token) - len(suffix)] + stem in self.known_words
+                   for suffix, stem in _SUFFIXES)
+
+    def _lookup_uncached(self, token: str) -> Optional[str]:
+        max_distance = self._distance_for(token)
+        if max_distance == 0:
+            return None
+        candidates = []
+        seen = set()
+        for delete in _deletes(token[:self.prefix_length], max_distance):
+            for term in self._deletes.get(delete, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                if abs(len(term) - len(token)) > max_distance:
+                    continue
+                distance = _osa_distance(token, term, max_distance)
+                if distance > max_distance:
+                    continue
+                candidates.append((distance, -self.counts[term], term))
+        if not candidates:
+            return None
+        candidates.sort()
+        distance, best_count, best = candidates[0]
+        if len(candidates) > 1 and candidates[1][0] == distance and -best_count < CONFIDENCE_RATIO * -candidates[1][1]:
+            # Two comparably common terms are equally close: guessing would often be wrong
+            return None
+        return best
+
+    def lookup(self, token: str) -> Optional[str]:
+        """Best correction for one normalized token, or None when it is known, ambiguous or nothing is close."""
+        if any(c.isdigit() for c in token) or self.is_known(token):
+            return None
+        return self._lookup(token)
+
+    def correct(self, query: str) -> Optional[Correction]:
+        """The query with unknown words replaced by their closest catalog terms, or None if nothing changed.
+
+        Tokens are rewritten in place in the lowercased query, so numbers,
+        units and punctuation ("under $500", "0.4") survive untouched.
+        """
+        lowered = query.lower()
+        pieces = []
+        changes = []
+        end = 0
+        for start, stop, token in iter_token_spans(query):
+            fixed = self.lookup(token)
+            if fixed is None:
+                continue
+            pieces.append(lowered[end:start])
+            pieces.append(fixed)
+            changes.append((token, fixed))
+            end = stop
+        if not changes:
+            return None
+        pieces.append(lowered[end:])
+        return Correction(query, ''.join(pieces), changes)
+
+    def status(self) -> Dict[str, Any]:
+        info = self._lookup.cache_info()
+        return {
+            'terms': len(self.counts),
+            'known_words': len(self.known_words),
+            'delete_keys': len(self._deletes),
+            'max_edit_distance': self.max_edit_distance,
+            'prefix_length': self.prefix_length,
+            'lookup_cache': {'hits': info.hits, 'misses': info.misses, 'size': info.currsize},
+        }
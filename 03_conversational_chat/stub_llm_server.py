@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+IntelliPart Stub LLM Server
+Local stand-in for the Ollama and Gemini HTTP APIs (plain and streamed answers) with configurable
+latency and failures, plus a self-test of the pooled LLM client layer against it
+
+Run it and point the app at it:
+
+    python stub_llm_server.py --port 11500 --latency 0.2 --token-delay 0.05 --fail-rate 0.1
+    INTELLIPART_OLLAMA_URL=http://127.0.0.1:11500 \\
+    INTELLIPART_GEMINI_URL=http://127.0.0.1:11500/v1beta python conversational_web_app.py
+
+or check keep-alive reuse, concurrency limits, retries, deadlines, streaming and cancellation:
+
+    python stub_llm_server.py --self-test
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from llm_clients import GeminiAPIProvider, LLMError, LLMTimeout, OllamaProvider, RetryPolicy
+
+
+class StubBehaviour:
+    """Knobs and counters shared by every handler thread."""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, fail_first: int = 0, token_delay: float = 0.0):
+        self.latency = latency
+        # Pause between the words of a streamed answer
+        self.token_delay = token_delay
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.failures = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.cancelled = 0
+            self.connections = set()
+
+    def enter(self, client) -> bool:
+        """Count a request; False if it should be answered with a 503."""
+        with self.lock:
+            self.requests += 1
+            self.connections.add(client)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.fail_first > 0 or random.random() < self.fail_rate
+            if self.fail_first > 0:
+                self.fail_first -= 1
+            if fail:
+                self.failures += 1
+            return not fail
+
+    def leave(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def cancel(self) -> None:
+        """A streamed answer's reader hung up before the last word."""
+        with self.lock:
+            self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'requests': self.requests, 'failures': self.failures, 'connections': len(self.connections),
+                    'max_in_flight': self.max_in_flight, 'cancelled': self.cancelled}
+
+
+def stub_answer(prompt: str) -> str:
+    return f"Stub answer to: {' '.join(prompt.split())[:60]}"
+
+
+def stub_tokens(prompt: str):
+    """The stub answer in word-sized pieces that join back to ``stub_answer``."""
+    words = stub_answer(prompt).split(' ')
+    return [word if i == 0 else f' {word}' for i, word in enumerate(words)]
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between calls
+    protocol_version = 'HTTP/1.1'
+    behaviour: StubBehaviour = StubBehaviour()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The caller's deadline passed and it hung up; that is what the deadline check exercises
+            self.close_connection = True
+
+    def _send_stream(self, content_type: str, events) -> None:
+        """Chunked body, one chunk per event; stops when the reader hangs up."""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i, event in enumerate(events):
+                if i:
+                    time.sleep(self.behaviour.token_delay)
+                data = event.encode('utf-8')
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.behaviour.cancel()
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.behaviour.stats())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON'})
+            return
+        if not self.behaviour.enter(self.client_address):
+            self.behaviour.leave()
+            self._send_json(503, {'error': 'stub overloaded'})
+            return
+        try:
+            time.sleep(self.behaviour.latency)
+            path = self.path.split('?')[0]
+            if path == '/api/generate' and payload.get('stream', True):
+                # Ollama streams unless asked not to: one JSON object per line, then a done marker
+                lines = [json.dumps({'model': payload.get('model'), 'response': token, 'done': False}) + '\n'
+                         for token in stub_tokens(payload.get('prompt', ''))]
+                lines.append(json.dumps({'model': payload.get('model'), 'response': '', 'done': True}) + '\n')
+                self._send_stream('application/x-ndjson', lines)
+            elif path == '/api/generate':
+                self._send_json(200, {'model': payload.get('model'), 'response': stub_answer(payload.get('prompt', '')),
+                                      'done': True})
+            elif path.endswith((':generateContent', ':streamGenerateContent')):
+                prompt = ' '.join(p.get('text', '') for c in payload.get('contents', []) for p in c.get('parts', []))
+                if path.endswith(':streamGenerateContent'):
+                    self._send_stream('text/event-stream', [
+                        'data: ' + json.dumps({'candidates': [{'content': {'parts': [{'text': token}]}}]}) + '\r\n\r\n'
+                        for token in stub_tokens(prompt)])
+                else:
+                    self._send_json(200, {'candidates': [{'content': {'parts': [{'text': stub_answer(prompt)}]}}]})
+            else:
+                self._send_json(404, {'error': f'unknown path {self.path}'})
+        finally:
+            self.behaviour.leave()
+
+
+def start_stub_server(port: int = 0, behaviour: StubBehaviour = None):
+    """Serve the stub on a background thread; returns ``(server, base_url)``."""
+    handler = type('Handler', (StubLLMHandler,), {'behaviour': behaviour or StubBehaviour()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-llm', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def self_test() -> bool:
+    behaviour = StubBehaviour()
+    server, base_url = start_stub_server(behaviour=behaviour)
+    results = []
+
+    def check(name: str, ok: bool, detail: Any) -> None:
+        results.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'}  {name}: {detail}")
+
+    try:
+        # Keep-alive: sequential calls share one pooled connection
+        ollama = OllamaProvider(base_url, max_concurrency=2, retry=RetryPolicy(retries=0))
+        for i in range(10):
+            ollama.generate(f'question {i}')
+        stats = behaviour.stats()
+        check('keep-alive reuse', stats['connections'] == 1, f"{stats['requests']} requests over "
+                                                             f"{stats['connections']} connection(s)")
+
+        # Concurrency: eight callers, at most two calls in flight
+        behaviour.reset()
+        behaviour.latency = 0.1
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(ollama.generate, [f'parallel {i}' for i in range(8)]))
+        stats = behaviour.stats()
+        check('concurrency limit', stats['max_in_flight'] <= 2 and len(answers) == 8,
+              f"max {stats['max_in_flight']} in flight over {stats['connections']} connection(s)")
+
+        # Retries: two 503s, then an answer
+        behaviour.reset()
+        behaviour.latency = 0.0
+        behaviour.fail_first = 2
+        retrying = OllamaProvider(base_url, retry=RetryPolicy(retries=3, base_delay=0.01))
+        answer = retrying.generate('retry me')
+        check('retry on 503', answer.startswith('Stub answer') and retrying.stats['retries'] == 2,
+              f"{retrying.stats['retries']} retries, answer {answer!r}")
+
+        # Non-retryable: a 404 fails at once
+        gemini = GeminiAPIProvider('stub-key', base_url=f'{base_url}/v1beta')
+        try:
+            gemini._post('/missing', {}, 1.0)
+            check('no retry on 404', False, 'no error raised')
+        except LLMError as e:
+            check('no retry on 404', not e.retryable, str(e)[:60])
+        check('gemini generateContent', gemini.generate('hello gemini').startswith('Stub answer'),
+              gemini.status()['succeeded'])
+
+        # Deadline: a slow server cannot hold the caller past its budget
+        behaviour.latency = 1.0
+        started = time.monotonic()
+        try:
+            ollama.generate('slow', deadline=0.3)
+            check('deadline', False, 'no error raised')
+        except LLMError as e:
+            elapsed = time.monotonic() - started
+            check('deadline', elapsed < 0.8, f'{type(e).__name__} after {elapsed:.2f}s')
+        behaviour.latency = 0.0
+
+        # Queued callers give up when no slot frees before the deadline
+        behaviour.latency = 0.5
+        narrow = OllamaProvider(base_url, max_concurrency=1, retry=RetryPolicy(retries=0))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(narrow.generate, 'holds the slot')
+            time.sleep(0.05)
+            second = pool.submit(narrow.generate, 'waits', deadline=0.2)
+            try:
+                second.result()
+                check('slot wait deadline', False, 'no error raised')
+            except LLMTimeout as e:
+                check('slot wait deadline', True, str(e)[:60])
+            first.result()
+        behaviour.latency = 0.0
+
+        # Streaming: pieces arrive one by one and join back to the whole answer
+        streamed = list(ollama.stream('stream me'))
+        check('ollama stream', len(streamed) > 1 and ''.join(streamed) == stub_answer('stream me'),
+              f'{len(streamed)} pieces')
+        streamed = list(gemini.stream('stream gemini'))
+        check('gemini stream', len(streamed) > 1 and ''.join(streamed) == stub_answer('stream gemini'),
+              f'{len(streamed)} pieces')
+
+        # Cancellation: closing a stream hangs up on the server and frees the slot at once
+        behaviour.reset()
+        behaviour.token_delay = 0.05
+        pieces = narrow.stream('cancel me after one word')
+        next(pieces)
+        pieces.close()
+        freed = narrow.status()['in_flight'] == 0
+        time.sleep(0.3)
+        stats = behaviour.stats()
+        check('stream cancel', freed and stats['cancelled'] == 1 and narrow.status()['cancelled'] == 1,
+              f"slot freed: {freed}, server saw {stats['cancelled']} hang-up(s)")
+        behaviour.token_delay = 0.0
+    finally:
+        server.shutdown()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub Ollama / Gemini server for exercising the LLM clients')
+    parser.add_argument('--port', type=int, default=11500)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each answer')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds between words of a streamed answer')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--self-test', action='store_true', help='run the client checks against a private server')
+    args = parser.parse_args()
+    if args.self_test:
+        sys.exit(0 if self_test() else 1)
+    server, base_url = start_stub_server(args.port, StubBehaviour(args.latency, args.fail_rate,
+                                                                     token_delay=args.token_delay))
+    print(f"Stub LLM server on {base_url} (Ollama /api/generate, "
+          f"Gemini {base_url}/v1beta/<model>:generateContent and :streamGenerateContent)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+LLM client tests
+Pooled providers against the stub Ollama / Gemini server: keep-alive, limits, retries, timeouts, streaming
+"""
+
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Modules under test live in 03_conversational_chat
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from llm_clients import (GeminiAPIProvider, LLMError, LLMTimeout, OllamaProvider, RetryPolicy,
+                         provider_timeout)
+from stub_llm_server import StubBehaviour, start_stub_server, stub_answer
+
+FAST_RETRY = RetryPolicy(retries=3, base_delay=0.01)
+
+
+@pytest.fixture(scope='module')
+def stub():
+    behaviour = StubBehaviour()
+    server, base_url = start_stub_server(behaviour=behaviour)
+    yield behaviour, base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def behaviour(stub):
+    behaviour = stub[0]
+    behaviour.latency = behaviour.token_delay = behaviour.fail_rate = 0.0
+    behaviour.fail_first = 0
+    behaviour.reset()
+    return behaviour
+
+
+@pytest.fixture
+def base_url(stub):
+    return stub[1]
+
+
+def closed_port_url():
+    """URL of a local port nothing listens on, so connecting is refused."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}'
+
+
+def test_sequential_calls_reuse_one_connection(behaviour, base_url):
+    ollama = OllamaProvider(base_url, retry=RetryPolicy(retries=0))
+    answers = [ollama.generate(f'question {i}') for i in range(5)]
+    assert answers == [stub_answer(f'question {i}') for i in range(5)]
+    assert behaviour.stats()['requests'] == 5
+    assert behaviour.stats()['connections'] == 1
+
+
+def test_concurrency_limit(behaviour, base_url):
+    behaviour.latency = 0.1
+    ollama = OllamaProvider(base_url, max_concurrency=2, retry=RetryPolicy(retries=0))
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        answers = list(pool.map(ollama.generate, [f'parallel {i}' for i in range(6)]))
+    assert len(answers) == 6
+    assert behaviour.stats()['max_in_flight'] <= 2
+    assert ollama.status()['in_flight'] == 0
+
+
+def test_server_errors_are_retried(behaviour, base_url):
+    behaviour.fail_first = 2
+    ollama = OllamaProvider(base_url, retry=FAST_RETRY)
+    assert ollama.generate('retry me') == stub_answer('retry me')
+    assert ollama.stats['retries'] == 2
+    assert behaviour.stats()['requests'] == 3
+
+
+def test_client_errors_are_not_retried(behaviour, base_url):
+    ollama = OllamaProvider(f'{base_url}/no-such-prefix', retry=FAST_RETRY)
+    with pytest.raises(LLMError) as error:
+        ollama.generate('hello')
+    assert 'HTTP 404' in str(error.value)
+    assert not error.value.retryable
+    assert behaviour.stats()['requests'] == 1
+    assert ollama.stats['retries'] == 0
+
+
+def test_read_timeout_is_not_retried(behaviour, base_url):
+    behaviour.latency = 0.5
+    ollama = OllamaProvider(base_url, call_timeout=0.2, retry=FAST_RETRY)
+    started = time.monotonic()
+    with pytest.raises(LLMError) as error:
+        ollama.generate('slow answer')
+    assert not error.value.retryable
+    assert time.monotonic() - started < 0.45
+    assert ollama.stats['retries'] == 0
+    assert behaviour.stats()['requests'] == 1
+
+
+def test_refused_connection_is_retried():
+    ollama = OllamaProvider(closed_port_url(), retry=FAST_RETRY)
+    with pytest.raises(LLMError) as error:
+        ollama.generate('anyone there?')
+    assert error.value.retryable
+    assert ollama.stats['retries'] == 3
+
+
+def test_deadline_bounds_a_slow_call(behaviour, base_url):
+    behaviour.latency = 1.0
+    ollama = OllamaProvider(base_url, retry=FAST_RETRY)
+    started = time.monotonic()
+    with pytest.raises(LLMError):
+        ollama.generate('slow', deadline=0.3)
+    assert time.monotonic() - started < 0.8
+
+
+def test_queued_call_gives_up_at_its_deadline(behaviour, base_url):
+    behaviour.latency = 0.5
+    narrow = OllamaProvider(base_url, max_concurrency=1, retry=RetryPolicy(retries=0))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(narrow.generate, 'holds the slot')
+        time.sleep(0.05)
+        second = pool.submit(narrow.generate, 'waits', deadline=0.2)
+        with pytest.raises(LLMTimeout):
+            second.result()
+        assert first.result() == stub_answer('holds the slot')
+
+
+@pytest.mark.parametrize('kind', ['ollama', 'gemini'])
+def test_stream_pieces_join_to_the_answer(behaviour, base_url, kind):
+    if kind == 'ollama':
+        provider = OllamaProvider(base_url)
+    else:
+        provider = GeminiAPIProvider('stub-key', base_url=f'{base_url}/v1beta')
+    pieces = list(provider.stream('stream me please'))
+    assert len(pieces) > 1
+    assert ''.join(pieces) == stub_answer('stream me please')
+    assert provider.status()['succeeded'] == 1
+
+
+def test_closing_a_stream_hangs_up_and_frees_the_slot(behaviour, base_url):
+    behaviour.token_delay = 0.05
+    ollama = OllamaProvider(base_url, max_concurrency=1)
+    pieces = ollama.stream('cancel me after one word')
+    next(pieces)
+    pieces.close()
+    assert ollama.status()['in_flight'] == 0
+    assert ollama.status()['cancelled'] == 1
+    deadline = time.monotonic() + 2.0
+    while behaviour.stats()['cancelled'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert behaviour.stats()['cancelled'] == 1
+
+
+def test_read_timeouts_are_per_provider(monkeypatch):
+    monkeypatch.delenv('INTELLIPART_LLM_TIMEOUT', raising=False)
+    monkeypatch.delenv('INTELLIPART_OLLAMA_TIMEOUT', raising=False)
+    assert OllamaProvider('http://127.0.0.1:1').call_timeout == 60.0
+    monkeypatch.setenv('INTELLIPART_OLLAMA_TIMEOUT', '90')
+    assert provider_timeout('ollama') == 90.0
+    assert provider_timeout('gemini') != 90.0
@@ -0,0 +1,194 @@
+"""
+Sharded search tests
+Scatter-gather over real local shard processes: merge order, partial results, global IDF, category routing
+"""
+
+import json
+import multiprocessing.util
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Modules under test live in 03_conversational_chat
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sharded_search import (SearchShard, ShardCoordinator, LocalShardClient, partition_parts,
+                            shard_for, start_local_shards)
+
+CATEGORIES = ['Brake System', 'Engine Cooling', 'Clutch Assembly', 'Electrical', 'Suspension']
+COMPONENTS = ['pad', 'disc', 'radiator', 'hose', 'plate', 'battery', 'shock absorber', 'spring']
+
+
+def make_parts(count=60):
+    return [{
+        'part_id': f"P{i:04d}",
+        'name': f"{COMPONENTS[i % len(COMPONENTS)]} {i}",
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'manufacturer': ['Bosch', 'Valeo', 'Lumax'][i % 3],
+        'description': f"{COMPONENTS[(i * 3) % len(COMPONENTS)]} for {['scorpio', 'thar', 'xuv700'][i % 3]}",
+    } for i in range(count)]
+
+
+def reference_shard(parts):
+    """One shard over the whole catalog: its own IDF is the global IDF."""
+    shard = SearchShard(0, parts, 'hashing')
+    coordinator = ShardCoordinator([_InProcessClient(shard)])
+    coordinator.initialize()
+    coordinator.close()
+    return shard
+
+
+class _InProcessClient:
+    def __init__(self, shard):
+        self.shard_id = shard.shard_id
+        self.shard = shard
+
+    def request(self, message, timeout):
+        return self.shard.handle(message)
+
+    def close(self):
+        pass
+
+
+class _StalledClient:
+    """Wraps a shard process so its searches never answer within the coordinator's timeout."""
+
+    def __init__(self, client):
+        self.shard_id = client.shard_id
+        self.client = client
+
+    def request(self, message, timeout):
+        if message.get('op') == 'search':
+            time.sleep(timeout + 1.0)
+        return self.client.request(message, timeout)
+
+    def close(self):
+        self.client.close()
+
+
+def _forked_worker(coordinator, queries, expected, write_fd):
+    """Body of a forked worker: search concurrently, report wrong answers, exit as a worker would."""
+    wrong = 0
+    try:
+        coordinator.start_after_fork()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            answers = list(pool.map(lambda q: coordinator.search_ids(q, top_k=5), queries))
+        wrong = sum(1 for query, answer in zip(queries, answers) if [list(hit) for hit in answer] != expected[query])
+        os.write(write_fd, json.dumps({'wrong': wrong}).encode())
+    except BaseException as e:
+        os.write(write_fd, json.dumps({'error': repr(e)}).encode())
+    finally:
+        # What sys.exit would run: stops this worker's own shards, must leave the parent's alone
+        multiprocessing.util._exit_function()
+        os._exit(0)
+
+
+@pytest.fixture(scope='module')
+def parts():
+    return make_parts()
+
+
+@pytest.fixture(scope='module')
+def hash_coordinator(parts):
+    coordinator = start_local_shards(parts, 3, 'hash', 'hashing', timeout=10.0)
+    yield coordinator
+    coordinator.close()
+
+
+def test_partitions_cover_catalog_once(parts):
+    partitions = partition_parts(parts, 3)
+    positions = sorted(p for members, _ in partitions for p in members)
+    assert positions == list(range(len(parts)))
+
+
+def test_merge_matches_single_shard(parts, hash_coordinator):
+    single = reference_shard(parts)
+    for query in ['radiator hose', 'brake pad scorpio', 'battery']:
+        merged = hash_coordinator.search_detailed(query, top_k=8, include_parts=False)
+        expected = single.search(query, k=8, include_parts=False)['results']
+        assert not merged['partial']
+        assert set(merged['shards'].values()) == {'ok'}
+        assert [h['position'] for h in merged['results']] == [h['position'] for h in expected]
+        scores = [h['score'] for h in merged['results']]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_keyword_scores_use_global_idf(parts, hash_coordinator):
+    single = reference_shard(parts)
+    query = 'clutch plate thar'
+    expected = {h['position']: h['keyword_score'] for h in single.search(query, k=len(parts))['results']}
+    merged = hash_coordinator.search_detailed(query, top_k=len(parts), include_parts=False)['results']
+    assert len(merged) == len(parts)
+    for hit in merged:
+        assert hit['keyword_score'] == pytest.approx(expected[hit['position']], abs=1e-5)
+
+
+def test_search_ids_are_catalog_positions(parts, hash_coordinator):
+    detailed = hash_coordinator.search_detailed('radiator', top_k=5)['results']
+    ids = hash_coordinator.search_ids('radiator', top_k=5)
+    assert [i for i, _ in ids] == [h['position'] for h in detailed]
+    assert all(parts[h['position']] == h['part'] for h in detailed)
+
+
+def test_stalled_shard_marks_result_partial(parts):
+    clients = [LocalShardClient(i, members, 'hashing', positions=positions)
+               for i, (positions, members) in enumerate(partition_parts(parts, 2))]
+    coordinator = ShardCoordinator([clients[0], _StalledClient(clients[1])], timeout=0.3, parts=parts)
+    try:
+        coordinator.initialize()
+        result = coordinator.search_detailed('radiator', top_k=5, include_parts=False)
+        assert result['partial']
+        assert result['shards'] == {0: 'ok', 1: 'timeout'}
+        assert result['results']
+        assert all(h['shard_id'] == 0 for h in result['results'])
+    finally:
+        coordinator.close()
+
+
+def test_category_routing_ignores_case_and_punctuation():
+    variants = ['Brake System', 'brake system', 'BRAKE-SYSTEM', ' brake  system ']
+    owners = {shard_for({'category': v}, 4, 'category') for v in variants}
+    assert len(owners) == 1
+
+
+def test_category_filter_reaches_owning_shard_only(parts):
+    coordinator = start_local_shards(parts, 3, 'category', 'hashing', timeout=10.0)
+    try:
+        owner = shard_for({'category': 'Brake System'}, 3, 'category')
+        targets = coordinator._targets({'category': 'brake system'})
+        assert [c.shard_id for c in targets] == [owner]
+        result = coordinator.search_detailed('pad', top_k=20, filters={'category': 'BRAKE SYSTEM'})
+        assert set(result['shards']) == {owner}
+        assert result['results']
+        assert all(h['part']['category'] == 'Brake System' for h in result['results'])
+        expected = sum(1 for p in parts if p['category'] == 'Brake System')
+        assert len(result['results']) == min(20, expected)
+    finally:
+        coordinator.close()
+
+
+def test_forked_workers_get_their_own_shards(parts, hash_coordinator):
+    # gunicorn with preload_app builds the coordinator in the master and forks workers from it
+    queries = [f"{c} {v}" for c in ['pad', 'disc', 'radiator', 'hose', 'plate', 'battery', 'spring']
+               for v in ['scorpio', 'thar', 'xuv700']]
+    expected = {q: [list(hit) for hit in hash_coordinator.search_ids(q, top_k=5)] for q in queries}
+    children = []
+    for worker in range(4):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _forked_worker(hash_coordinator, queries[worker:] + queries[:worker], expected, write_fd)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+    reports = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd, 'rb') as f:
+            reports.append(json.loads(f.read() or b'{}'))
+        os.waitpid(pid, 0)
+    assert reports == [{'wrong': 0}] * 4
+    # The workers' exits left the parent's shards running and its pipes in step
+    assert [list(hit) for hit in hash_coordinator.search_ids('radiator thar', top_k=5)] == expected['radiator thar']
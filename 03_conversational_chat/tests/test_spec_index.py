@@ -0,0 +1,109 @@
+"""
+Spec index tests
+Range-expression parsing (units, comparators, false positives) and resolving predicates over sorted columns
+"""
+
+import math
+import os
+import sys
+
+import pytest
+
+# Modules under test live in 03_conversational_chat
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from spec_index import SpecPredicate, SpecRangeIndex, parse_spec_expressions
+
+
+def bounds(query):
+    return [(p.column, p.low, p.high, p.include_low, p.include_high) for p in parse_spec_expressions(query)]
+
+
+@pytest.fixture(scope='module')
+def parts():
+    return [
+        {'name': 'brake pad', 'technical_specs': {'weight_kg': 1.2, 'operating_temp_max': 350}},
+        {'name': 'radiator', 'technical_specs': {'weight_kg': 6.5, 'pressure_rating_bar': 1.5}},
+        {'name': 'battery', 'technical_specs': {'weight_kg': 14.0, 'voltage_rating': '12V', 'current_rating_amp': 60}},
+        {'name': 'alternator', 'technical_specs': {'weight_kg': 5.0, 'voltage_rating': 14, 'current_rating_amp': 90}},
+        {'name': 'v-belt'},
+        {'name': 'fuse', 'technical_specs': {'current_rating_amp': 30, 'voltage_rating': 24}},
+    ]
+
+
+@pytest.fixture(scope='module')
+def index(parts):
+    return SpecRangeIndex(parts)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('weight under 5 kg', [('weight_kg', -math.inf, 5.0, True, False)]),
+    ('at least 10 kg', [('weight_kg', 10.0, math.inf, True, True)]),
+    ('between 10 and 20 kg', [('weight_kg', 10.0, 20.0, True, True)]),
+    ('20-10 kg', [('weight_kg', 10.0, 20.0, True, True)]),
+    ('10kg-20kg', [('weight_kg', 10.0, 20.0, True, True)]),
+    ('weight below 500 g', [('weight_kg', -math.inf, 0.5, True, False)]),
+    ('pressure above 2 bar', [('pressure_rating_bar', 2.0, math.inf, False, True)]),
+    ('12V-24V', [('voltage_rating', 12.0, 24.0, True, True)]),
+])
+def test_parses_ranges_in_base_units(query, expected):
+    assert bounds(query) == expected
+
+
+def test_exact_value_matches_at_given_precision():
+    (predicate,) = parse_spec_expressions('battery 12V')
+    assert predicate.column == 'voltage_rating'
+    assert (predicate.low, predicate.high) == (11.5, 12.5)
+    (predicate,) = parse_spec_expressions('weight of 4.5 kg')
+    assert (predicate.low, predicate.high) == pytest.approx((4.45, 4.55))
+
+
+def test_fahrenheit_is_converted():
+    (predicate,) = parse_spec_expressions('operating temperature above 212 f')
+    assert predicate.column == 'operating_temp_max'
+    assert predicate.low == pytest.approx(100.0)
+
+
+@pytest.mark.parametrize('query', [
+    'brake pads for 2015 a4',
+    'show 3 v-belts',
+    'top 5 a-pillar trims',
+    'filter for 2 f150',
+    'need 2 m hose clamps',
+    'part MP-2025-A442 price 2500',
+])
+def test_numbers_without_a_real_unit_are_left_alone(query):
+    assert parse_spec_expressions(query) == []
+
+
+def test_one_letter_unit_counts_after_an_attribute():
+    assert bounds('voltage 12 v') == [('voltage_rating', 11.5, 12.5, True, False)]
+    assert bounds('fuse 30A') == [('current_rating_amp', 29.5, 30.5, True, False)]
+
+
+@pytest.mark.parametrize('query', ['weight 10 kg to 20 mm', 'weight between 5 kg and 3 m', 'between 10 kg and 20 psi'])
+def test_range_across_dimensions_is_skipped(query):
+    assert parse_spec_expressions(query) == []
+
+
+def test_resolve_intersects_predicates(index):
+    ids = index.resolve(parse_spec_expressions('weight under 10 kg'))
+    assert ids.tolist() == [0, 1, 3]
+    ids = index.resolve(parse_spec_expressions('weight under 10 kg with current over 50 amps'))
+    assert ids.tolist() == [3]
+
+
+def test_resolve_excludes_parts_without_the_spec(index):
+    ids = index.resolve([SpecPredicate('voltage_rating', low=0.0)])
+    assert ids.tolist() == [2, 3, 5]
+
+
+def test_resolve_without_predicates_is_unrestricted(index):
+    assert index.resolve(parse_spec_expressions('brake pads for 2015 a4')) is None
+    assert index.resolve(parse_spec_expressions('weight 10 kg to 20 mm')) is None
+
+
+def test_resolve_strict_and_inclusive_bounds(index):
+    assert index.resolve(parse_spec_expressions('weight over 5 kg')).tolist() == [1, 2]
+    assert index.resolve(parse_spec_expressions('weight at least 5 kg')).tolist() == [1, 2, 3]
+    assert index.resolve(parse_spec_expressions('weight above 100 kg')).tolist() == []
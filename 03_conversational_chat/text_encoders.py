@@ -0,0 +1,210 @@
+"""
+IntelliPart Text Encoders
+Pluggable, offline-capable embedding backends selected by explicit configuration
+"""
+
+import inspect
+import os
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+LOCAL_MODELS_DIR = Path(__file__).parent / "models"
+
+
+class EncoderUnavailableError(RuntimeError):
+    """Raised when a configured backend cannot be loaded; no fallback is attempted."""
+
+
+def part_to_embedding_text(part: dict) -> str:
+    """Serialize the scalar attributes of a part as 'key: value' pairs for embedding."""
+    return '; '.join(f"{k}: {v}" for k, v in part.items() if v and isinstance(v, (str, int, float)))
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class TextEncoder:
+    """Encoder interface: ``encode`` returns L2-normalized float32 rows."""
+
+    name = 'base'
+    dimension = 0
+    # Model the vectors came from (None for model-free backends); recorded in embedding manifests
+    model_name: Optional[str] = None
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SentenceTransformerEncoder(TextEncoder):
+    """Local SentenceTransformer model; never reaches out to the network when ``local_only``.
+
+    A model under ``models/<name>`` is loaded from disk; otherwise only the
+    local hub cache is consulted (``local_files_only``), without touching
+    the process environment other libraries read.
+    """
+
+    name = 'sentence-transformers'
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, local_only: bool = True):
+        if SentenceTransformer is None:
+            raise EncoderUnavailableError("sentence_transformers is not installed")
+        local_path = LOCAL_MODELS_DIR / model_name
+        source = str(local_path) if local_path.exists() else model_name
+        self.model_name = model_name
+        options = {}
+        if local_only and not local_path.exists():
+            if 'local_files_only' not in inspect.signature(SentenceTransformer.__init__).parameters:
+                raise EncoderUnavailableError(
+                    f"Model '{model_name}' is not under {LOCAL_MODELS_DIR} and this sentence_transformers "
+                    f"version cannot be restricted to the local cache")
+            options['local_files_only'] = True
+        try:
+            self.model = SentenceTransformer(source, **options)
+        except Exception as e:
+            raise EncoderUnavailableError(f"Could not load SentenceTransformer '{source}': {e}") from e
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        vectors = self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False,
+                                    convert_to_numpy=True)
+        return _l2_normalize(vectors)
+
+
+class OnnxEncoder(TextEncoder):
+    """Quantized ONNX export of a sentence encoder run on onnxruntime's CPU provider.
+
+    ``model_dir`` must contain ``tokenizer.json`` and ``model_quantized.onnx``
+    (or ``model.onnx``). Embeddings are mean pooled over the attention mask.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_dir: str, max_length: int = 128):
+        if onnxruntime is None or Tokenizer is None:
+            raise EncoderUnavailableError("onnxruntime and tokenizers are required for the onnx backend")
+        model_dir = Path(model_dir)
+        self.model_name = str(model_dir)
+        model_path = next((model_dir / f for f in ('model_quantized.onnx', 'model.onnx')
+                           if (model_dir / f).exists()), None)
+        tokenizer_path = model_dir / 'tokenizer.json'
+        if model_path is None or not tokenizer_path.exists():
+            raise EncoderUnavailableError(f"No ONNX model/tokenizer found in {model_dir}")
+        try:
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = onnxruntime.InferenceSession(str(model_path), options,
+                                                        providers=['CPUExecutionProvider'])
+            self.input_names = {i.name for i in self.session.get_inputs()}
+            self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+            self.tokenizer.enable_truncation(max_length=max_length)
+            self.tokenizer.enable_padding()
+            self.dimension = int(self.session.get_outputs()[0].shape[-1])
+        except Exception as e:
+            # A corrupt or incompatible export must surface like a missing one
+            raise EncoderUnavailableError(f"Could not load ONNX model from {model_dir}: {e}") from e
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        texts = list(texts)
+        outputs: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in batch], dtype=np.int64)
+            attention = np.array([e.attention_mask for e in batch], dtype=np.int64)
+            feeds = {'input_ids': input_ids, 'attention_mask': attention}
+            if 'token_type_ids' in self.input_names:
+                feeds['token_type_ids'] = np.zeros_like(input_ids)
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = attention[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled)
+        if not outputs:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return _l2_normalize(np.vstack(outputs))
+
+
+class HashingNgramEncoder(TextEncoder):
+    """Dependency-free encoder: signed feature hashing of word and char n-grams.
+
+    Captures lexical overlap only, but needs no model files and encodes a
+    catalog in seconds, so semantic endpoints keep working on bare hosts.
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dimension: int = 384, char_ngrams: tuple = (3, 4)):
+        self.dimension = dimension
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> List[str]:
+        text = ' '.join(str(text).lower().split())
+        features = text.split()
+        padded = f" {text} "
+        for n in range(self.char_ngrams[0], self.char_ngrams[1] + 1):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, h % self.dimension] += 1.0 if (h >> 31) & 1 else -1.0
+        return _l2_normalize(vectors)
+
+
+ENCODER_BACKENDS = {
+    SentenceTransformerEncoder.name: SentenceTransformerEncoder,
+    OnnxEncoder.name: OnnxEncoder,
+    HashingNgramEncoder.name: HashingNgramEncoder,
+}
+
+
+def resolve_encoder(backend: Optional[str] = None, model: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """``(backend, model)`` after applying ``INTELLIPART_ENCODER`` / ``INTELLIPART_ENCODER_MODEL`` and defaults."""
+    backend = backend or os.environ.get('INTELLIPART_ENCODER', SentenceTransformerEncoder.name)
+    model = model or os.environ.get('INTELLIPART_ENCODER_MODEL')
+    if backend not in ENCODER_BACKENDS:
+        raise EncoderUnavailableError(f"Unknown encoder backend '{backend}'; choose from {sorted(ENCODER_BACKENDS)}")
+    if backend == OnnxEncoder.name:
+        return backend, model or str(LOCAL_MODELS_DIR / f"{DEFAULT_MODEL_NAME}-onnx")
+    if backend == SentenceTransformerEncoder.name:
+        return backend, model or DEFAULT_MODEL_NAME
+    return backend, None
+
+
+def create_encoder(backend: Optional[str] = None, model: Optional[str] = None) -> TextEncoder:
+    """Build the configured backend.
+
+    ``backend`` defaults to ``INTELLIPART_ENCODER`` (sentence-transformers,
+    onnx or hashing) and ``model`` to ``INTELLIPART_ENCODER_MODEL``. Loading
+    errors raise ``EncoderUnavailableError`` immediately.
+    """
+    backend, model = resolve_encoder(backend, model)
+    if backend == OnnxEncoder.name:
+        return OnnxEncoder(model)
+    if backend == SentenceTransformerEncoder.name:
+        return SentenceTransformerEncoder(model)
+    return HashingNgramEncoder()
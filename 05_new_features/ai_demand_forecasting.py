@@ -11,6 +11,11 @@ from typing import Dict, List, Any, Tuple
 from collections import defaultdict
 import pickle
 import os
+import sys
+
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
 
 # Optional ML imports - graceful degradation
 try:
@@ -42,8 +47,15 @@ class DemandForecaster:
         self.init_database()
         
     def init_database(self):
-        """Initialize demand forecasting database."""
-        conn = sqlite3.connect(self.data_path)
+        """Initialize demand forecasting database.
+
+        Reads use per-thread connections; every write is queued to the
+        database's single writer thread.
+        """
+        self.db = SQLiteDatabase(self.data_path, name='demand_forecasting')
+        self.db.transaction(self._create_schema)
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
         cursor = conn.cursor()
         
         # Historical demand data
@@ -89,20 +101,12 @@ class DemandForecaster:
                 training_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
     
     def generate_synthetic_demand_data(self, part_numbers: List[str], days: int = 365):
         """Generate realistic synthetic demand data for testing."""
         import random
         
-        conn = sqlite3.connect(self.data_path)
-        cursor = conn.cursor()
-        
-        # Clear existing data
-        cursor.execute('DELETE FROM demand_history')
-        
+        rows = []
         base_date = datetime.now() - timedelta(days=days)
         
         for part_number in part_numbers:
@@ -132,14 +136,9 @@ class DemandForecaster:
                 stock_level = random.randint(0, 100)
                 lead_time = random.randint(1, 14)
                 
-                cursor.execute('''
-                    INSERT INTO demand_history 
-                    (part_number, date, demand_quantity, price, stock_level, 
-                     lead_time, supplier, day_of_week)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     part_number,
-                    current_date.date(),
+                    current_date.date().isoformat(),
                     demand,
                     price,
                     stock_level,
@@ -148,14 +147,22 @@ class DemandForecaster:
                     current_date.weekday()
                 ))
         
-        conn.commit()
-        conn.close()
+        def replace_history(conn):
+            # Clear existing data
+            conn.execute('DELETE FROM demand_history')
+            conn.executemany('''
+                INSERT INTO demand_history 
+                (part_number, date, demand_quantity, price, stock_level, 
+                 lead_time, supplier, day_of_week)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        
+        self.db.transaction(replace_history)
         print(f"Generated {days} days of demand data for {len(part_numbers)} parts")
     
     def extract_features(self, part_number: str) -> List[Tuple]:
         """Extract features for machine learning model."""
-        conn = sqlite3.connect(self.data_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         cursor.execute('''
             SELECT date, demand_quantity, price, day_of_week
@@ -165,7 +172,6 @@ class DemandForecaster:
         ''', (part_number,))
         
         data = cursor.fetchall()
-        conn.close()
         
         if len(data) < 30:  # Need minimum data for meaningful features
             return []
@@ -254,8 +260,7 @@ class DemandForecaster:
     
     def _train_statistical_model(self, part_number: str) -> bool:
         """Train simple statistical model when ML libraries aren't available."""
-        conn = sqlite3.connect(self.data_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         cursor.execute('''
             SELECT demand_quantity FROM demand_history
@@ -265,7 +270,6 @@ class DemandForecaster:
         ''', (part_number,))
         
         recent_demands = [row[0] for row in cursor.fetchall()]
-        conn.close()
         
         if len(recent_demands) < 10:
             return False
@@ -351,41 +355,28 @@ class DemandForecaster:
         return predictions
     
     def _save_predictions(self, part_number: str, predictions: List[Dict], model_type: str):
-        """Save predictions to database."""
-        conn = sqlite3.connect(self.data_path)
-        cursor = conn.cursor()
-        
-        for pred in predictions:
-            cursor.execute('''
-                INSERT OR REPLACE INTO demand_forecasts
-                (part_number, forecast_date, predicted_demand, 
-                 confidence_interval_low, confidence_interval_high, model_used)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                part_number,
-                pred['date'],
-                pred['predicted_demand'],
-                pred['confidence_low'],
-                pred['confidence_high'],
-                model_type
-            ))
-        
-        conn.commit()
-        conn.close()
+        """Save predictions to database (queued to the writer thread; does not wait)."""
+        self.db.submit(lambda conn: conn.executemany('''
+            INSERT OR REPLACE INTO demand_forecasts
+            (part_number, forecast_date, predicted_demand, 
+             confidence_interval_low, confidence_interval_high, model_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(
+            part_number,
+            pred['date'],
+            pred['predicted_demand'],
+            pred['confidence_low'],
+            pred['confidence_high'],
+            model_type
+        ) for pred in predictions]))
     
     def _save_model_performance(self, part_number: str, model_type: str, mae: float):
-        """Save model performance metrics."""
-        conn = sqlite3.connect(self.data_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        """Save model performance metrics (queued to the writer thread; does not wait)."""
+        self.db.submit(lambda conn: conn.execute('''
             INSERT INTO model_performance
             (part_number, model_type, mae, accuracy_score)
             VALUES (?, ?, ?, ?)
-        ''', (part_number, model_type, mae, 100 - mae))
-        
-        conn.commit()
-        conn.close()
+        ''', (part_number, model_type, mae, 100 - mae)))
     
     def generate_inventory_recommendations(self, part_number: str) -> Dict[str, Any]:
         """Generate inventory management recommendations."""
@@ -13,6 +13,12 @@ import xml.etree.ElementTree as ET
 from dataclasses import dataclass
 import asyncio
 import aiohttp
+import os
+import sys
+
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
 
 @dataclass
 class SupplierConfig:
@@ -42,8 +48,12 @@ class EnterpriseIntegrator:
         self.init_database()
         
     def init_database(self):
-        """Initialize enterprise database."""
-        conn = sqlite3.connect(self.db_path)
+        """Initialize enterprise database (per-thread readers, one queued writer)."""
+        self.db = SQLiteDatabase(self.db_path, name='enterprise')
+        self.db.transaction(self._create_schema)
+        print("Enterprise database initialized")
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
         cursor = conn.cursor()
         
         # Parts master table
@@ -114,10 +124,6 @@ class EnterpriseIntegrator:
                 is_active BOOLEAN DEFAULT 1
             )
         ''')
-        
-        conn.commit()
-        conn.close()
-        print("Enterprise database initialized")
     
     def add_supplier_config(self, config: SupplierConfig):
         """Add supplier API configuration."""
@@ -227,37 +233,31 @@ class EnterpriseIntegrator:
     
     def update_parts_master(self, parts_data: List[Dict]):
         """Update parts master with new data."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for part in parts_data:
-            cursor.execute('''
-                INSERT OR REPLACE INTO parts_master 
-                (part_number, part_name, current_cost, stock_level, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                part.get('part_number'),
-                part.get('part_name'),
-                part.get('price', 0),
-                part.get('stock', 0),
-                datetime.now()
-            ))
-        
-        conn.commit()
-        conn.close()
+        updated_at = datetime.now().isoformat(' ')
+        self.db.executemany('''
+            INSERT OR REPLACE INTO parts_master 
+            (part_number, part_name, current_cost, stock_level, last_updated)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(
+            part.get('part_number'),
+            part.get('part_name'),
+            part.get('price', 0),
+            part.get('stock', 0),
+            updated_at
+        ) for part in parts_data])
         print(f"Updated {len(parts_data)} parts in master database")
     
     def get_price_trends(self, part_number: str, days: int = 30) -> List[Dict]:
         """Get price trends for a part."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
+        # Window as a bound parameter so every call reuses one prepared statement
         cursor.execute('''
             SELECT supplier_id, price, effective_date
             FROM price_history
-            WHERE part_number = ? AND effective_date >= date('now', '-{} days')
+            WHERE part_number = ? AND effective_date >= date('now', ?)
             ORDER BY effective_date DESC
-        '''.format(days), (part_number,))
+        ''', (part_number, f'-{int(days)} days'))
         
         trends = []
         for row in cursor.fetchall():
@@ -267,13 +267,11 @@ class EnterpriseIntegrator:
                 'date': row[2]
             })
         
-        conn.close()
         return trends
     
     def generate_procurement_alerts(self) -> List[Dict]:
         """Generate procurement alerts based on stock levels."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         cursor.execute('''
             SELECT part_number, part_name, stock_level, reorder_point
@@ -292,7 +290,6 @@ class EnterpriseIntegrator:
                 'urgency': 'HIGH' if row[2] == 0 else 'MEDIUM'
             })
         
-        conn.close()
         return alerts
 
 class RealTimeDataProcessor:
@@ -15,9 +15,15 @@ import io
 import csv
 from typing import Dict, List, Any
 import base64
+import os
+import sys
 import qrcode
 from PIL import Image
 
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
+
 # Import our existing modules
 try:
     from enhanced_intellipart_app import EnhancedIntelliPartApp
@@ -46,7 +52,10 @@ class MobileAPI:
         
     def init_mobile_database(self):
         """Initialize mobile-specific database tables."""
-        conn = sqlite3.connect('mobile_api.db')
+        self.db = SQLiteDatabase('mobile_api.db', name='mobile_api')
+        self.db.transaction(self._create_schema)
+    
+    def _create_schema(self, conn: sqlite3.Connection):
         cursor = conn.cursor()
         
         # API users and authentication
@@ -114,9 +123,6 @@ class MobileAPI:
             'admin',
             'intellipart_admin_api_key_2025'
         ))
-        
-        conn.commit()
-        conn.close()
     
     def require_auth(self, f):
         """Decorator for API authentication."""
@@ -150,17 +156,11 @@ class MobileAPI:
     
     def validate_api_key(self, api_key: str) -> Dict:
         """Validate API key and return user info."""
-        conn = sqlite3.connect('mobile_api.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        user = self.db.query_one('''
             SELECT id, username, role FROM api_users
             WHERE api_key = ? AND is_active = 1
         ''', (api_key,))
         
-        user = cursor.fetchone()
-        conn.close()
-        
         if user:
             return {
                 'id': user[0],
@@ -187,18 +187,12 @@ class MobileAPI:
             # Validate credentials
             password_hash = hashlib.sha256(password.encode()).hexdigest()
             
-            conn = sqlite3.connect('mobile_api.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            user = self.db.query_one('''
                 SELECT id, username, role FROM api_users
                 WHERE username = ? AND password_hash = ? AND is_active = 1
             ''', (username, password_hash))
             
-            user = cursor.fetchone()
-            
             if not user:
-                conn.close()
                 return jsonify({'error': 'Invalid credentials'}), 401
             
             # Create JWT token
@@ -211,23 +205,21 @@ class MobileAPI:
             
             token = jwt.encode(payload, self.app.config['SECRET_KEY'], algorithm='HS256')
             
-            # Save session
-            cursor.execute('''
-                INSERT INTO mobile_sessions 
-                (user_id, device_id, platform, session_token, expires_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                user[0], device_id, platform, token,
-                datetime.utcnow() + timedelta(days=7)
-            ))
-            
-            # Update last login
-            cursor.execute('''
-                UPDATE api_users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
-            ''', (user[0],))
+            def save_session(conn):
+                conn.execute('''
+                    INSERT INTO mobile_sessions 
+                    (user_id, device_id, platform, session_token, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    user[0], device_id, platform, token,
+                    (datetime.utcnow() + timedelta(days=7)).isoformat(' ')
+                ))
+                # Update last login
+                conn.execute('''
+                    UPDATE api_users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
+                ''', (user[0],))
             
-            conn.commit()
-            conn.close()
+            self.db.transaction(save_session)
             
             return jsonify({
                 'token': token,
@@ -335,8 +327,7 @@ class MobileAPI:
             
             if request.method == 'GET':
                 # Get favorites
-                conn = sqlite3.connect('mobile_api.db')
-                cursor = conn.cursor()
+                cursor = self.db.reader.cursor()
                 
                 cursor.execute('''
                     SELECT part_number, part_name, added_at FROM user_favorites
@@ -352,7 +343,6 @@ class MobileAPI:
                         'added_at': row[2]
                     })
                 
-                conn.close()
                 return jsonify({'favorites': favorites})
             
             elif request.method == 'POST':
@@ -364,18 +354,12 @@ class MobileAPI:
                 if not part_number:
                     return jsonify({'error': 'Part number required'}), 400
                 
-                conn = sqlite3.connect('mobile_api.db')
-                cursor = conn.cursor()
-                
-                cursor.execute('''
+                self.db.execute('''
                     INSERT OR IGNORE INTO user_favorites 
                     (user_id, part_number, part_name)
                     VALUES (?, ?, ?)
                 ''', (user_id, part_number, part_name))
                 
-                conn.commit()
-                conn.close()
-                
                 return jsonify({'success': True, 'message': 'Added to favorites'})
             
             elif request.method == 'DELETE':
@@ -385,17 +369,11 @@ class MobileAPI:
                 if not part_number:
                     return jsonify({'error': 'Part number required'}), 400
                 
-                conn = sqlite3.connect('mobile_api.db')
-                cursor = conn.cursor()
-                
-                cursor.execute('''
+                self.db.execute('''
                     DELETE FROM user_favorites 
                     WHERE user_id = ? AND part_number = ?
                 ''', (user_id, part_number))
                 
-                conn.commit()
-                conn.close()
-                
                 return jsonify({'success': True, 'message': 'Removed from favorites'})
         
         @self.app.route('/api/v1/analytics/dashboard', methods=['GET'])
@@ -469,18 +447,12 @@ class MobileAPI:
             })
     
     def log_mobile_search(self, user_id: int, query: str, search_type: str, results_count: int):
-        """Log mobile search for analytics."""
-        conn = sqlite3.connect('mobile_api.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        """Log mobile search for analytics (queued; the request does not wait for the write)."""
+        self.db.submit(lambda conn: conn.execute('''
             INSERT INTO mobile_search_history 
             (user_id, query, search_type, results_count)
             VALUES (?, ?, ?, ?)
-        ''', (user_id, query, search_type, results_count))
-        
-        conn.commit()
-        conn.close()
+        ''', (user_id, query, search_type, results_count)))
     
     def export_csv(self):
         """Export data as CSV."""
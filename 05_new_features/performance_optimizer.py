@@ -13,6 +13,12 @@ import threading
 import os
 from collections import defaultdict
 import sqlite3
+import sys
+
+# Shared modules (sqlite_access) live in the project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlite_access import SQLiteDatabase
+from text_normalization import normalize, part_search_text
 
 class PerformanceOptimizer:
     def __init__(self, jsonl_path: str, cache_dir: str = "cache"):
@@ -30,8 +36,16 @@ class PerformanceOptimizer:
         print("Performance optimizer initialized")
     
     def init_sqlite_index(self):
-        """Initialize SQLite database for fast lookups."""
-        conn = sqlite3.connect(self.db_path)
+        """Initialize SQLite database for fast lookups.
+
+        One database object per optimizer: searches read through per-thread
+        connections with cached statements, writes go through its writer queue.
+        """
+        self.db = SQLiteDatabase(self.db_path, name='performance_optimizer')
+        self.db.transaction(self._create_schema)
+        print("SQLite index initialized")
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
         cursor = conn.cursor()
         
         # Create parts table if not exists
@@ -58,14 +72,13 @@ class PerformanceOptimizer:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_cost ON parts(cost_numeric)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_stock ON parts(stock_numeric)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_searchable ON parts(searchable_text)')
-        
-        conn.commit()
-        conn.close()
-        print("SQLite index initialized")
     
     def index_parts_data(self, parts: List[Dict[str, Any]]):
         """Index parts data in SQLite for fast retrieval."""
-        conn = sqlite3.connect(self.db_path)
+        self.db.transaction(lambda conn: self._write_parts(conn, parts))
+        print(f"Indexed {len(parts)} parts in SQLite")
+    
+    def _write_parts(self, conn: sqlite3.Connection, parts: List[Dict[str, Any]]) -> None:
         cursor = conn.cursor()
         
         # Clear existing data
@@ -86,7 +99,7 @@ class PerformanceOptimizer:
             stock_numeric = self._extract_stock(part.get('stock', '0'))
             
             # Create searchable text
-            searchable_text = self._create_searchable_text(part)
+            searchable_text = part_search_text(part)
             
             # Store full JSON data
             json_data = json.dumps(part)
@@ -98,10 +111,6 @@ class PerformanceOptimizer:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (part_number, part_name, system, manufacturer, part_type,
                   cost_numeric, stock_numeric, searchable_text, json_data))
-        
-        conn.commit()
-        conn.close()
-        print(f"Indexed {len(parts)} parts in SQLite")
     
     def _extract_cost(self, cost_str: str) -> float:
         """Extract numeric cost."""
@@ -119,24 +128,6 @@ class PerformanceOptimizer:
         except:
             return 0
     
-    def _create_searchable_text(self, part: Dict[str, Any]) -> str:
-        """Create searchable text from part."""
-        import re
-        text_parts = []
-        
-        important_fields = [
-            'part_name', 'part_type', 'system', 'sub_system',
-            'manufacturer', 'type', 'material', 'feature'
-        ]
-        
-        for field in important_fields:
-            if field in part and part[field]:
-                text = str(part[field]).lower()
-                text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-                text_parts.append(text)
-        
-        return ' '.join(text_parts)
-    
     def fast_search(self, 
                    query: str = "",
                    system: str = "",
@@ -146,16 +137,16 @@ class PerformanceOptimizer:
                    min_stock: int = 0,
                    limit: int = 20) -> List[Dict[str, Any]]:
         """Fast search using SQLite index."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Build SQL query
         where_conditions = []
         params = []
         
         if query:
+            # searchable_text is stored normalized, so the query must be too
             where_conditions.append("searchable_text LIKE ?")
-            params.append(f"%{query.lower()}%")
+            params.append(f"%{normalize(query)}%")
         
         if system:
             where_conditions.append("system = ?")
@@ -190,14 +181,11 @@ class PerformanceOptimizer:
         for row in cursor.fetchall():
             part_data = json.loads(row[0])
             results.append(part_data)
-        
-        conn.close()
         return results
     
     def get_filter_options_fast(self) -> Dict[str, List[str]]:
         """Get filter options using SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Get unique systems
         cursor.execute("SELECT DISTINCT system FROM parts WHERE system != '' ORDER BY system")
@@ -211,8 +199,6 @@ class PerformanceOptimizer:
         cursor.execute("SELECT DISTINCT part_type FROM parts WHERE part_type != '' ORDER BY part_type")
         part_types = [row[0] for row in cursor.fetchall()]
         
-        conn.close()
-        
         return {
             'systems': systems,
             'manufacturers': manufacturers,
@@ -221,8 +207,7 @@ class PerformanceOptimizer:
     
     def get_stats_fast(self) -> Dict[str, Any]:
         """Get statistics using SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.db.reader.cursor()
         
         # Basic counts
         cursor.execute("SELECT COUNT(*) FROM parts")
@@ -244,8 +229,6 @@ class PerformanceOptimizer:
         stock_stats = cursor.fetchone()
         total_stock, out_of_stock = stock_stats if stock_stats[0] else (0, 0)
         
-        conn.close()
-        
         return {
             'total_parts': total_parts,
             'unique_systems': unique_systems,
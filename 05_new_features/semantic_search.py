@@ -1,17 +1,56 @@
 import json
+import heapq
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import os
+import sys
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+# Bulk embedding artifacts (and their checks) and multi-field embeddings come from the conversational chat module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '03_conversational_chat')))
+from catalog_artifacts import load_embedding_artifact
+from multi_field_embeddings import MultiFieldEmbeddingIndex
+from text_encoders import TextEncoder
+
+
+class _LoadedModelEncoder(TextEncoder):
+    """TextEncoder over the SentenceTransformer this engine has already loaded."""
+
+    name = 'sentence-transformers'
+
+    def __init__(self, model: SentenceTransformer, model_name: str):
+        self.model = model
+        self.model_name = model_name
+        self.dimension = model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size: int = 64) -> np.ndarray:
+        vectors = np.asarray(self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False),
+                             dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
 
 class SemanticPartsSearch:
-    def __init__(self, jsonl_path: str, model_name: str = 'all-MiniLM-L6-v2'):
-        """Initialize semantic search with sentence transformers."""
+    def __init__(self, jsonl_path: str, model_name: str = 'all-MiniLM-L6-v2', embeddings_dir: Optional[str] = None,
+                 embedding_mode: Optional[str] = None):
+        """Initialize semantic search with sentence transformers.
+
+        ``embeddings_dir`` points at the output of 03_conversational_chat/build_embeddings.py;
+        when it holds a complete build of this catalog with this model it is memory-mapped
+        (and searched in place) instead of re-encoding.
+
+        ``embedding_mode`` (default INTELLIPART_EMBEDDING_MODE, else 'single') chooses between
+        one embedding of ``create_part_text`` per part and 'multi_field': name, hierarchy and
+        specs embedded separately and fused with the default field weights, as in the web app.
+        """
         self.parts = []
         self.embeddings = None
+        self.normalized_embeddings = None
+        self.embedding_mode = embedding_mode or os.environ.get('INTELLIPART_EMBEDDING_MODE', 'single')
+        self.field_index: Optional[MultiFieldEmbeddingIndex] = None
         self.model = None
         self.model_name = model_name
         self.embeddings_file = 'parts_embeddings.pkl'
@@ -23,12 +62,20 @@ class SemanticPartsSearch:
         self.model = SentenceTransformer(model_name)
         
         # Load or generate embeddings
-        if os.path.exists(self.embeddings_file):
-            print("Loading pre-computed embeddings...")
-            self.load_embeddings()
+        if self.embedding_mode == 'multi_field':
+            self.field_index = MultiFieldEmbeddingIndex(self.parts, _LoadedModelEncoder(self.model, model_name))
+            print(f"Multi-field embeddings built in {self.field_index.build_seconds:.2f}s "
+                  f"({', '.join(self.field_index.fields)})")
+        elif embeddings_dir and self.load_bulk_embeddings(embeddings_dir):
+            print(f"Using bulk-built embeddings from {embeddings_dir}")
         else:
-            print("Generating embeddings for the first time...")
-            self.generate_embeddings()
+            if os.path.exists(self.embeddings_file):
+                print("Loading pre-computed embeddings...")
+                self.load_embeddings()
+            else:
+                print("Generating embeddings for the first time...")
+                self.generate_embeddings()
+            self._normalize_embeddings()
             
         print(f"Semantic search ready with {len(self.parts)} parts!")
     
@@ -80,114 +127,124 @@ class SemanticPartsSearch:
             self.embeddings = pickle.load(f)
         print("Embeddings loaded from cache")
     
+    def _normalize_embeddings(self):
+        """L2-normalize embeddings once so cosine similarity is a single dot product."""
+        embeddings = np.asarray(self.embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.normalized_embeddings = embeddings / norms
+    
+    def _cosine_scores(self, vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of one vector against every part."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        if self.field_index is not None:
+            return self.field_index.scores(vector)
+        return self.normalized_embeddings @ vector
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int, threshold: float, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Indices and scores of the k best entries above threshold, best first."""
+        mask = scores > threshold
+        if exclude is not None:
+            mask[exclude] = False
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0 or k <= 0:
+            return []
+        if candidates.size > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(int(i), float(scores[i])) for i in candidates]
+    
+    def _materialize(self, ranked: List[Tuple[int, float]], score_key: str) -> List[Dict[str, Any]]:
+        """Copy only the winning parts and attach their score."""
+        results = []
+        for idx, score in ranked:
+            part = self.parts[idx].copy()
+            part[score_key] = score
+            results.append(part)
+        return results
+    
+    def _semantic_scores(self, query: str, top_k: int, threshold: float) -> List[Tuple[int, float]]:
+        query_embedding = self.model.encode([query])[0]
+        return self._top_k(self._cosine_scores(query_embedding), top_k, threshold)
+    
+    def load_bulk_embeddings(self, embeddings_dir: str) -> bool:
+        """Memory-map embeddings written by the bulk embedding job, if they fit this catalog and model."""
+        embeddings = load_embedding_artifact(embeddings_dir, self.parts, 'sentence-transformers', self.model_name,
+                                             self.model.get_sentence_embedding_dimension())
+        if embeddings is None:
+            return False
+        # Already L2-normalized by the job; searching the mapping avoids a full copy in RAM
+        self.embeddings = self.normalized_embeddings = embeddings
+        return True
+    
     def semantic_search(self, query: str, top_k: int = 10, threshold: float = 0.1) -> List[Dict[str, Any]]:
         """Perform semantic search using cosine similarity."""
         start_time = time.time()
         
-        # Generate embedding for query
-        query_embedding = self.model.encode([query])
-        
-        # Calculate similarities
-        similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-        
-        # Get top results above threshold
-        results = []
-        for i, similarity in enumerate(similarities):
-            if similarity > threshold:
-                part = self.parts[i].copy()
-                part['_similarity_score'] = float(similarity)
-                results.append(part)
-        
-        # Sort by similarity
-        results.sort(key=lambda x: x['_similarity_score'], reverse=True)
+        ranked = self._semantic_scores(query, top_k, threshold)
+        results = self._materialize(ranked, '_similarity_score')
         
         search_time = time.time() - start_time
         print(f"Semantic search completed in {search_time:.3f}s - Found {len(results)} results")
         
-        return results[:top_k]
+        return results
     
     def hybrid_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
         """Combine keyword and semantic search."""
-        # Semantic search
-        semantic_results = self.semantic_search(query, top_k * 2)
-        
-        # Keyword search
-        keyword_results = self.keyword_search(query, top_k * 2)
-        
-        # Combine and deduplicate
-        combined = {}
-        
-        # Add semantic results with boost
-        for result in semantic_results:
-            part_id = result.get('part_number', str(id(result)))
-            combined[part_id] = result
-            combined[part_id]['_hybrid_score'] = result['_similarity_score'] * 0.7
-        
-        # Add keyword results
-        for result in keyword_results:
-            part_id = result.get('part_number', str(id(result)))
-            if part_id in combined:
-                # Boost if found in both
-                combined[part_id]['_hybrid_score'] += result.get('_match_score', 0) * 0.3
-            else:
-                result['_hybrid_score'] = result.get('_match_score', 0) * 0.3
-                combined[part_id] = result
+        semantic_ranked = self._semantic_scores(query, top_k * 2, 0.1)
+        keyword_ranked = self._keyword_scores(query, top_k * 2)
         
-        # Sort by hybrid score
-        final_results = list(combined.values())
-        final_results.sort(key=lambda x: x.get('_hybrid_score', 0), reverse=True)
+        # Weighted score fusion keyed by part index; a part found by both
+        # retrievers gets both contributions
+        fused: Dict[int, float] = {}
+        for idx, score in semantic_ranked:
+            fused[idx] = score * 0.7
+        for idx, score in keyword_ranked:
+            fused[idx] = fused.get(idx, 0.0) + score * 0.3
         
-        return final_results[:top_k]
+        winners = heapq.nlargest(top_k, fused.items(), key=lambda x: x[1])
+        return self._materialize(winners, '_hybrid_score')
     
-    def keyword_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
-        """Simple keyword search for hybrid approach."""
+    def _keyword_scores(self, query: str, top_k: int) -> List[Tuple[int, float]]:
         query_lower = query.lower()
-        results = []
-        
-        for part in self.parts:
+        scored = []
+        for i, part in enumerate(self.parts):
             match_score = 0
-            for key, value in part.items():
+            for value in part.values():
                 if isinstance(value, str) and query_lower in value.lower():
                     match_score += 1
-            
             if match_score > 0:
-                part_copy = part.copy()
-                part_copy['_match_score'] = match_score
-                results.append(part_copy)
-        
-        results.sort(key=lambda x: x['_match_score'], reverse=True)
-        return results[:top_k]
+                scored.append((i, match_score))
+        return heapq.nlargest(top_k, scored, key=lambda x: x[1])
+    
+    def keyword_search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Simple keyword search for hybrid approach."""
+        return self._materialize(self._keyword_scores(query, top_k), '_match_score')
     
     def find_similar_parts(self, part_number: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Find parts similar to a given part."""
-        # Find the part
-        target_part = None
         target_index = None
-        
         for i, part in enumerate(self.parts):
             if part.get('part_number') == part_number:
-                target_part = part
                 target_index = i
                 break
         
-        if target_part is None:
+        if target_index is None:
             print(f"Part {part_number} not found")
             return []
         
-        # Get similarities with all other parts
-        target_embedding = self.embeddings[target_index].reshape(1, -1)
-        similarities = cosine_similarity(target_embedding, self.embeddings)[0]
-        
-        # Get top similar parts (excluding the part itself)
-        results = []
-        for i, similarity in enumerate(similarities):
-            if i != target_index and similarity > 0.3:  # Exclude self and low similarity
-                part = self.parts[i].copy()
-                part['_similarity_score'] = float(similarity)
-                results.append(part)
-        
-        results.sort(key=lambda x: x['_similarity_score'], reverse=True)
-        return results[:top_k]
+        # Exclude the part itself and low-similarity parts
+        if self.field_index is not None:
+            scores = self.field_index.part_scores(target_index)
+        else:
+            scores = self.normalized_embeddings @ self.normalized_embeddings[target_index]
+        ranked = self._top_k(scores, top_k, 0.3, exclude=target_index)
+        return self._materialize(ranked, '_similarity_score')
 
 def interactive_semantic_search():
     """Interactive semantic search interface."""
@@ -0,0 +1,302 @@
+"""
+IntelliPart Hierarchy Index
+System -> Sub System -> Sub Sub System tree with part counts, cost and stock rollups and a posting list per node
+
+Every part is filed under the path its own fields name: the legacy
+``System Name`` / ``Sub System Name`` / ``Sub Sub System Name`` columns, or
+``category`` / ``subcategory`` in the generated datasets. Once a part uses the
+legacy columns the tree is also seeded from the hierarchy CSV
+(``6 Attributes.csv``), so that taxonomy's branches without parts are
+browsable too; a catalog of categories alone does not get the CSV's empty systems.
+Names are matched ignoring case, punctuation, plurals and the word "system",
+so ``BRAKES SYSTEM`` from the CSV and a ``Brake System`` category are one node.
+
+Each node keeps the positions of every part in its subtree, as an
+insertion-ordered set, and running totals of the rollup metrics. Counts and
+rollups are read, not recomputed with GROUP BYs. ``add_part`` and
+``remove_part`` update the path from the part's node to the root in O(depth),
+so the index follows catalog changes without a rebuild.
+"""
+
+import csv
+import itertools
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from text_normalization import normalize
+
+DEFAULT_HIERARCHY_CSV = (Path(__file__).parent / '01_dataset_expansion' / 'production_dataset'
+                         / 'datasets' / '6 Attributes.csv')
+
+LEVELS = ('system', 'sub_system', 'sub_sub_system')
+# Part fields naming each level, legacy columns first
+LEVEL_FIELDS = (
+    ('System Name', 'system_name', 'system', 'category'),
+    ('Sub System Name', 'sub_system_name', 'sub_system', 'subcategory'),
+    ('Sub Sub System Name', 'Sub Sub Sytem Name', 'sub_sub_system_name', 'sub_sub_system'),
+)
+# (code column, name column) per level in the CSV; the last header is misspelled in the source file
+CSV_LEVEL_COLUMNS = (
+    ('System', 'System Name'),
+    ('Sub System', 'Sub System Name'),
+    ('Sub Sub System', ('Sub Sub System Name', 'Sub Sub Sytem Name')),
+)
+# Top-level fields that name a system from the CSV taxonomy (as opposed to a generated category)
+CSV_SYSTEM_FIELDS = LEVEL_FIELDS[0][:-1]
+UNCLASSIFIED = 'Unclassified'
+ROOT_NAME = 'All Systems'
+
+# First number in a price or stock string ("₹2,500", "120 units")
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value).replace(',', ''))
+    return float(match.group()) if match else None
+
+
+def _first_number(part: Dict[str, Any], fields: Sequence[str]) -> Optional[float]:
+    for field in fields:
+        head, _, rest = field.partition('.')
+        value = part.get(head)
+        if rest:
+            value = value.get(rest) if isinstance(value, dict) else None
+        number = _number(value)
+        if number is not None:
+            return number
+    return None
+
+
+def part_cost(part: Dict[str, Any]) -> Optional[float]:
+    return _first_number(part, ('cost_price', 'cost'))
+
+
+def part_stock(part: Dict[str, Any]) -> Optional[float]:
+    return _first_number(part, ('stock', 'supply_chain.current_stock', 'current_stock'))
+
+
+def part_inventory_value(part: Dict[str, Any]) -> Optional[float]:
+    cost, stock = part_cost(part), part_stock(part)
+    if cost is None or stock is None:
+        return None
+    return cost * stock
+
+
+# Rollup name -> per-part value (None when the part does not carry it)
+ROLLUP_METRICS: Dict[str, Callable[[Dict[str, Any]], Optional[float]]] = {
+    'cost': part_cost,
+    'stock': part_stock,
+    'inventory_value': part_inventory_value,
+}
+
+
+def node_key(name: str) -> str:
+    """URL-safe key of one hierarchy level name ("Brake System" -> "brake-system")."""
+    return normalize(name).replace(' ', '-')
+
+
+def match_key(name: str) -> str:
+    """Key under which level names are merged ("BRAKES SYSTEM", "Brake System" -> "brake")."""
+    tokens = [t[:-1] if len(t) > 3 and t.endswith('s') and not t.endswith('ss') else t
+              for t in normalize(name).split()]
+    core = [t for t in tokens if t not in ('system', 'systems')]
+    return ' '.join(core or tokens)
+
+
+def part_path(part: Dict[str, Any]) -> List[str]:
+    """Level names of a part from the top down, stopping at the first level it does not name."""
+    path = []
+    for fields in LEVEL_FIELDS:
+        name = next((str(part[f]).strip() for f in fields if part.get(f) and str(part[f]).strip()), None)
+        if name is None or not node_key(name):
+            break
+        path.append(name)
+    return path or [UNCLASSIFIED]
+
+
+def load_hierarchy_rows(csv_path: Optional[str] = None) -> List[List[Tuple[str, str]]]:
+    """``[(code, name), ...]`` per CSV row, top level first; empty when the CSV is missing."""
+    path = Path(csv_path or os.environ.get('INTELLIPART_HIERARCHY_CSV') or DEFAULT_HIERARCHY_CSV)
+    if not path.exists():
+        return []
+    rows = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            levels = []
+            for code_column, name_columns in CSV_LEVEL_COLUMNS:
+                names = (name_columns,) if isinstance(name_columns, str) else name_columns
+                name = next((row[c].strip() for c in names if (row.get(c) or '').strip()), None)
+                if name is None:
+                    break
+                levels.append(((row.get(code_column) or '').strip(), name))
+            if levels:
+                rows.append(levels)
+    return rows
+
+
+class HierarchyNode:
+    """One system, sub system or sub sub system: children, subtree part positions and rollup totals."""
+
+    __slots__ = ('id', 'name', 'code', 'level', 'parent', 'children', 'part_ids', 'totals', 'counts')
+
+    def __init__(self, node_id: str, name: str, code: Optional[str], level: int,
+                 parent: Optional['HierarchyNode'], metrics: Sequence[str]):
+        self.id = node_id
+        self.name = name
+        self.code = code
+        self.level = level
+        self.parent = parent
+        # Keyed by match_key of the child's name
+        self.children: Dict[str, 'HierarchyNode'] = {}
+        # Ordered set of subtree positions (dict keys): O(1) removal, pages in filing order
+        self.part_ids: Dict[int, None] = {}
+        self.totals = dict.fromkeys(metrics, 0.0)
+        self.counts = dict.fromkeys(metrics, 0)
+
+    def _add(self, idx: int, values: Dict[str, Optional[float]]) -> None:
+        self.part_ids[idx] = None
+        for metric, value in values.items():
+            if value is not None:
+                self.totals[metric] += value
+                self.counts[metric] += 1
+
+    def _remove(self, idx: int, values: Dict[str, Optional[float]]) -> None:
+        del self.part_ids[idx]
+        for metric, value in values.items():
+            if value is not None:
+                self.totals[metric] -= value
+                self.counts[metric] -= 1
+
+    @property
+    def part_count(self) -> int:
+        return len(self.part_ids)
+
+    def rollup(self, metric: str) -> Dict[str, Any]:
+        n = self.counts[metric]
+        return {'total': round(self.totals[metric], 2), 'average': round(self.totals[metric] / n, 2) if n else None,
+                'parts': n}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'level': LEVELS[self.level - 1] if self.level else 'root',
+            'part_count': self.part_count,
+            'child_count': len(self.children),
+            'rollups': {metric: self.rollup(metric) for metric in self.totals},
+        }
+
+
+class HierarchyIndex:
+    """The hierarchy tree over one catalog, addressed by node id ("brakes/brake-pads").
+
+    ``path`` files parts under another taxonomy (level names per part, top
+    down); the hierarchy CSV is only used with the default ``part_path``.
+    """
+
+    def __init__(self, parts: Iterable[Dict[str, Any]], hierarchy_csv: Optional[str] = None,
+                 metrics: Optional[Dict[str, Callable[[Dict[str, Any]], Optional[float]]]] = None,
+                 path: Optional[Callable[[Dict[str, Any]], List[str]]] = None):
+        self.metrics = dict(metrics or ROLLUP_METRICS)
+        self.root = HierarchyNode('', ROOT_NAME, None, 0, None, self.metrics)
+        self.nodes: Dict[str, HierarchyNode] = {'': self.root}
+        self.path = path or part_path
+        self.hierarchy_csv = hierarchy_csv
+        # Seeded from the CSV on the first part that names a CSV system
+        self._seeded = path is not None
+        # Position -> (leaf node, metric values), so removal needs neither the record nor a search
+        self._filed: Dict[int, Tuple[HierarchyNode, Dict[str, Optional[float]]]] = {}
+        for idx, part in enumerate(parts):
+            self.add_part(idx, part)
+
+    def _seed(self) -> None:
+        self._seeded = True
+        for levels in load_hierarchy_rows(self.hierarchy_csv):
+            self._ensure(levels)
+
+    def _ensure(self, levels: Sequence[Tuple[Optional[str], str]]) -> HierarchyNode:
+        """The node for ``[(code, name), ...]``, creating missing levels on the way down."""
+        node = self.root
+        for code, name in levels:
+            key = match_key(name)
+            child = node.children.get(key)
+            if child is None:
+                child_id = f'{node.id}/{node_key(name)}' if node.id else node_key(name)
+                child = HierarchyNode(child_id, name, code or None, node.level + 1, node, self.metrics)
+                node.children[key] = child
+                self.nodes[child_id] = child
+            elif code and child.code is None:
+                child.code = code
+            node = child
+        return node
+
+    def add_part(self, idx: int, part: Dict[str, Any]) -> None:
+        """File the part at position ``idx`` (again, if it moved) and add it to every ancestor's rollups."""
+        if idx in self._filed:
+            self.remove_part(idx)
+        if not self._seeded and any(part.get(f) for f in CSV_SYSTEM_FIELDS):
+            self._seed()
+        node = self._ensure([(None, name) for name in self.path(part)])
+        values = {metric: extract(part) for metric, extract in self.metrics.items()}
+        self._filed[idx] = (node, values)
+        while node is not None:
+            node._add(idx, values)
+            node = node.parent
+
+    def remove_part(self, idx: int) -> bool:
+        """Take position ``idx`` out of the tree; False if it was not indexed."""
+        entry = self._filed.pop(idx, None)
+        if entry is None:
+            return False
+        node, values = entry
+        while node is not None:
+            node._remove(idx, values)
+            node = node.parent
+        return True
+
+    def node(self, node_id: str = '') -> Optional[HierarchyNode]:
+        return self.nodes.get(node_id.strip('/'))
+
+    def children(self, node_id: str = '') -> List[HierarchyNode]:
+        """Children of a node, most parts first."""
+        node = self.node(node_id)
+        if node is None:
+            return []
+        return sorted(node.children.values(), key=lambda child: (-child.part_count, child.name))
+
+    def breadcrumb(self, node: HierarchyNode) -> List[Dict[str, Any]]:
+        path = []
+        while node.parent is not None:
+            path.append({'id': node.id, 'name': node.name})
+            node = node.parent
+        return path[::-1]
+
+    def browse(self, node_id: str = '', offset: int = 0, limit: int = 20) -> Optional[Dict[str, Any]]:
+        """A node, its children with counts and rollups, and one page of its subtree's part positions."""
+        node = self.node(node_id)
+        if node is None:
+            return None
+        offset = max(offset, 0)
+        return {
+            'node': node.summary(),
+            'path': self.breadcrumb(node),
+            'children': [child.summary() for child in self.children(node.id)],
+            'part_ids': list(itertools.islice(node.part_ids, offset, offset + limit)),
+            'offset': offset,
+            'total': node.part_count,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        per_level = [0] * len(LEVELS)
+        for node in self.nodes.values():
+            if node.level:
+                per_level[node.level - 1] += 1
+        return {'nodes': dict(zip(LEVELS, per_level)), 'parts': len(self._filed),
+                'metrics': list(self.metrics)}
@@ -0,0 +1,212 @@
+"""
+IntelliPart SQLite Access Layer
+Thread-safe SQLite for the analytics, search and feature modules: per-thread read
+connections, one writer thread fed by a queue, and cached prepared statements
+
+Every reading thread gets its own connection, so read-heavy endpoints run
+queries in parallel (sqlite3 releases the GIL while a statement steps)
+instead of serializing on one shared ``check_same_thread=False`` handle.
+All writes go through a single writer connection on its own thread, which
+is the only writer SQLite allows anyway; callers block on a Future (or not).
+
+Databases are WAL-mode files. ``SQLiteDatabase()`` without a path creates a
+private temporary file that is deleted on ``close()``, the drop-in
+replacement for the ``:memory:`` databases the modules used to build (a
+plain ``:memory:`` database cannot be opened by a second connection).
+``SQLiteDatabase(':memory:')`` selects a shared-cache in-memory database
+instead, for callers that must not touch the disk.
+
+Each connection keeps ``statement_cache`` prepared statements, keyed by the
+SQL text, so repeated queries skip parsing and planning. Pass parameters
+with ``?`` placeholders rather than formatting values into the SQL.
+"""
+
+import itertools
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_STATEMENT_CACHE = 256
+_memory_ids = itertools.count()
+_STOP = object()
+
+
+def _write_loop(jobs: 'queue.Queue', conn: sqlite3.Connection) -> None:
+    while True:
+        job = jobs.get()
+        if job is _STOP:
+            break
+        fn, future = job
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            with conn:  # one transaction per job: commit, or roll back on error
+                result = fn(conn)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+    conn.close()
+
+
+class SQLiteDatabase:
+    """One logical database shared by every thread of the process."""
+
+    def __init__(self, path: Optional[str] = None, statement_cache: int = DEFAULT_STATEMENT_CACHE,
+                 busy_timeout: float = 30.0, name: str = 'db'):
+        self.name = name
+        self.statement_cache = statement_cache
+        self.busy_timeout = busy_timeout
+        self.temporary = path is None
+        self.memory = path == ':memory:'
+        if self.temporary:
+            fd, path = tempfile.mkstemp(prefix=f'intellipart_{name}_', suffix='.db')
+            os.close(fd)
+        self.path = path
+        if self.memory:
+            self._uri = f'file:intellipart_{name}_{os.getpid()}_{next(_memory_ids)}?mode=memory&cache=shared'
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._uri = None
+
+        self._local = threading.local()
+        # (thread, connection) for every reader; connections of finished threads are closed lazily
+        self._readers: List[tuple] = []
+        self._readers_lock = threading.Lock()
+        self.stats = {'reads': 0, 'writes': 0, 'reader_connections': 0}
+
+        self._writer = self._connect(write=True)
+        self._jobs: 'queue.Queue' = queue.Queue()
+        self._closed = False
+        # The loop gets the queue and connection, not ``self``, so an unclosed
+        # database can still be garbage collected (and its writer stopped)
+        self._writer_thread = threading.Thread(target=_write_loop, args=(self._jobs, self._writer),
+                                               name=f'{name}-sqlite-writer', daemon=True)
+        self._writer_thread.start()
+
+    # --- connections ---
+
+    def _connect(self, write: bool) -> sqlite3.Connection:
+        if self.memory:
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.statement_cache, timeout=self.busy_timeout)
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False,
+                                   cached_statements=self.statement_cache, timeout=self.busy_timeout)
+        if self.memory:
+            # Shared-cache readers would otherwise take table locks against the writer
+            conn.execute('PRAGMA read_uncommitted=1')
+        elif write:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Temporary databases are rebuilt from the dataset, so durability is not needed
+            conn.execute(f"PRAGMA synchronous={'OFF' if self.temporary else 'NORMAL'}")
+        if not write:
+            conn.execute('PRAGMA query_only=1')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """This thread's read connection, opened on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"database '{self.name}' is closed")
+            conn = self._local.conn = self._connect(write=False)
+            with self._readers_lock:
+                self._prune_readers()
+                self._readers.append((weakref.ref(threading.current_thread()), conn))
+                self.stats['reader_connections'] += 1
+        return conn
+
+    def _prune_readers(self) -> None:
+        """Close connections whose thread has exited (request threads come and go). Caller holds the lock."""
+        live = []
+        for thread_ref, conn in self._readers:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                live.append((thread_ref, conn))
+            else:
+                conn.close()
+        self._readers = live
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        self.stats['reads'] += 1
+        return self.reader.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        self.stats['reads'] += 1
+        return self.reader.execute(sql, params).fetchone()
+
+    # --- writes (single writer thread) ---
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue ``fn(connection)`` to run in one transaction on the writer thread."""
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"database '{self.name}' is closed")
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        self.stats['writes'] += 1
+        return future
+
+    def transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(connection)`` as one write transaction and return its result."""
+        return self.submit(fn).result()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Run one write statement; returns the new row id (or affected row count for updates)."""
+        def run(conn):
+            cursor = conn.execute(sql, params)
+            return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
+        return self.transaction(run)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        return self.transaction(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def executescript(self, script: str) -> None:
+        self.transaction(lambda conn: conn.executescript(script))
+
+    # --- lifecycle ---
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._jobs.put(_STOP)
+        if threading.current_thread() is not self._writer_thread:
+            self._writer_thread.join(timeout=self.busy_timeout)
+        with self._readers_lock:
+            for _, conn in self._readers:
+                conn.close()
+            self._readers = []
+        if self.temporary:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+
+    def status(self) -> Dict[str, Any]:
+        with self._readers_lock:
+            self._prune_readers()
+            open_readers = len(self._readers)
+        return {
+            'name': self.name,
+            'path': self._uri or self.path,
+            'mode': 'shared-cache memory' if self.memory else 'wal',
+            'open_reader_connections': open_readers,
+            'pending_writes': self._jobs.qsize(),
+            'statement_cache': self.statement_cache,
+            **self.stats,
+        }
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,133 @@
+"""
+IntelliPart Text Normalization
+One compiled normalizer and tokenizer shared by every index builder and query path
+
+Normalized text is the lowercase alphanumeric tokens of the input joined by
+single spaces: punctuation, separators and repeated whitespace all collapse
+to one space, so ``"Brake-Pad (Front)"`` and ``"brake pad front"`` compare
+equal. Index builders store normalized text and query paths normalize the
+query with the same function, so index-time and query-time tokens agree.
+
+Catalog field values repeat heavily across parts and are normalized on
+every scan, so ``normalize_value`` memoizes them in a bounded LRU.
+``clean_query`` additionally drops filler words and request phrases
+("please", "can you", "show me", ...) in one pass over the tokens.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Bump when normalized output changes, so persisted indexes built from the old text are rebuilt
+NORMALIZATION_VERSION = 1
+
+MAX_TERM_LENGTH = 32
+VALUE_CACHE_SIZE = int(os.environ.get('INTELLIPART_NORMALIZE_CACHE_SIZE', '65536'))
+QUERY_CACHE_SIZE = 4096
+
+# Text-bearing fields across the generated and legacy datasets
+SEARCH_TEXT_FIELDS = (
+    'name', 'part_name', 'part_type', 'category', 'subcategory', 'system', 'sub_system',
+    'System Name', 'Sub System Name', 'Sub Sub System Name', 'Part Description',
+    'manufacturer', 'material', 'feature', 'type', 'description', 'application',
+    'part_id', 'part_number', 'Part Number', 'oem_part_number',
+)
+NESTED_SEARCH_TEXT_FIELDS = {
+    'technical_specs': ('material',),
+    'compatibility': ('vehicle_models', 'engine_types'),
+}
+
+STOP_PHRASES = (
+    'please', 'can you', 'could you', 'show me', 'find', 'list', 'give me', 'i want', 'i need',
+    'the', 'a', 'an', 'of', 'for', 'with', 'to', 'in', 'on', 'by', 'about', 'show', 'give', 'me', 'can',
+)
+STOP_WORDS = frozenset(p for p in STOP_PHRASES if ' ' not in p)
+
+# Letters and digits in any script; everything else separates tokens
+_TOKEN = re.compile(r'[^\W_]+')
+_STOP_PAIRS = frozenset(tuple(p.split()) for p in STOP_PHRASES if ' ' in p)
+
+
+def normalize(text: Any) -> str:
+    """Lowercase alphanumeric tokens of ``text`` joined by single spaces."""
+    if not isinstance(text, str):
+        text = '' if text is None else str(text)
+    return ' '.join(_TOKEN.findall(text.lower()))
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def _normalize_cached(text: str) -> str:
+    return normalize(text)
+
+
+def normalize_value(value: Any) -> str:
+    """``normalize`` memoized for catalog field values (strings only; other values are cheap or unique)."""
+    if isinstance(value, str):
+        return _normalize_cached(value)
+    return normalize(value)
+
+
+def tokenize(text: Any, max_length: int = MAX_TERM_LENGTH) -> List[str]:
+    """Normalized tokens of ``text``, each cut to ``max_length`` characters."""
+    if not isinstance(text, str):
+        text = '' if text is None else str(text)
+    return [t[:max_length] for t in _TOKEN.findall(text.lower())]
+
+
+def iter_token_spans(text: str) -> Iterator[Tuple[int, int, str]]:
+    """``(start, end, token)`` for each token of ``text.lower()``, for callers that rewrite tokens in place."""
+    for match in _TOKEN.finditer(text.lower()):
+        yield match.start(), match.end(), match.group()
+
+
+def strip_stop_phrases(tokens: List[str]) -> List[str]:
+    """Drop filler words and two-word request phrases in a single left-to-right pass."""
+    kept = []
+    i, n = 0, len(tokens)
+    while i < n:
+        if i + 1 < n and (tokens[i], tokens[i + 1]) in _STOP_PAIRS:
+            i += 2
+        elif tokens[i] in STOP_WORDS:
+            i += 1
+        else:
+            kept.append(tokens[i])
+            i += 1
+    return kept
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def clean_query(query: str) -> str:
+    """Normalized query without filler words, for direct field matching."""
+    return ' '.join(strip_stop_phrases(_TOKEN.findall(query.lower())))
+
+
+def part_text_values(part: Dict[str, Any]) -> Iterator[Any]:
+    """Raw values of a part's text-bearing attributes, in search-text order."""
+    for field in SEARCH_TEXT_FIELDS:
+        value = part.get(field)
+        if value:
+            yield value
+    for parent, fields in NESTED_SEARCH_TEXT_FIELDS.items():
+        block = part.get(parent)
+        if not isinstance(block, dict):
+            continue
+        for field in fields:
+            value = block.get(field)
+            if isinstance(value, list):
+                yield from (v for v in value if v)
+            elif value:
+                yield value
+
+
+def part_search_text(part: Dict[str, Any]) -> str:
+    """Normalized text of a part's text-bearing attributes, as stored by every keyword index."""
+    return ' '.join(t for t in map(normalize_value, part_text_values(part)) if t)
+
+
+def cache_info() -> Dict[str, Any]:
+    values, queries = _normalize_cached.cache_info(), clean_query.cache_info()
+    return {
+        'values': {'hits': values.hits, 'misses': values.misses, 'size': values.currsize, 'max_size': values.maxsize},
+        'queries': {'hits': queries.hits, 'misses': queries.misses, 'size': queries.currsize, 'max_size': queries.maxsize},
+    }